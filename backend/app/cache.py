@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import date
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from .database import reads_replica
+from .models import User, utc_now
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, the stdlib encoder is the fallback
+    orjson = None
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+
+class LRUCache:
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Any, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> Any | None:
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+
+
+def dump_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder)
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def bump_data_version(db: Session, user_id: int) -> int:
+    version = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=func.coalesce(User.data_version, 0) + 1, last_write_at=utc_now())
+        .returning(User.data_version)
+        .execution_options(synchronize_session="fetch")
+    ).scalar_one()
+    # Picked up at commit to stamp the transactions' change sequence.
+    db.info["change_seq"] = (user_id, version)
+    return version
+
+
+def cached_json(db: Session, request: Request, user: User, build: Callable[[], Any]) -> Response:
+    # Reports that look at "today" must not outlive the day they were computed on.
+    params = tuple(sorted(request.query_params.multi_items()))
+    key = (user.id, user.data_version or 0, request.url.path, params, date.today().isoformat())
+    etag = '"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in {value.strip().removeprefix("W/") for value in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key)
+    if body is None:
+        body = dump_json(build())
+        if reads_replica(db):
+            # Built from a possibly lagging replica: serve it, but neither cache it nor tag it with the version.
+            return Response(content=body, media_type="application/json", headers={"Cache-Control": "private, no-cache"})
+        response_cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,29 +1,152 @@
 from __future__ import annotations
 
 import os
-from collections.abc import Generator
+import time
+from collections.abc import AsyncGenerator, Callable, Generator
+from typing import Any, TypeVar
 
-from sqlalchemy import create_engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine, Table, create_engine, event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+
+from .pooling import default_profile, engine_options
 
 Base = declarative_base()
+T = TypeVar("T")
+
+
+def normalize_database_url(database_url: str) -> str:
+    if database_url.startswith("postgresql://"):
+        return database_url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return database_url
+
+
+DATABASE_URL = normalize_database_url(os.getenv("DATABASE_URL", "sqlite:///./cashlab.db"))
+DATABASE_READ_URL = normalize_database_url(os.getenv("DATABASE_READ_URL", "")) or None
+# How long after a write a user's reads stay on the primary, covering replica lag.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+# Applied to every SQLite connection: WAL lets readers run alongside an import, and the busy timeout makes
+# writers queue for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+}
+SQLITE_OPTIMIZE_INTERVAL = float(os.getenv("SQLITE_OPTIMIZE_INTERVAL", "3600"))
+
+
+def apply_sqlite_pragmas(engine: Engine) -> None:
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, _connection_record) -> None:  # noqa: ANN001
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+# Refreshes the planner statistics once per interval, on whichever connection is returned to the pool next.
+def schedule_sqlite_optimize(engine: Engine, interval: float = SQLITE_OPTIMIZE_INTERVAL) -> None:
+    last_run = time.monotonic()
+
+    @event.listens_for(engine, "checkin")
+    def optimize(dbapi_connection, _connection_record) -> None:  # noqa: ANN001
+        nonlocal last_run
+        if dbapi_connection is None or time.monotonic() - last_run < interval:
+            return
+        last_run = time.monotonic()
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA optimize")
+        cursor.close()
+
+
+def build_engine(database_url: str, profile: str) -> Engine:
+    engine = create_engine(database_url, **engine_options(database_url, profile))
+    if engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine)
+        schedule_sqlite_optimize(engine)
+    return engine
+
+
+# psycopg 3 serves both engines from the same URL; SQLite needs the aiosqlite driver for the async one.
+def async_database_url(database_url: str) -> str:
+    if database_url.startswith("sqlite:"):
+        return database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    return database_url
+
+
+def build_async_engine(database_url: str, profile: str) -> AsyncEngine:
+    async_engine = create_async_engine(
+        async_database_url(database_url), **engine_options(database_url, profile, is_async=True)
+    )
+    # PRAGMA optimize is left to the sync engine, which shares the file.
+    if async_engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(async_engine.sync_engine)
+    return async_engine
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./cashlab.db")
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sends reads to info["replica"] when a read-only dependency sets it, unless info["use_primary"] is set.
+# Code that may write calls use_primary() before its first read, so the rows it decides on come from the
+# primary and not from a replica that may lag; a flush or DML statement pins the session as a backstop.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, *, clause=None, **kw):  # noqa: ANN001, ANN201
+        if reads_replica(self):
+            if not isinstance(clause, UpdateBase):
+                return self.info["replica"]
+            self.info["use_primary"] = True
+        return super().get_bind(mapper, clause=clause, **kw)
 
 
-def init_database(database_url: str | None = None) -> None:
-    global engine, SessionLocal
+@event.listens_for(RoutingSession, "before_flush")
+def pin_flushing_session(session: Session, flush_context, instances) -> None:  # noqa: ANN001
+    session.info["use_primary"] = True
+
+
+def use_primary(db: Session) -> None:
+    db.info["use_primary"] = True
+
+
+def reads_replica(db: Session) -> bool:
+    return db.info.get("replica") is not None and not db.info.get("use_primary")
+
+
+DATABASE_PROFILE = default_profile()
+engine = build_engine(DATABASE_URL, DATABASE_PROFILE)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+async_engine = build_async_engine(DATABASE_URL, DATABASE_PROFILE)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=RoutingSession
+)
+read_engine = build_engine(DATABASE_READ_URL, DATABASE_PROFILE) if DATABASE_READ_URL else None
+async_read_engine = build_async_engine(DATABASE_READ_URL, DATABASE_PROFILE) if DATABASE_READ_URL else None
+
+
+def init_database(database_url: str | None = None, profile: str | None = None, read_url: str | None = None) -> None:
+    global DATABASE_PROFILE, engine, SessionLocal, async_engine, AsyncSessionLocal, read_engine, async_read_engine
     if database_url:
-        engine = create_engine(
-            database_url,
-            connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {},
+        DATABASE_PROFILE = profile or DATABASE_PROFILE
+        engine = build_engine(database_url, DATABASE_PROFILE)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+        async_engine = build_async_engine(database_url, DATABASE_PROFILE)
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine, autoflush=False, expire_on_commit=False, sync_session_class=RoutingSession
         )
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        read_engine = build_engine(read_url, DATABASE_PROFILE) if read_url else None
+        async_read_engine = build_async_engine(read_url, DATABASE_PROFILE) if read_url else None
+
+
+# Core table inserts: the ORM bulk path splits batches wherever a row's NULL columns differ.
+def insert_returning_ids(db: Session, table: Table, payload: list[dict]) -> list[int]:
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite has no insert sentinel, so ordered RETURNING degrades to one statement per row. Under the
+        # write lock its rowids are handed out in ascending VALUES order, so sorting restores parameter order.
+        return sorted(db.execute(insert(table).returning(table.c.id), payload).scalars().all())
+    return db.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), payload).scalars().all()
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -32,3 +155,31 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+# SQLite has no network round trip to overlap and aiosqlite funnels every statement through its own thread,
+# so there the async path only adds overhead (benchmarks/async_load.py). Async handlers get this stand-in
+# instead: the same run_sync/get calls, served by a plain Session in the threadpool.
+class ThreadedSession:
+    def __init__(self, session: Session) -> None:
+        self.sync_session = session
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def get(self, entity: Any, ident: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.get, entity, ident)
+
+
+# Async handlers hand their synchronous service code to db.run_sync. On Postgres it runs on the event loop
+# while every statement awaits the async driver instead of holding a threadpool slot.
+async def get_async_db() -> AsyncGenerator[AsyncSession | ThreadedSession, None]:
+    if engine.dialect.name == "sqlite":
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            yield ThreadedSession(db)
+        finally:
+            await run_in_threadpool(db.close)
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
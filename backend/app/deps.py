@@ -1,29 +1,69 @@
 from __future__ import annotations
 
+from datetime import UTC, timedelta
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .database import get_db
-from .models import User
+from . import database
+from .database import ThreadedSession, get_async_db, get_db
+from .models import User, utc_now
 from .security import decode_token
 
 bearer = HTTPBearer()
 
 
-def get_current_user(
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
-    db: Session = Depends(get_db),
-) -> User:
+def token_user_id(creds: HTTPAuthorizationCredentials) -> int:
     try:
         payload = decode_token(creds.credentials)
         if payload.get("type") != "access":
             raise ValueError("invalid token type")
-        user_id = int(payload["sub"])
+        return int(payload["sub"])
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
 
-    user = db.get(User, user_id)
+
+def get_current_user(
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    db: Session = Depends(get_db),
+) -> User:
+    user = db.get(User, token_user_id(creds))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     return user
+
+
+async def get_current_user_async(
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    user = await db.get(User, token_user_id(creds))
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return user
+
+
+def wrote_recently(user: User) -> bool:
+    if user.last_write_at is None:
+        return False
+    written_at = user.last_write_at if user.last_write_at.tzinfo else user.last_write_at.replace(tzinfo=UTC)
+    return utc_now() - written_at < timedelta(seconds=database.READ_YOUR_WRITES_SECONDS)
+
+
+# Read-heavy routes take these instead of get_db: same session, but its reads go to DATABASE_READ_URL unless
+# the user wrote within the read-your-writes window.
+def get_read_db(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> Session:
+    if database.read_engine is not None and not wrote_recently(user):
+        db.info["replica"] = database.read_engine
+    return db
+
+
+async def get_async_read_db(
+    db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user_async)
+) -> AsyncSession:
+    if database.async_read_engine is not None and not wrote_recently(user):
+        threaded = isinstance(db, ThreadedSession)
+        db.sync_session.info["replica"] = database.read_engine if threaded else database.async_read_engine.sync_engine
+    return db
@@ -4,13 +4,17 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import Base, engine
-from .routers import accounts, auth, categories, imports, installments, reports, transactions
+from . import database
+from .database import Base
+from .migrations import run_migrations
+from .pooling import pool_status
+from .routers import accounts, auth, budgets, categories, imports, installments, reports, rules, snapshots, transactions
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="CashLab API", version="0.1.0")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=database.engine)
+    run_migrations(database.engine)
     raw_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173")
     allow_origins = [origin.strip() for origin in raw_origins.split(",") if origin.strip()]
     app.add_middleware(
@@ -24,15 +28,30 @@ def create_app() -> FastAPI:
     app.include_router(auth.router)
     app.include_router(accounts.router)
     app.include_router(categories.router)
+    app.include_router(rules.router)
     app.include_router(transactions.router)
     app.include_router(imports.router)
     app.include_router(installments.router)
     app.include_router(reports.router)
+    app.include_router(budgets.router)
+    app.include_router(snapshots.router)
 
     @app.get("/health")
     def health() -> dict:
         return {"ok": True}
 
+    @app.get("/health/pool")
+    def health_pool() -> dict:
+        pools = {
+            "profile": database.DATABASE_PROFILE,
+            "sync": pool_status(database.engine.pool),
+            "async": pool_status(database.async_engine.sync_engine.pool),
+        }
+        if database.read_engine is not None and database.async_read_engine is not None:
+            pools["read_sync"] = pool_status(database.read_engine.pool)
+            pools["read_async"] = pool_status(database.async_read_engine.sync_engine.pool)
+        return pools
+
     return app
 
 
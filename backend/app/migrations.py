@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+
+from sqlalchemy import Connection, Engine, insert, inspect, select, text
+
+from .database import Base
+from .models import SchemaMigration
+from .search import setup_search_index
+from .services.balances import rebuild_balance_checkpoints
+from .services.budgets import rebuild_category_month_totals
+from .utils import fold_text, month_key
+
+BACKFILL_BATCH_SIZE = 1000
+# Serializes concurrent cold starts on Postgres so a step is never applied twice.
+MIGRATION_LOCK_KEY = 0x636173686C6162
+
+
+def _add_missing_columns(conn: Connection) -> set[tuple[str, str]]:
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    added: set[tuple[str, str]] = set()
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            # Columns are added as nullable so existing rows stay valid; backfills fill them in.
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            added.add((table.name, column.name))
+    return added
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def backfill_transaction_year_month(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "UPDATE transactions "
+            "SET year_month = CAST(substr(date, 1, 4) AS INTEGER) * 100 + CAST(substr(date, 6, 2) AS INTEGER) "
+            "WHERE year_month IS NULL AND date LIKE '____-__-__'"
+        )
+    )
+    # Legacy rows written with non-ISO dates are parsed in Python.
+    after = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, date FROM transactions WHERE year_month IS NULL AND id > :after ORDER BY id LIMIT :limit"),
+            {"after": after, "limit": BACKFILL_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        after = rows[-1].id
+        updates = [{"id": row.id, "year_month": month_key(row.date)} for row in rows]
+        updates = [item for item in updates if item["year_month"] is not None]
+        if updates:
+            conn.execute(text("UPDATE transactions SET year_month = :year_month WHERE id = :id"), updates)
+
+
+def backfill_transaction_search_text(conn: Connection) -> None:
+    after = 0
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, description FROM transactions WHERE search_text IS NULL AND id > :after ORDER BY id LIMIT :limit"
+            ),
+            {"after": after, "limit": BACKFILL_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        after = rows[-1].id
+        conn.execute(
+            text("UPDATE transactions SET search_text = :search_text WHERE id = :id"),
+            [{"id": row.id, "search_text": fold_text(row.description)} for row in rows],
+        )
+
+
+def backfill_user_data_version(conn: Connection) -> None:
+    conn.execute(text("UPDATE users SET data_version = 0 WHERE data_version IS NULL"))
+
+
+def backfill_category_normalized_name(conn: Connection) -> None:
+    taken = {
+        (row.user_id, row.normalized_name)
+        for row in conn.execute(text("SELECT user_id, normalized_name FROM categories WHERE normalized_name IS NOT NULL"))
+    }
+    updates = []
+    for row in conn.execute(text("SELECT id, user_id, name FROM categories WHERE normalized_name IS NULL ORDER BY id")):
+        key = (row.user_id, fold_text(row.name))
+        # Later case/accent variants of a name stay NULL so the unique index holds until they are merged.
+        if key in taken:
+            continue
+        taken.add(key)
+        updates.append({"id": row.id, "normalized_name": key[1]})
+    if updates:
+        conn.execute(text("UPDATE categories SET normalized_name = :normalized_name WHERE id = :id"), updates)
+
+
+def backfill_account_balance_checkpoints(conn: Connection) -> None:
+    account_ids = list(
+        conn.scalars(
+            text(
+                "SELECT DISTINCT account_id FROM transactions WHERE account_id IS NOT NULL "
+                "AND account_id NOT IN (SELECT account_id FROM account_balance_checkpoints)"
+            )
+        )
+    )
+    if account_ids:
+        rebuild_balance_checkpoints(conn, account_ids)
+
+
+def backfill_category_month_totals(conn: Connection) -> None:
+    category_ids = list(
+        conn.scalars(
+            text(
+                "SELECT DISTINCT category_id FROM transactions WHERE category_id IS NOT NULL "
+                "AND category_id NOT IN (SELECT category_id FROM category_month_totals)"
+            )
+        )
+    )
+    if category_ids:
+        rebuild_category_month_totals(conn, category_ids)
+
+
+def backfill_change_seq(conn: Connection) -> None:
+    conn.execute(text("UPDATE transactions SET change_seq = 0 WHERE change_seq IS NULL"))
+    conn.execute(text("UPDATE transaction_deletions SET change_seq = 0 WHERE change_seq IS NULL"))
+
+
+BACKFILLS = [
+    backfill_transaction_year_month,
+    backfill_transaction_search_text,
+    backfill_user_data_version,
+    backfill_category_normalized_name,
+    backfill_account_balance_checkpoints,
+    backfill_category_month_totals,
+    backfill_change_seq,
+]
+
+
+# Changes whenever a model gains a table, column or index, so the schema step reruns only then.
+def schema_fingerprint() -> str:
+    parts = sorted(
+        [f"{table.name}.{column.name}" for table in Base.metadata.sorted_tables for column in table.columns]
+        + [f"{table.name}:{index.name}" for table in Base.metadata.sorted_tables for index in table.indexes]
+    )
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+# Each step is recorded in schema_migrations once applied; startups after that skip the table scans.
+def run_migrations(engine: Engine) -> None:
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        applied = set(conn.scalars(select(SchemaMigration.name)))
+        pending: list[str] = []
+        schema_step = f"schema:{schema_fingerprint()}"
+        if schema_step not in applied:
+            _add_missing_columns(conn)
+            _create_missing_indexes(conn)
+            pending.append(schema_step)
+        for backfill in BACKFILLS:
+            if backfill.__name__ not in applied:
+                backfill(conn)
+                pending.append(backfill.__name__)
+        if pending:
+            conn.execute(insert(SchemaMigration), [{"name": name} for name in pending])
+        setup_search_index(conn)
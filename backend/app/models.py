@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, event, null, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
+from .utils import fold_text, month_key
 
 
 def utc_now() -> datetime:
@@ -18,6 +19,10 @@ class User(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     password_hash: Mapped[str] = mapped_column(String(255))
+    data_version: Mapped[int] = mapped_column(Integer, default=0)
+    rules_version: Mapped[int | None] = mapped_column(Integer, nullable=True, default=0)
+    categories_version: Mapped[int | None] = mapped_column(Integer, nullable=True, default=0)
+    last_write_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
 
 
@@ -32,11 +37,17 @@ class Account(Base):
 
 class Category(Base):
     __tablename__ = "categories"
-    __table_args__ = (UniqueConstraint("user_id", "name", name="uq_categories_user_name"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_categories_user_name"),
+        # A unique index rather than a constraint so run_migrations can add it to existing databases.
+        Index("ux_categories_user_normalized_name", "user_id", "normalized_name", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
     name: Mapped[str] = mapped_column(String(120))
+    # NULL only on legacy rows whose name collides with an older category; POST /categories/merge cleans them up.
+    normalized_name: Mapped[str | None] = mapped_column(String(120), nullable=True)
 
 
 class ImportJob(Base):
@@ -66,6 +77,8 @@ class ImportReviewItem(Base):
     resolved_amount_cents: Mapped[int | None] = mapped_column(Integer, nullable=True)
     resolved_category_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
     resolved_account_id: Mapped[int | None] = mapped_column(ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True)
+    transaction_id: Mapped[int | None] = mapped_column(ForeignKey("transactions.id", ondelete="CASCADE"), nullable=True)
+    duplicate_of_id: Mapped[int | None] = mapped_column(ForeignKey("transactions.id", ondelete="CASCADE"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
 
@@ -77,8 +90,17 @@ class InstallmentGroup(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
     base_description: Mapped[str] = mapped_column(String(255))
     total_cents: Mapped[int] = mapped_column(Integer)
+    # For recurring series: the occurrence cap, 0 when open-ended.
     installments: Mapped[int] = mapped_column(Integer)
     start_date: Mapped[str] = mapped_column(String(10))
+    kind: Mapped[str | None] = mapped_column(String(20), nullable=True, default="installments")
+    # Recurring series store the rule; occurrences are written lazily up to materialized_through.
+    interval_months: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    amount_cents: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    end_date: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    category_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
+    account_id: Mapped[int | None] = mapped_column(ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True)
+    materialized_through: Mapped[str | None] = mapped_column(String(10), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
 
 
@@ -86,12 +108,27 @@ class Transaction(Base):
     __tablename__ = "transactions"
     __table_args__ = (
         UniqueConstraint("user_id", "account_id", "dedupe_hash", name="uq_transactions_dedupe"),
+        Index("ix_transactions_user_date", "user_id", "date"),
+        Index("ix_transactions_user_category_date", "user_id", "category_id", "date"),
+        Index(
+            "ix_transactions_user_installment_date",
+            "user_id",
+            "date",
+            sqlite_where=text("installment_number IS NOT NULL"),
+            postgresql_where=text("installment_number IS NOT NULL"),
+        ),
+        Index("ix_transactions_user_updated", "user_id", "updated_at", "id"),
+        Index("ix_transactions_user_change_seq", "user_id", "change_seq", "id"),
+        Index("ix_transactions_account_date", "account_id", "date"),
+        Index("ix_transactions_user_installment_group", "user_id", "installment_group_id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
     date: Mapped[str] = mapped_column(String(10), index=True)
+    year_month: Mapped[int | None] = mapped_column(Integer, nullable=True)
     description: Mapped[str] = mapped_column(String(255), index=True)
+    search_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     amount_cents: Mapped[int] = mapped_column(Integer, index=True)
     category_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
     account_id: Mapped[int | None] = mapped_column(ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True)
@@ -105,5 +142,112 @@ class Transaction(Base):
     installment_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+    # NULL until the writing commit stamps it with the user's data_version (see services/sync.py).
+    change_seq: Mapped[int | None] = mapped_column(Integer, nullable=True, onupdate=null())
 
     category = relationship("Category")
+
+
+class CategoryRule(Base):
+    __tablename__ = "category_rules"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"))
+    match_type: Mapped[str] = mapped_column(String(20))
+    pattern: Mapped[str] = mapped_column(String(255))
+    account_id: Mapped[int | None] = mapped_column(ForeignKey("accounts.id", ondelete="CASCADE"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
+
+
+class AccountBalanceCheckpoint(Base):
+    __tablename__ = "account_balance_checkpoints"
+    __table_args__ = (UniqueConstraint("account_id", "year_month", name="uq_account_balance_checkpoints_month"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id", ondelete="CASCADE"))
+    year_month: Mapped[int] = mapped_column(Integer)
+    month_total_cents: Mapped[int] = mapped_column(Integer, default=0)
+    # Sum of every transaction of the account dated up to the end of year_month.
+    cumulative_cents: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class CategoryBudget(Base):
+    __tablename__ = "category_budgets"
+    __table_args__ = (UniqueConstraint("category_id", name="uq_category_budgets_category"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"))
+    # Monthly limit, applied to every month.
+    amount_cents: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
+
+
+class CategoryMonthTotal(Base):
+    __tablename__ = "category_month_totals"
+    __table_args__ = (UniqueConstraint("category_id", "year_month", name="uq_category_month_totals_month"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"))
+    year_month: Mapped[int] = mapped_column(Integer)
+    spent_cents: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class BudgetEvent(Base):
+    __tablename__ = "budget_events"
+    __table_args__ = (
+        UniqueConstraint("budget_id", "year_month", "kind", name="uq_budget_events_month_kind"),
+        Index("ix_budget_events_user_id_id", "user_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    budget_id: Mapped[int] = mapped_column(ForeignKey("category_budgets.id", ondelete="CASCADE"))
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"))
+    year_month: Mapped[int] = mapped_column(Integer)
+    kind: Mapped[str] = mapped_column(String(20))
+    spent_cents: Mapped[int] = mapped_column(Integer)
+    limit_cents: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
+
+
+class TransactionDeletion(Base):
+    __tablename__ = "transaction_deletions"
+    __table_args__ = (
+        Index("ix_transaction_deletions_user_id_id", "user_id", "id"),
+        Index("ix_transaction_deletions_user_change_seq", "user_id", "change_seq", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    transaction_id: Mapped[int] = mapped_column(Integer)
+    change_seq: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    applied_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
+
+
+# Bulk Core inserts skip mapper events, so they fill the derived columns through this helper.
+def with_derived_columns(values: dict) -> dict:
+    return {**values, "year_month": month_key(values["date"]), "search_text": fold_text(values["description"])}
+
+
+@event.listens_for(Transaction, "before_insert")
+@event.listens_for(Transaction, "before_update")
+def _sync_derived_columns(mapper, connection, target: Transaction) -> None:  # noqa: ANN001
+    target.year_month = month_key(target.date)
+    target.search_text = fold_text(target.description)
+
+
+@event.listens_for(Category, "before_insert")
+@event.listens_for(Category, "before_update")
+def _sync_normalized_name(mapper, connection, target: Category) -> None:  # noqa: ANN001
+    target.normalized_name = fold_text(target.name)
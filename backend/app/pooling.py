@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+ENGINE_PROFILES: dict[str, dict[str, Any]] = {
+    # Vercel instances serve a handful of requests at once and can freeze between them, so keep the pool
+    # tiny, recycle before Neon drops idle connections, and skip server-side prepares for PgBouncer.
+    "serverless": {
+        "pool_size": 1,
+        "max_overflow": 4,
+        "pool_timeout": 10,
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+        "connect_timeout": 5,
+        "prepared_statements": False,
+    },
+    "long-running": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "connect_timeout": 10,
+        "prepared_statements": True,
+    },
+    # Every test gets a fresh database file, so pooled connections would only outlive it.
+    "test": {"null_pool": True, "connect_timeout": 5, "prepared_statements": True},
+}
+PROFILE_OVERRIDES = {
+    "DB_POOL_SIZE": "pool_size",
+    "DB_MAX_OVERFLOW": "max_overflow",
+    "DB_POOL_TIMEOUT": "pool_timeout",
+    "DB_POOL_RECYCLE": "pool_recycle",
+    "DB_CONNECT_TIMEOUT": "connect_timeout",
+}
+
+
+def default_profile() -> str:
+    profile = os.getenv("DATABASE_PROFILE") or ("serverless" if os.getenv("VERCEL") else "long-running")
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DATABASE_PROFILE {profile!r}")
+    return profile
+
+
+def profile_settings(profile: str) -> dict[str, Any]:
+    settings = dict(ENGINE_PROFILES[profile])
+    for variable, key in PROFILE_OVERRIDES.items():
+        if os.getenv(variable):
+            settings[key] = int(os.environ[variable])
+    return settings
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+# Times every checkout, including the connect when the pool has to open a new connection.
+class MeteredPoolMixin:
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.record(time.perf_counter() - started, timed_out)
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(database_url: str, profile: str, is_async: bool = False) -> dict[str, Any]:
+    settings = profile_settings(profile)
+    url = make_url(database_url)
+    options: dict[str, Any] = {}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            return options
+    else:
+        connect_args: dict[str, Any] = {"connect_timeout": settings["connect_timeout"]}
+        # Neon's "-pooler" hosts run PgBouncer in transaction mode, where prepared statements break.
+        if not settings["prepared_statements"] or "-pooler" in (url.host or ""):
+            connect_args["prepare_threshold"] = None
+        options["connect_args"] = connect_args
+    if settings.get("null_pool"):
+        options["poolclass"] = NullPool
+        return options
+    options.update(
+        poolclass=MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+        pool_pre_ping=settings["pool_pre_ping"],
+    )
+    return options
+
+
+def pool_status(pool: Pool) -> dict[str, Any]:
+    status: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(
+            checkouts=metrics.checkouts,
+            timeouts=metrics.timeouts,
+            avg_wait_ms=round(metrics.wait_seconds * 1000 / metrics.checkouts, 3) if metrics.checkouts else 0.0,
+            max_wait_ms=round(metrics.max_wait_seconds * 1000, 3),
+        )
+    return status
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from ..cache import bump_data_version, cached_json
 from ..database import get_db
-from ..deps import get_current_user
+from ..deps import get_current_user, get_read_db
 from ..models import Account, User
 from ..schemas import AccountIn
+from ..services.balances import balances_at
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
@@ -17,6 +21,8 @@ def create_account(payload: AccountIn, db: Session = Depends(get_db), user: User
     account = Account(user_id=user.id, name=payload.name.strip())
     db.add(account)
     try:
+        db.flush()
+        bump_data_version(db, user.id)
         db.commit()
     except IntegrityError as exc:
         db.rollback()
@@ -25,6 +31,57 @@ def create_account(payload: AccountIn, db: Session = Depends(get_db), user: User
 
 
 @router.get("")
-def list_accounts(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> list[dict]:
+def list_accounts(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)) -> list[dict]:
     accounts = db.query(Account).filter(Account.user_id == user.id).order_by(Account.name).all()
     return [{"id": a.id, "name": a.name} for a in accounts]
+
+
+def balance_date(at: str | None) -> str:
+    if at is None:
+        return date.today().isoformat()
+    try:
+        return date.fromisoformat(at).isoformat()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid date") from exc
+
+
+def serialize_balance(account_id: int, name: str, at: str, total_cents: int) -> dict:
+    # Amounts are stored as positive expenses, so the running balance is their negation.
+    return {"account_id": account_id, "name": name, "at": at, "spent_cents": total_cents, "balance_cents": -total_cents}
+
+
+@router.get("/balances")
+def list_balances(
+    request: Request,
+    at: str | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> Response:
+    at = balance_date(at)
+
+    def build() -> list[dict]:
+        accounts = db.query(Account.id, Account.name).filter(Account.user_id == user.id).order_by(Account.name).all()
+        totals = balances_at(db, user.id, at, [account_id for account_id, _ in accounts])
+        return [serialize_balance(account_id, name, at, totals[account_id]) for account_id, name in accounts]
+
+    return cached_json(db, request, user, build)
+
+
+@router.get("/{account_id}/balance")
+def get_balance(
+    request: Request,
+    account_id: int,
+    at: str | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> Response:
+    at = balance_date(at)
+    account = db.query(Account).filter(Account.id == account_id, Account.user_id == user.id).first()
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return cached_json(
+        db,
+        request,
+        user,
+        lambda: serialize_balance(account.id, account.name, at, balances_at(db, user.id, at, [account.id])[account.id]),
+    )
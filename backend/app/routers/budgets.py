@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from ..cache import bump_data_version, cached_json
+from ..database import get_db
+from ..deps import get_current_user
+from ..models import BudgetEvent, Category, CategoryBudget, User
+from ..schemas import BudgetIn
+from ..services.budgets import budget_status, reevaluate_budget
+
+router = APIRouter(prefix="/budgets", tags=["budgets"])
+
+
+@router.get("")
+def list_budgets(
+    request: Request,
+    year: int | None = None,
+    month: int | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> Response:
+    today = date.today()
+    year = year or today.year
+    month = month or today.month
+    if not 1 <= month <= 12 or not 1 <= year < 9999:
+        raise HTTPException(status_code=400, detail="Invalid month")
+    return cached_json(db, request, user, lambda: budget_status(db, user.id, year * 100 + month))
+
+
+@router.get("/events")
+def list_budget_events(
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> list[dict]:
+    rows = db.execute(
+        select(BudgetEvent, Category.name)
+        .join(Category, Category.id == BudgetEvent.category_id)
+        .where(BudgetEvent.user_id == user.id)
+        .order_by(BudgetEvent.id.desc())
+        .limit(limit)
+    ).all()
+    return [
+        {
+            "id": event.id,
+            "category_id": event.category_id,
+            "category": name,
+            "year_month": event.year_month,
+            "kind": event.kind,
+            "spent_cents": event.spent_cents,
+            "limit_cents": event.limit_cents,
+            "created_at": event.created_at.isoformat(),
+        }
+        for event, name in rows
+    ]
+
+
+@router.put("/{category_id}")
+def set_budget(
+    category_id: int,
+    payload: BudgetIn,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict:
+    category = db.query(Category).filter(Category.id == category_id, Category.user_id == user.id).first()
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    budget = db.query(CategoryBudget).filter(CategoryBudget.category_id == category.id).first()
+    if budget is None:
+        budget = CategoryBudget(user_id=user.id, category_id=category.id, amount_cents=payload.amount_cents)
+        db.add(budget)
+    budget.amount_cents = payload.amount_cents
+    db.flush()
+    reevaluate_budget(db, budget)
+    bump_data_version(db, user.id)
+    db.commit()
+    return {"budget_id": budget.id, "category_id": category.id, "amount_cents": budget.amount_cents}
+
+
+@router.delete("/{category_id}")
+def delete_budget(category_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    budget = (
+        db.query(CategoryBudget)
+        .filter(CategoryBudget.category_id == category_id, CategoryBudget.user_id == user.id)
+        .first()
+    )
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    db.execute(delete(BudgetEvent).where(BudgetEvent.budget_id == budget.id))
+    db.delete(budget)
+    bump_data_version(db, user.id)
+    db.commit()
+    return {"deleted": True}
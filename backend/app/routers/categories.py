@@ -2,13 +2,33 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
 
+from ..cache import bump_data_version
 from ..database import get_db
-from ..deps import get_current_user
-from ..models import Category, User
-from ..schemas import CategoryIn
+from ..deps import get_current_user, get_read_db
+from ..models import (
+    BudgetEvent,
+    Category,
+    CategoryBudget,
+    CategoryMonthTotal,
+    CategoryRule,
+    ImportReviewItem,
+    Transaction,
+    User,
+)
+from ..schemas import CategoryIn, CategoryMergeIn
+from ..services.budgets import move_category_spend
+from ..services.categories import (
+    bump_categories_version,
+    get_category_directory,
+    invalidate_category_directory,
+    record_category_changes,
+)
+from ..services.category_rules import bump_rules_version
+from ..services.suggestions import invalidate_description_index
+from ..utils import fold_text
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
@@ -18,29 +38,108 @@ def create_category(payload: CategoryIn, db: Session = Depends(get_db), user: Us
     name = " ".join(payload.name.strip().split())
     if not name:
         raise HTTPException(status_code=400, detail="Category name is required")
-    existing = db.query(Category).filter(func.lower(Category.name) == name.lower()).first()
+    existing = get_category_directory(db, user).find(name)
     if existing:
-        return {"id": existing.id, "name": existing.name}
+        return {"id": existing[0], "name": existing[1]}
 
     cat = Category(user_id=user.id, name=name)
     db.add(cat)
     try:
-        db.commit()
+        db.flush()
     except IntegrityError as exc:
         db.rollback()
         raise HTTPException(status_code=409, detail="Category already exists") from exc
+    bump_data_version(db, user.id)
+    version = bump_categories_version(db, user.id)
+    db.commit()
+    record_category_changes(user.id, version, added=[(cat.id, cat.name)])
     return {"id": cat.id, "name": cat.name}
 
 
 @router.get("")
-def list_categories(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> list[dict]:
-    cats = db.query(Category).order_by(Category.name.asc(), Category.id.asc()).all()
-    seen: set[str] = set()
-    deduped: list[dict] = []
-    for category in cats:
-        key = category.name.strip().lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append({"id": category.id, "name": category.name})
-    return deduped
+def list_categories(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)) -> list[dict]:
+    return get_category_directory(db, user).listing()
+
+
+@router.post("/merge")
+def merge_categories(payload: CategoryMergeIn, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    categories = {
+        category.id: category for category in db.query(Category).filter(Category.user_id == user.id).all()
+    }
+    target = categories.get(payload.target_id)
+    if target is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    if payload.source_ids:
+        source_ids = sorted(set(payload.source_ids) - {target.id})
+        if any(category_id not in categories for category_id in source_ids):
+            raise HTTPException(status_code=404, detail="Category not found")
+    else:
+        # Without explicit sources, fold every case/accent variant of the target's name into it.
+        target_key = fold_text(target.name)
+        source_ids = sorted(
+            category.id
+            for category in categories.values()
+            if category.id != target.id and fold_text(category.name) == target_key
+        )
+    if not source_ids:
+        return {"target_id": target.id, "merged": 0, "transactions": 0, "review_items": 0, "rules": 0}
+
+    moved_transactions = db.execute(
+        update(Transaction)
+        .where(Transaction.user_id == user.id, Transaction.category_id.in_(source_ids))
+        .values(category_id=target.id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    moved_review_items = db.execute(
+        update(ImportReviewItem)
+        .where(ImportReviewItem.user_id == user.id, ImportReviewItem.resolved_category_id.in_(source_ids))
+        .values(resolved_category_id=target.id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    moved_rules = db.execute(
+        update(CategoryRule)
+        .where(CategoryRule.user_id == user.id, CategoryRule.category_id.in_(source_ids))
+        .values(category_id=target.id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    moved_totals = db.execute(
+        select(CategoryMonthTotal.category_id, CategoryMonthTotal.year_month, CategoryMonthTotal.spent_cents).where(
+            CategoryMonthTotal.category_id.in_(source_ids)
+        )
+    ).all()
+    move_category_spend(db, user.id, moved_totals, target.id)
+    # The sources' budgets go with them; the target keeps its own limit.
+    for model in (BudgetEvent, CategoryBudget, CategoryMonthTotal):
+        db.execute(
+            delete(model)
+            .where(model.user_id == user.id, model.category_id.in_(source_ids))
+            .execution_options(synchronize_session=False)
+        )
+    db.execute(
+        delete(Category)
+        .where(Category.user_id == user.id, Category.id.in_(source_ids))
+        .execution_options(synchronize_session=False)
+    )
+    if target.normalized_name is None:
+        # The target was a legacy variant; it can take the normalized name once the holder is merged away.
+        holder = db.scalar(
+            select(Category.id).where(
+                Category.user_id == user.id, Category.normalized_name == fold_text(target.name)
+            )
+        )
+        if holder is None:
+            target.normalized_name = fold_text(target.name)
+    bump_data_version(db, user.id)
+    bump_categories_version(db, user.id)
+    if moved_rules:
+        bump_rules_version(db, user.id)
+    db.commit()
+    invalidate_category_directory(user.id)
+    invalidate_description_index(user.id)
+    return {
+        "target_id": target.id,
+        "merged": len(source_ids),
+        "transactions": moved_transactions,
+        "review_items": moved_review_items,
+        "rules": moved_rules,
+    }
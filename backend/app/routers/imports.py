@@ -2,16 +2,28 @@ from __future__ import annotations
 
 import json
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 
-from ..database import get_db
-from ..deps import get_current_user
-from ..models import Category, ImportJob, ImportReviewItem, Transaction, User
-from ..schemas import PendingReviewResolveIn
+from ..cache import bump_data_version, cached_json
+from ..database import get_async_db, get_db, insert_returning_ids
+from ..deps import get_async_read_db, get_current_user, get_current_user_async
+from ..models import Category, ImportJob, ImportReviewItem, InstallmentGroup, Transaction, User, with_derived_columns
+from ..schemas import NearDuplicateResolveIn, PendingReviewResolveIn
 from ..services.ai_categorization import is_non_semantic_category_name, suggest_category_name
+from ..services.categories import bump_categories_version, get_category_directory, record_category_changes
+from ..services.category_rules import RuleMatcher, get_rule_matcher
+from ..services.dedupe import existing_dedupe_hashes
+from ..services.ledger import ledger_row, ledger_rows, record_ledger_changes
+from ..services.near_duplicates import DEFAULT_MIN_SCORE, DEFAULT_WINDOW_DAYS, detect_near_duplicates
+from ..services.suggestions import record_description_changes
+from ..services.sync import log_transaction_deletions
 from .. import utils
-from ..utils import add_months, build_dedupe_hash, map_row, parse_csv, parse_xlsx
+from ..utils import add_months, build_dedupe_hash, fold_text, map_row, parse_csv, parse_xlsx
 
 router = APIRouter(prefix="/imports", tags=["imports"])
 
@@ -53,82 +65,67 @@ async def import_tabular(
     password: str | None = Form(default=None),
     mapping_json: str | None = Form(default=None),
     account_id: int | None = Form(default=None),
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
 ) -> dict:
     raw = await file.read()
     filename = file.filename or "unknown"
     source_type = "xlsx" if filename.lower().endswith(".xlsx") else "csv"
-
-    import_job = ImportJob(user_id=user.id, source_type=source_type, filename=filename, status="ok", notes="")
-    db.add(import_job)
-    db.flush()
-
+    # Parsing is CPU-bound, so it runs off the event loop.
     try:
         if source_type == "xlsx":
-            rows = parse_xlsx(raw, password=password)
+            rows = await run_in_threadpool(parse_xlsx, raw, password=password)
         else:
-            rows = parse_csv(raw)
+            rows = await run_in_threadpool(parse_csv, raw)
+        parse_error = None
     except Exception as exc:  # noqa: BLE001
-        import_job.status = "needs_review"
-        import_job.notes = f"parse_error: {exc}"
-        db.commit()
-        raise HTTPException(status_code=400, detail="Could not parse file") from exc
+        rows, parse_error = [], exc
+    if parse_error is not None:
+        return await db.run_sync(import_parsed_rows, user, filename, source_type, None, parse_error, account_id)
 
     mapping = json.loads(mapping_json) if mapping_json else None
-    inserted = 0
-    duplicates = 0
-    pending = 0
-    notes: list[str] = []
-    suggestion_cache: dict[str, str | None] = {}
-
-    existing_categories = db.query(Category).all()
-    category_id_by_name = {cat.name.lower(): cat.id for cat in existing_categories}
-    category_names = [cat.name for cat in existing_categories]
-
-    def resolve_or_create_category_id(name: str | None) -> int | None:
-        if not name:
-            return None
-        normalized = " ".join(name.strip().split())
-        if not normalized:
-            return None
-        cached_id = category_id_by_name.get(normalized.lower())
-        if cached_id:
-            return cached_id
-
-        existing = (
-            db.query(Category)
-            .filter(Category.name.ilike(normalized))
-            .first()
-        )
-        if existing:
-            category_id_by_name[existing.name.lower()] = existing.id
-            if existing.name not in category_names:
-                category_names.append(existing.name)
-            return existing.id
+    category_names, rule_matcher = await db.run_sync(
+        lambda session: (get_category_directory(session, user).names(), get_rule_matcher(session, user))
+    )
+    # Rule matching and the LLM lookups block, so they run in a worker thread; run_sync only writes.
+    prepared = await run_in_threadpool(categorize_rows, rows, mapping, account_id, rule_matcher, category_names)
+    return await db.run_sync(import_parsed_rows, user, filename, source_type, prepared, None, account_id)
 
-        created = Category(user_id=user.id, name=normalized)
-        db.add(created)
-        db.flush()
-        category_id_by_name[created.name.lower()] = created.id
-        category_names.append(created.name)
-        return created.id
 
+# Maps, categorizes and hashes the parsed rows without touching the database. Rows no rule matched carry
+# the suggested "category_name"; import_parsed_rows resolves or creates those categories.
+def categorize_rows(
+    rows: list[dict],
+    mapping: dict | None,
+    account_id: int | None,
+    rule_matcher: RuleMatcher,
+    category_names: list[str],
+) -> dict:
+    category_names = list(category_names)
+    known_names = {fold_text(name) for name in category_names}
+    suggestion_cache: dict[str, str | None] = {}
+    candidates: list[dict] = []
+    series: list[dict] = []
+    errors: list[tuple[int, dict, str]] = []
     for idx, row in enumerate(rows, start=1):
         try:
             normalized = map_row(row, mapping)
             normalized_amount = abs(int(normalized["amount_cents"]))
-            cat_name = normalized.get("category")
-            desc_key = normalized["description"].lower()
-            if desc_key not in suggestion_cache:
-                suggestion_cache[desc_key] = suggest_category_name(
-                    normalized["description"], normalized_amount, category_names
-                )
-            cat_name = suggestion_cache[desc_key] or "Outros"
-            if is_non_semantic_category_name(cat_name):
-                cat_name = None
-
-            category_id = resolve_or_create_category_id(cat_name)
+            category = {"category_id": rule_matcher.match(normalized["description"], account_id)}
+            if category["category_id"] is None:
+                desc_key = normalized["description"].lower()
+                if desc_key not in suggestion_cache:
+                    suggestion_cache[desc_key] = suggest_category_name(
+                        normalized["description"], normalized_amount, category_names
+                    )
+                cat_name = suggestion_cache[desc_key] or "Outros"
+                if is_non_semantic_category_name(cat_name):
+                    cat_name = None
+                elif fold_text(cat_name) not in known_names:
+                    # Later suggestions may reuse the category this row is about to create.
+                    known_names.add(fold_text(cat_name))
+                    category_names.append(" ".join(cat_name.strip().split()))
+                category["category_name"] = cat_name
 
             installment = extract_installment_info_safe(normalized["description"])
             if installment:
@@ -139,115 +136,213 @@ async def import_tabular(
                 # Business rule:
                 # - create from current installment up to total
                 #   e.g. (1/4) -> 1..4, (10/12) -> 10..12
-                numbers = range(current, total + 1)
-                for number in numbers:
+                generated = []
+                for number in range(current, total + 1):
                     tx_date = add_months(normalized["date"], number - current)
                     tx_description = f"{base_description} ({number}/{total})"
-                    tx_hash = build_dedupe_hash(
-                        tx_date,
-                        tx_description,
-                        normalized_amount,
-                        str(account_id or "none"),
-                    )
-                    existing = (
-                        db.query(Transaction)
-                        .filter(
-                            Transaction.user_id == user.id,
-                            Transaction.account_id == account_id,
-                            Transaction.dedupe_hash == tx_hash,
-                        )
-                        .first()
-                    )
-                    if existing:
-                        duplicates += 1
-                        add_review_item(
-                            db=db,
-                            import_id=import_job.id,
-                            user_id=user.id,
-                            row_number=idx,
-                            raw_data={
+                    generated.append(
+                        {
+                            "row_number": idx,
+                            "raw_data": {
                                 **row,
                                 "_generated_date": tx_date,
                                 "_generated_description": tx_description,
                                 "_generated_amount_cents": normalized_amount,
                             },
-                            error="duplicate",
-                            status="duplicate",
-                            account_id=account_id,
-                        )
-                        continue
-
-                    tx = Transaction(
-                        user_id=user.id,
-                        date=tx_date,
-                        description=tx_description,
-                        amount_cents=normalized_amount,
-                        category_id=category_id,
-                        account_id=account_id,
-                        source=source_type,
-                        import_id=import_job.id,
-                        dedupe_hash=tx_hash,
-                        installment_number=number,
-                        installment_total=total,
-                    )
-                    db.add(tx)
-                    db.flush()
-                    inserted += 1
-            else:
-                dedupe_hash = build_dedupe_hash(
-                    normalized["date"], normalized["description"], normalized_amount, str(account_id or "none")
-                )
-                existing = (
-                    db.query(Transaction)
-                    .filter(
-                        Transaction.user_id == user.id,
-                        Transaction.account_id == account_id,
-                        Transaction.dedupe_hash == dedupe_hash,
+                            "series": len(series),
+                            "category": category,
+                            "values": {
+                                "date": tx_date,
+                                "description": tx_description,
+                                "amount_cents": normalized_amount,
+                                "installment_number": number,
+                                "installment_total": total,
+                            },
+                        }
                     )
-                    .first()
+                series.append(
+                    {
+                        "base_description": base_description,
+                        "amount_cents": normalized_amount,
+                        "installments": total,
+                        "start_date": add_months(normalized["date"], 1 - current),
+                        "category": category,
+                        "group_id": None,
+                    }
                 )
-                if existing:
-                    duplicates += 1
-                    add_review_item(
-                        db=db,
-                        import_id=import_job.id,
-                        user_id=user.id,
-                        row_number=idx,
-                        raw_data=row,
-                        error="duplicate",
-                        status="duplicate",
-                        account_id=account_id,
-                    )
-                    continue
-
-                tx = Transaction(
-                    user_id=user.id,
-                    date=normalized["date"],
-                    description=normalized["description"],
-                    amount_cents=normalized_amount,
-                    category_id=category_id,
-                    account_id=account_id,
-                    source=source_type,
-                    import_id=import_job.id,
-                    dedupe_hash=dedupe_hash,
+                candidates.extend(generated)
+            else:
+                candidates.append(
+                    {
+                        "row_number": idx,
+                        "raw_data": row,
+                        "series": None,
+                        "category": category,
+                        "values": {
+                            "date": normalized["date"],
+                            "description": normalized["description"],
+                            "amount_cents": normalized_amount,
+                        },
+                    }
                 )
-                db.add(tx)
-                db.flush()
-                inserted += 1
         except Exception as exc:  # noqa: BLE001
-            pending += 1
-            error_message = str(exc)
-            notes.append(f"row {idx}: {error_message}")
+            errors.append((idx, row, str(exc)))
+
+    account_scope = str(account_id or "none")
+    for candidate in candidates:
+        values = candidate["values"]
+        values["dedupe_hash"] = build_dedupe_hash(
+            values["date"], values["description"], values["amount_cents"], account_scope
+        )
+    return {"candidates": candidates, "series": series, "errors": errors}
+
+
+def import_parsed_rows(
+    db: Session,
+    user: User,
+    filename: str,
+    source_type: str,
+    prepared: dict | None,
+    parse_error: Exception | None,
+    account_id: int | None,
+) -> dict:
+    import_job = ImportJob(user_id=user.id, source_type=source_type, filename=filename, status="ok", notes="")
+    db.add(import_job)
+    db.flush()
+
+    if parse_error is not None or prepared is None:
+        import_job.status = "needs_review"
+        import_job.notes = f"parse_error: {parse_error}"
+        db.commit()
+        raise HTTPException(status_code=400, detail="Could not parse file") from parse_error
+
+    inserted = 0
+    duplicates = 0
+    pending = 0
+    notes: list[str] = []
+    added: list[tuple[str, int | None, str]] = []
+    new_ids: list[int] = []
+    candidates, series = prepared["candidates"], prepared["series"]
+
+    directory = get_category_directory(db, user)
+    category_id_by_key = {key: category_id for key, (category_id, _) in directory.by_key.items()}
+    created_categories: list[tuple[int, str]] = []
+
+    def resolve_or_create_category_id(name: str | None) -> int | None:
+        if not name:
+            return None
+        normalized = " ".join(name.strip().split())
+        if not normalized:
+            return None
+        key = fold_text(normalized)
+        cached_id = category_id_by_key.get(key)
+        if cached_id:
+            return cached_id
+
+        created = Category(user_id=user.id, name=normalized)
+        try:
+            with db.begin_nested():
+                db.add(created)
+                db.flush()
+        except IntegrityError:
+            # Another request created it after the directory was loaded.
+            existing_id = db.scalar(
+                select(Category.id).where(
+                    Category.user_id == user.id, or_(Category.normalized_name == key, Category.name == normalized)
+                )
+            )
+            category_id_by_key[key] = existing_id
+            return existing_id
+        category_id_by_key[key] = created.id
+        created_categories.append((created.id, created.name))
+        return created.id
+
+    for idx, row, error_message in prepared["errors"]:
+        pending += 1
+        notes.append(f"row {idx}: {error_message}")
+        add_review_item(
+            db=db,
+            import_id=import_job.id,
+            user_id=user.id,
+            row_number=idx,
+            raw_data=row,
+            error=error_message,
+            status="pending",
+            account_id=account_id,
+        )
+    # Candidates of one row share its category dict, so each suggested name is resolved once, in row order.
+    for category in [c["category"] for c in candidates] + [item["category"] for item in series]:
+        if "category_name" in category:
+            category["category_id"] = resolve_or_create_category_id(category.pop("category_name"))
+    for candidate in candidates:
+        candidate["values"]["category_id"] = candidate["category"]["category_id"]
+
+    existing = existing_dedupe_hashes(db, user.id, account_id, [c["values"]["dedupe_hash"] for c in candidates])
+    fresh: list[dict] = []
+    seen: set[str] = set()
+    for candidate in candidates:
+        dedupe_hash = candidate["values"]["dedupe_hash"]
+        if dedupe_hash in existing or dedupe_hash in seen:
+            duplicates += 1
+            if candidate["series"] is not None and existing.get(dedupe_hash):
+                # Later statements repeat the tail of a series imported before; keep adding to its group.
+                series[candidate["series"]]["group_id"] = existing[dedupe_hash]
             add_review_item(
                 db=db,
                 import_id=import_job.id,
                 user_id=user.id,
-                row_number=idx,
-                raw_data=row,
-                error=error_message,
-                status="pending",
+                row_number=candidate["row_number"],
+                raw_data=candidate["raw_data"],
+                error="duplicate",
+                status="duplicate",
                 account_id=account_id,
             )
+            continue
+        seen.add(dedupe_hash)
+        fresh.append(candidate)
+
+    # One InstallmentGroup per new series, inserted together.
+    new_groups: dict[int, InstallmentGroup] = {}
+    for index in sorted({c["series"] for c in fresh if c["series"] is not None}):
+        item = series[index]
+        if item["group_id"] is not None:
+            continue
+        new_groups[index] = InstallmentGroup(
+            user_id=user.id,
+            base_description=item["base_description"],
+            total_cents=item["amount_cents"] * item["installments"],
+            installments=item["installments"],
+            start_date=item["start_date"],
+            interval_months=1,
+            category_id=item["category"]["category_id"],
+            account_id=account_id,
+        )
+    if new_groups:
+        db.add_all(new_groups.values())
+        db.flush()
+    for index, group in new_groups.items():
+        series[index]["group_id"] = group.id
+
+    if fresh:
+        payload = [
+            with_derived_columns(
+                {
+                    "installment_number": None,
+                    "installment_total": None,
+                    **c["values"],
+                    "user_id": user.id,
+                    "account_id": account_id,
+                    "source": source_type,
+                    "import_id": import_job.id,
+                    "installment_group_id": series[c["series"]]["group_id"] if c["series"] is not None else None,
+                }
+            )
+            for c in fresh
+        ]
+        new_ids = insert_returning_ids(db, Transaction.__table__, payload)
+        inserted = len(new_ids)
+        added = [(values["description"], values["category_id"], values["date"]) for values in payload]
+        record_ledger_changes(db, user.id, added=ledger_rows(payload))
 
     if pending > 0 and inserted == 0:
         import_job.status = "needs_review"
@@ -256,17 +351,43 @@ async def import_tabular(
     else:
         import_job.status = "ok"
     import_job.notes = "\n".join(notes)
+    near_duplicates = detect_near_duplicates(db, user.id, import_job.id, new_ids)
+    version = bump_data_version(db, user.id)
+    if created_categories:
+        categories_version = bump_categories_version(db, user.id)
     db.commit()
-    return {"import_id": import_job.id, "inserted": inserted, "duplicates": duplicates, "pending": pending}
+    record_description_changes(user.id, version, added=added)
+    if created_categories:
+        record_category_changes(user.id, categories_version, added=created_categories)
+    return {
+        "import_id": import_job.id,
+        "inserted": inserted,
+        "duplicates": duplicates,
+        "pending": pending,
+        "near_duplicates": len(near_duplicates),
+    }
 
 
 @router.get("/pending")
-def list_pending_import_rows(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> list[dict]:
-    rows = (
-        db.query(ImportReviewItem)
-        .filter(ImportReviewItem.user_id == user.id, ImportReviewItem.status.in_(["pending", "duplicate"]))
+async def list_pending_import_rows(
+    request: Request, db: AsyncSession = Depends(get_async_read_db), user: User = Depends(get_current_user_async)
+) -> Response:
+    return await db.run_sync(lambda session: cached_json(session, request, user, lambda: pending_import_rows(session, user.id)))
+
+
+def pending_import_rows(db: Session, user_id: int) -> list[dict]:
+    rows = db.execute(
+        select(
+            ImportReviewItem.id,
+            ImportReviewItem.import_id,
+            ImportReviewItem.row_number,
+            ImportReviewItem.raw_data,
+            ImportReviewItem.error,
+            ImportReviewItem.status,
+            ImportReviewItem.resolved_account_id,
+        )
+        .where(ImportReviewItem.user_id == user_id, ImportReviewItem.status.in_(["pending", "duplicate"]))
         .order_by(ImportReviewItem.id.asc())
-        .all()
     )
     return [
         {
@@ -283,13 +404,118 @@ def list_pending_import_rows(db: Session = Depends(get_db), user: User = Depends
     ]
 
 
-@router.patch("/pending/{review_item_id}/confirm")
-def confirm_pending_row(
+@router.post("/near-duplicates/scan")
+def scan_near_duplicates(
+    window_days: int = Query(default=DEFAULT_WINDOW_DAYS, ge=0, le=31),
+    min_score: float = Query(default=DEFAULT_MIN_SCORE, gt=0, le=1),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict:
+    scan_job = ImportJob(user_id=user.id, source_type="near_duplicates", filename="near-duplicates")
+    db.add(scan_job)
+    db.flush()
+    pairs = detect_near_duplicates(db, user.id, scan_job.id, window_days=window_days, min_score=min_score)
+    scan_job.status = "needs_review" if pairs else "ok"
+    bump_data_version(db, user.id)
+    db.commit()
+    return {
+        "import_id": scan_job.id,
+        "flagged": len(pairs),
+        "pairs": [
+            {"transaction_id": tx_id, "duplicate_of_id": other_id, "score": score} for tx_id, other_id, score in pairs
+        ],
+    }
+
+
+@router.get("/near-duplicates")
+def list_near_duplicates(request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> Response:
+    return cached_json(db, request, user, lambda: near_duplicate_rows(db, user.id))
+
+
+NEAR_DUPLICATE_FIELDS = ("id", "date", "description", "amount_cents", "account_id")
+
+
+def near_duplicate_rows(db: Session, user_id: int) -> list[dict]:
+    flagged = aliased(Transaction)
+    original = aliased(Transaction)
+    # Inner joins drop items whose transactions were deleted since they were flagged.
+    rows = db.execute(
+        select(
+            ImportReviewItem.id,
+            ImportReviewItem.import_id,
+            ImportReviewItem.raw_data,
+            *(getattr(flagged, field) for field in NEAR_DUPLICATE_FIELDS),
+            *(getattr(original, field) for field in NEAR_DUPLICATE_FIELDS),
+        )
+        .join(flagged, flagged.id == ImportReviewItem.transaction_id)
+        .join(original, original.id == ImportReviewItem.duplicate_of_id)
+        .where(ImportReviewItem.user_id == user_id, ImportReviewItem.status == "near_duplicate")
+        .order_by(ImportReviewItem.id.asc())
+    )
+    width = len(NEAR_DUPLICATE_FIELDS)
+    return [
+        {
+            "id": row[0],
+            "import_id": row[1],
+            "score": json.loads(row[2]).get("score"),
+            "transaction": dict(zip(NEAR_DUPLICATE_FIELDS, row[3 : 3 + width])),
+            "duplicate_of": dict(zip(NEAR_DUPLICATE_FIELDS, row[3 + width :])),
+        }
+        for row in rows
+    ]
+
+
+@router.patch("/near-duplicates/{review_item_id}")
+def resolve_near_duplicate(
     review_item_id: int,
-    payload: PendingReviewResolveIn,
+    payload: NearDuplicateResolveIn,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> dict:
+    item = (
+        db.query(ImportReviewItem)
+        .filter(
+            ImportReviewItem.id == review_item_id,
+            ImportReviewItem.user_id == user.id,
+            ImportReviewItem.status == "near_duplicate",
+        )
+        .first()
+    )
+    if not item:
+        raise HTTPException(status_code=404, detail="Near-duplicate review item not found")
+
+    removed: list[str] = []
+    if payload.action == "delete_duplicate":
+        tx = (
+            db.query(Transaction)
+            .filter(Transaction.id == item.transaction_id, Transaction.user_id == user.id)
+            .first()
+        )
+        if tx:
+            removed.append(tx.description)
+            db.delete(tx)
+            log_transaction_deletions(db, user.id, [tx.id])
+            record_ledger_changes(db, user.id, removed=[ledger_row(tx)])
+        item.status = "resolved"
+    else:
+        item.status = "dismissed"
+    version = bump_data_version(db, user.id)
+    db.commit()
+    record_description_changes(user.id, version, removed=removed)
+    return {"status": item.status}
+
+
+@router.patch("/pending/{review_item_id}/confirm")
+async def confirm_pending_row(
+    review_item_id: int,
+    payload: PendingReviewResolveIn,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+) -> dict:
+    return await db.run_sync(resolve_pending_row, user, review_item_id, payload)
+
+
+def resolve_pending_row(db: Session, user: User, review_item_id: int, payload: PendingReviewResolveIn) -> dict:
     normalized_amount = abs(int(payload.amount_cents))
     item = (
         db.query(ImportReviewItem)
@@ -317,7 +543,9 @@ def confirm_pending_row(
     )
     if existing:
         item.status = "duplicate"
+        version = bump_data_version(db, user.id)
         db.commit()
+        record_description_changes(user.id, version)
         return {"status": "duplicate", "transaction_id": existing.id}
 
     tx = Transaction(
@@ -338,6 +566,7 @@ def confirm_pending_row(
     item.resolved_amount_cents = normalized_amount
     item.resolved_category_id = payload.category_id
     item.resolved_account_id = payload.account_id or item.resolved_account_id
+    record_ledger_changes(db, user.id, added=[ledger_row(tx)])
     db.flush()
 
     pending_count = (
@@ -348,5 +577,7 @@ def confirm_pending_row(
     import_job = db.get(ImportJob, item.import_id)
     if import_job and pending_count == 0 and import_job.status in {"needs_review", "partial"}:
         import_job.status = "ok"
+    version = bump_data_version(db, user.id)
     db.commit()
+    record_description_changes(user.id, version, added=[(payload.description, payload.category_id, payload.date)])
     return {"status": "resolved", "transaction_id": tx.id}
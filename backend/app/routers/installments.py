@@ -1,12 +1,19 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from ..cache import bump_data_version, cached_json
 from ..database import get_db
 from ..deps import get_current_user
-from ..models import InstallmentGroup, Transaction, User
+from ..models import InstallmentGroup, Transaction, User, with_derived_columns
 from ..schemas import InstallmentGroupIn
+from ..services.ledger import ledger_rows, record_ledger_changes
+from ..services.recurring import RECURRING, sync_recurring_series
+from ..services.suggestions import record_description_changes
+from ..services.sync import log_transaction_deletions
 from ..utils import add_months, build_dedupe_hash
 
 router = APIRouter(prefix="/installments", tags=["installments"])
@@ -14,7 +21,9 @@ router = APIRouter(prefix="/installments", tags=["installments"])
 
 @router.post("/groups", status_code=201)
 def create_group(payload: InstallmentGroupIn, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
-    if payload.installments <= 0:
+    if payload.mode == RECURRING:
+        return create_recurring_series(payload, db, user)
+    if not payload.installments or payload.installments <= 0:
         raise HTTPException(status_code=400, detail="installments must be > 0")
 
     total_cents = payload.total_cents
@@ -34,55 +43,116 @@ def create_group(payload: InstallmentGroupIn, db: Session = Depends(get_db), use
         total_cents=total_cents,
         installments=payload.installments,
         start_date=payload.start_date,
+        interval_months=payload.interval_months,
+        category_id=payload.category_id,
+        account_id=payload.account_id,
     )
     db.add(group)
     db.flush()
 
+    account_scope = str(payload.account_id or "none")
+    rows = []
     for i in range(1, payload.installments + 1):
         amount = base_each + (remainder if i == payload.installments else 0)
         tx_date = add_months(payload.start_date, (i - 1) * payload.interval_months)
-        desc = f"{payload.base_description.strip()} ({i}/{payload.installments})"
-        dedupe_hash = build_dedupe_hash(tx_date, desc, abs(amount), str(payload.account_id or "none"))
-        db.add(
-            Transaction(
-                user_id=user.id,
-                date=tx_date,
-                description=desc,
-                amount_cents=abs(amount),
-                category_id=payload.category_id,
-                account_id=payload.account_id,
-                source="manual",
-                dedupe_hash=dedupe_hash,
-                installment_group_id=group.id,
-                installment_number=i,
-                installment_total=payload.installments,
+        desc = f"{group.base_description} ({i}/{payload.installments})"
+        rows.append(
+            with_derived_columns(
+                {
+                    "user_id": user.id,
+                    "date": tx_date,
+                    "description": desc,
+                    "amount_cents": abs(amount),
+                    "category_id": payload.category_id,
+                    "account_id": payload.account_id,
+                    "source": "manual",
+                    "dedupe_hash": build_dedupe_hash(tx_date, desc, abs(amount), account_scope),
+                    "installment_group_id": group.id,
+                    "installment_number": i,
+                    "installment_total": payload.installments,
+                }
             )
         )
+    try:
+        db.execute(insert(Transaction), rows)
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Installments would duplicate existing transactions") from exc
 
+    record_ledger_changes(db, user.id, added=ledger_rows(rows))
+    version = bump_data_version(db, user.id)
     db.commit()
-    db.refresh(group)
+    record_description_changes(
+        user.id, version, added=[(row["description"], row["category_id"], row["date"]) for row in rows]
+    )
     return {"id": group.id, "base_description": group.base_description, "installments": group.installments}
 
 
+def create_recurring_series(payload: InstallmentGroupIn, db: Session, user: User) -> dict:
+    amount = payload.amount_per_installment_cents
+    if amount is None:
+        raise HTTPException(status_code=400, detail="amount_per_installment_cents is required for recurring series")
+    if payload.installments is not None and payload.installments <= 0:
+        raise HTTPException(status_code=400, detail="installments must be > 0")
+    if payload.end_date is not None and payload.end_date < payload.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+
+    group = InstallmentGroup(
+        user_id=user.id,
+        kind=RECURRING,
+        base_description=payload.base_description.strip(),
+        amount_cents=abs(amount),
+        installments=payload.installments or 0,
+        total_cents=abs(amount) * (payload.installments or 0),
+        start_date=payload.start_date,
+        end_date=payload.end_date,
+        interval_months=payload.interval_months,
+        category_id=payload.category_id,
+        account_id=payload.account_id,
+    )
+    db.add(group)
+    bump_data_version(db, user.id)
+    db.commit()
+    # Occurrences up to today are stored right away; later ones are projected until a materialize call
+    # on or after their date stores them.
+    sync_recurring_series(db, user)
+    return {
+        "id": group.id,
+        "base_description": group.base_description,
+        "installments": group.installments,
+        "mode": RECURRING,
+    }
+
+
+@router.post("/recurring/materialize")
+def materialize_recurring_series(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    return {"created": sync_recurring_series(db, user)}
+
+
 @router.get("/groups/{group_id}/transactions")
-def list_group_transactions(group_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> list[dict]:
-    txs = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == user.id, Transaction.installment_group_id == group_id)
-        .order_by(Transaction.installment_number.asc())
-        .all()
+def list_group_transactions(
+    group_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> Response:
+    return cached_json(db, request, user, lambda: group_transactions_listing(db, user.id, group_id))
+
+
+def group_transactions_listing(db: Session, user_id: int, group_id: int) -> list[dict]:
+    rows = db.execute(
+        select(
+            Transaction.id,
+            Transaction.date,
+            Transaction.description,
+            Transaction.amount_cents,
+            Transaction.installment_number,
+            Transaction.installment_total,
+        )
+        .where(Transaction.user_id == user_id, Transaction.installment_group_id == group_id)
+        .order_by(Transaction.installment_number.asc(), Transaction.date.asc())
     )
-    return [
-        {
-            "id": tx.id,
-            "date": tx.date,
-            "description": tx.description,
-            "amount_cents": tx.amount_cents,
-            "installment_number": tx.installment_number,
-            "installment_total": tx.installment_total,
-        }
-        for tx in txs
-    ]
+    return [dict(row._mapping) for row in rows]
 
 
 @router.delete("/groups/{group_id}")
@@ -90,7 +160,22 @@ def delete_group(group_id: int, db: Session = Depends(get_db), user: User = Depe
     group = db.query(InstallmentGroup).filter(InstallmentGroup.id == group_id, InstallmentGroup.user_id == user.id).first()
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
-    db.query(Transaction).filter(Transaction.user_id == user.id, Transaction.installment_group_id == group_id).delete()
+    removed = db.execute(
+        delete(Transaction)
+        .where(Transaction.user_id == user.id, Transaction.installment_group_id == group_id)
+        .returning(
+            Transaction.id,
+            Transaction.description,
+            Transaction.account_id,
+            Transaction.category_id,
+            Transaction.date,
+            Transaction.amount_cents,
+        )
+    ).all()
+    log_transaction_deletions(db, user.id, [row.id for row in removed])
+    record_ledger_changes(db, user.id, removed=[tuple(row[2:]) for row in removed])
     db.delete(group)
+    version = bump_data_version(db, user.id)
     db.commit()
+    record_description_changes(user.id, version, removed=[row.description for row in removed])
     return {"deleted": True}
@@ -1,26 +1,65 @@
 from __future__ import annotations
 
 from datetime import date
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import ColumnElement, and_, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..deps import get_current_user
-from ..models import Category, Transaction, User
+from ..cache import cached_json
+from ..deps import get_async_read_db, get_current_user_async
+from ..models import Account, Category, Transaction, User
+from ..services.budgets import budget_status
+from ..services.recurring import OccurrenceRow, projected_occurrences
+from ..utils import add_months, month_bounds, month_key, month_range, month_start, parse_year_month
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+MAX_SERIES_MONTHS = 120
 
-@router.get("/monthly")
-def monthly(year: int, month: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
-    month_prefix = f"{year:04d}-{month:02d}-%"
+
+def sum_when(*conditions: ColumnElement[bool]) -> ColumnElement[int]:
+    return func.coalesce(func.sum(case((and_(*conditions), Transaction.amount_cents), else_=0)), 0)
+
+
+def checked_month_bounds(year: int, month: int) -> tuple[str, str]:
+    if not 1 <= month <= 12 or not 1 <= year < 9999:
+        raise HTTPException(status_code=400, detail="Invalid month")
+    return month_bounds(year, month)
+
+
+def names_by_id(db: Session, model: type[Account] | type[Category], ids: set[int | None]) -> dict[int, str]:
+    ids.discard(None)
+    if not ids:
+        return {}
+    return dict(db.query(model.id, model.name).filter(model.id.in_(ids)).all())
+
+
+def category_totals_with(db: Session, totals: dict[str, int], projected: list[OccurrenceRow]) -> list[dict]:
+    projected = [row for row in projected if row[1] > 0]
+    names = names_by_id(db, Category, {category_id for _, _, category_id, _ in projected})
+    for _, amount, category_id, _ in projected:
+        if category_id in names:
+            totals[names[category_id]] = totals.get(names[category_id], 0) + amount
+    return [{"category": name, "total_cents": total} for name, total in sorted(totals.items())]
+
+
+def installment_bounds(today: date) -> tuple[str, str, str]:
+    current_month_start, next_month_start = month_bounds(today.year, today.month)
+    return current_month_start, next_month_start, add_months(next_month_start, 1)
+
+
+def monthly_report(db: Session, user_id: int, year: int, month: int) -> dict:
+    start, end = checked_month_bounds(year, month)
     q = db.query(Transaction).filter(
-        Transaction.user_id == user.id,
-        Transaction.date.like(month_prefix),
+        Transaction.user_id == user_id,
+        Transaction.date >= start,
+        Transaction.date < end,
     )
     total_expenses = q.with_entities(func.coalesce(func.sum(Transaction.amount_cents), 0)).scalar() or 0
+    total_expenses += sum(amount for _, amount, _, _ in projected_occurrences(db, user_id, start, end))
     total_income = 0
     return {
         "year": year,
@@ -31,31 +70,30 @@ def monthly(year: int, month: int, db: Session = Depends(get_db), user: User = D
     }
 
 
-@router.get("/by-category")
-def by_category(year: int, month: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> list[dict]:
-    month_prefix = f"{year:04d}-{month:02d}-%"
+def by_category_report(db: Session, user_id: int, year: int, month: int) -> list[dict]:
+    start, end = checked_month_bounds(year, month)
     rows = (
         db.query(Category.name, func.sum(Transaction.amount_cents))
         .join(Category, Category.id == Transaction.category_id)
         .filter(
-            Transaction.user_id == user.id,
+            Transaction.user_id == user_id,
             Transaction.amount_cents > 0,
-            Transaction.date.like(month_prefix),
+            Transaction.date >= start,
+            Transaction.date < end,
         )
         .group_by(Category.name)
-        .order_by(Category.name)
         .all()
     )
-    return [{"category": r[0], "total_cents": int(r[1])} for r in rows]
+    totals = {name: int(total) for name, total in rows}
+    return category_totals_with(db, totals, projected_occurrences(db, user_id, start, end))
 
 
-@router.get("/by-category-total")
-def by_category_total(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> list[dict]:
+def by_category_total_report(db: Session, user_id: int) -> list[dict]:
     rows = (
         db.query(Category.name, func.sum(Transaction.amount_cents))
         .join(Category, Category.id == Transaction.category_id)
         .filter(
-            Transaction.user_id == user.id,
+            Transaction.user_id == user_id,
             Transaction.amount_cents > 0,
         )
         .group_by(Category.name)
@@ -65,37 +103,253 @@ def by_category_total(db: Session = Depends(get_db), user: User = Depends(get_cu
     return [{"category": row[0], "total_cents": int(row[1])} for row in rows]
 
 
-@router.get("/installments-summary")
-def installments_summary(
-    scope: str = Query(default="this_month"),
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-) -> dict:
-    today = date.today()
-    current_month_start = date(today.year, today.month, 1)
-    if today.month == 12:
-        next_month_start = date(today.year + 1, 1, 1)
-    else:
-        next_month_start = date(today.year, today.month + 1, 1)
-    if next_month_start.month == 12:
-        after_next_month_start = date(next_month_start.year + 1, 1, 1)
-    else:
-        after_next_month_start = date(next_month_start.year, next_month_start.month + 1, 1)
+def installments_summary_report(db: Session, user_id: int, scope: str) -> dict:
+    current_month_start, next_month_start, after_next_month_start = installment_bounds(date.today())
 
     q = db.query(Transaction).filter(
-        Transaction.user_id == user.id,
+        Transaction.user_id == user_id,
         Transaction.amount_cents > 0,
-        Transaction.installment_group_id.is_not(None),
+        Transaction.installment_number.is_not(None),
     )
 
     if scope == "this_month":
-        q = q.filter(Transaction.date >= current_month_start.isoformat(), Transaction.date < next_month_start.isoformat())
+        q = q.filter(Transaction.date >= current_month_start, Transaction.date < next_month_start)
     elif scope == "next_month":
-        q = q.filter(Transaction.date >= next_month_start.isoformat(), Transaction.date < after_next_month_start.isoformat())
+        q = q.filter(Transaction.date >= next_month_start, Transaction.date < after_next_month_start)
     elif scope == "total":
-        q = q.filter(Transaction.date >= current_month_start.isoformat())
+        q = q.filter(Transaction.date >= current_month_start)
     else:
         return {"scope": scope, "total_cents": 0}
 
     total = q.with_entities(func.coalesce(func.sum(Transaction.amount_cents), 0)).scalar() or 0
     return {"scope": scope, "total_cents": int(total)}
+
+
+def series_report(db: Session, user_id: int, from_month: str, to_month: str, group_by: str) -> dict:
+    try:
+        start = parse_year_month(from_month)
+        end = parse_year_month(to_month)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="from and to must be YYYY-MM") from exc
+    months = month_range(start, end)
+    if not months:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if len(months) > MAX_SERIES_MONTHS:
+        raise HTTPException(status_code=400, detail=f"series is limited to {MAX_SERIES_MONTHS} months")
+
+    if group_by == "account":
+        key_column, name_column, model = Transaction.account_id, Account.name, Account
+    else:
+        key_column, name_column, model = Transaction.category_id, Category.name, Category
+    rows = (
+        db.query(Transaction.year_month, key_column, name_column, func.sum(Transaction.amount_cents))
+        .outerjoin(model, model.id == key_column)
+        .filter(
+            Transaction.user_id == user_id,
+            Transaction.amount_cents > 0,
+            Transaction.date >= month_start(*start),
+            Transaction.date < add_months(month_start(*end), 1),
+        )
+        .group_by(Transaction.year_month, key_column, name_column)
+        .all()
+    )
+
+    projected = [
+        (tx_date, amount, account_id if group_by == "account" else category_id)
+        for tx_date, amount, category_id, account_id in projected_occurrences(
+            db, user_id, month_start(*start), add_months(month_start(*end), 1)
+        )
+        if amount > 0
+    ]
+    names = names_by_id(db, model, {key for _, _, key in projected})
+    rows += [(month_key(tx_date), key, names.get(key), amount) for tx_date, amount, key in projected]
+
+    position = {year * 100 + month: i for i, (year, month) in enumerate(months)}
+    totals = [0] * len(months)
+    by_key: dict[int | None, dict] = {}
+    for year_month, key, name, total in rows:
+        i = position.get(year_month)
+        if i is None:
+            continue
+        entry = by_key.setdefault(key, {"id": key, "name": name, "values": [0] * len(months)})
+        entry["values"][i] += int(total)
+        totals[i] += int(total)
+
+    return {
+        "group_by": group_by,
+        "months": [f"{year:04d}-{month:02d}" for year, month in months],
+        "series": sorted(by_key.values(), key=lambda entry: (entry["name"] is None, entry["name"] or "")),
+        "totals": totals,
+    }
+
+
+def installments_projection_report(db: Session, user_id: int, months: int) -> dict:
+    today = date.today()
+    start = month_start(today.year, today.month)
+    end = add_months(start, months)
+    labels = [add_months(start, i)[:7] for i in range(months)]
+    rows = (
+        db.query(Transaction.year_month, func.sum(Transaction.amount_cents), func.count(Transaction.id))
+        .filter(
+            Transaction.user_id == user_id,
+            Transaction.installment_number.is_not(None),
+            Transaction.date >= start,
+            Transaction.date < end,
+            Transaction.amount_cents > 0,
+        )
+        .group_by(Transaction.year_month)
+        .all()
+    )
+
+    position = {int(label[:4]) * 100 + int(label[5:7]): i for i, label in enumerate(labels)}
+    values = [0] * months
+    counts = [0] * months
+    for year_month, total, count in rows:
+        i = position.get(year_month)
+        if i is None:
+            continue
+        values[i] += int(total)
+        counts[i] += int(count)
+    return {"months": labels, "values": values, "counts": counts, "total_cents": sum(values)}
+
+
+def dashboard_report(db: Session, user_id: int, year: int | None, month: int | None) -> dict:
+    today = date.today()
+    year = year or today.year
+    month = month or today.month
+    start, end = checked_month_bounds(year, month)
+    current_month_start, next_month_start, after_next_month_start = installment_bounds(today)
+
+    in_month = (Transaction.date >= start, Transaction.date < end)
+    positive = Transaction.amount_cents > 0
+    installment = (positive, Transaction.installment_number.is_not(None))
+    rows = (
+        db.query(
+            Category.name,
+            sum_when(*in_month),
+            sum_when(positive, *in_month),
+            sum_when(positive),
+            sum_when(*installment, Transaction.date >= current_month_start, Transaction.date < next_month_start),
+            sum_when(*installment, Transaction.date >= next_month_start, Transaction.date < after_next_month_start),
+            sum_when(*installment, Transaction.date >= current_month_start),
+        )
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .filter(Transaction.user_id == user_id)
+        .group_by(Category.name)
+        .order_by(Category.name)
+        .all()
+    )
+
+    projected = projected_occurrences(db, user_id, start, end)
+    total_expenses = sum(int(row[1]) for row in rows) + sum(amount for _, amount, _, _ in projected)
+    total_income = 0
+    categorized = [row for row in rows if row[0] is not None]
+    month_totals = {row[0]: int(row[2]) for row in categorized if row[2]}
+    return {
+        "year": year,
+        "month": month,
+        "monthly": {
+            "year": year,
+            "month": month,
+            "total_expenses_cents": total_expenses,
+            "total_income_cents": total_income,
+            "balance_cents": total_income - total_expenses,
+        },
+        "by_category": category_totals_with(db, month_totals, projected),
+        "by_category_total": [{"category": row[0], "total_cents": int(row[3])} for row in categorized if row[3]],
+        "installments": {
+            "this_month": sum(int(row[4]) for row in rows),
+            "next_month": sum(int(row[5]) for row in rows),
+            "total": sum(int(row[6]) for row in rows),
+        },
+        "budgets": budget_status(db, user_id, year * 100 + month),
+    }
+
+
+@router.get("/monthly")
+async def monthly(
+    year: int,
+    month: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
+) -> Response:
+    return await db.run_sync(
+        lambda session: cached_json(session, request, user, lambda: monthly_report(session, user.id, year, month))
+    )
+
+
+@router.get("/by-category")
+async def by_category(
+    year: int,
+    month: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
+) -> Response:
+    return await db.run_sync(
+        lambda session: cached_json(session, request, user, lambda: by_category_report(session, user.id, year, month))
+    )
+
+
+@router.get("/by-category-total")
+async def by_category_total(
+    request: Request, db: AsyncSession = Depends(get_async_read_db), user: User = Depends(get_current_user_async)
+) -> Response:
+    return await db.run_sync(
+        lambda session: cached_json(session, request, user, lambda: by_category_total_report(session, user.id))
+    )
+
+
+@router.get("/installments-summary")
+async def installments_summary(
+    request: Request,
+    scope: str = Query(default="this_month"),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
+) -> Response:
+    return await db.run_sync(
+        lambda session: cached_json(session, request, user, lambda: installments_summary_report(session, user.id, scope))
+    )
+
+
+@router.get("/series")
+async def series(
+    request: Request,
+    from_month: str = Query(alias="from"),
+    to_month: str = Query(alias="to"),
+    group_by: Literal["category", "account"] = "category",
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
+) -> Response:
+    return await db.run_sync(
+        lambda session: cached_json(
+            session,
+            request, user, lambda: series_report(session, user.id, from_month, to_month, group_by)
+        )
+    )
+
+
+@router.get("/installments-projection")
+async def installments_projection(
+    request: Request,
+    months: int = Query(default=12, ge=1, le=MAX_SERIES_MONTHS),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
+) -> Response:
+    return await db.run_sync(
+        lambda session: cached_json(session, request, user, lambda: installments_projection_report(session, user.id, months))
+    )
+
+
+@router.get("/dashboard")
+async def dashboard(
+    request: Request,
+    year: int | None = None,
+    month: int | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
+) -> Response:
+    return await db.run_sync(
+        lambda session: cached_json(session, request, user, lambda: dashboard_report(session, user.id, year, month))
+    )
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import re
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..deps import get_current_user
+from ..models import Account, Category, CategoryRule, User
+from ..schemas import CategoryRuleBulkIn, CategoryRuleIn
+from ..services.category_rules import bump_rules_version, normalize_rule_pattern
+
+router = APIRouter(prefix="/rules", tags=["rules"])
+
+
+def serialize_rule(rule: CategoryRule) -> dict:
+    return {
+        "id": rule.id,
+        "category_id": rule.category_id,
+        "match_type": rule.match_type,
+        "pattern": rule.pattern,
+        "account_id": rule.account_id,
+    }
+
+
+def owned_ids(db: Session, model: type[Category] | type[Account], user_id: int) -> set[int]:
+    return set(db.scalars(select(model.id).where(model.user_id == user_id)))
+
+
+def rule_values(payload: CategoryRuleIn, category_ids: set[int], account_ids: set[int]) -> dict:
+    if payload.category_id not in category_ids:
+        raise HTTPException(status_code=404, detail="Category not found")
+    if payload.account_id is not None and payload.account_id not in account_ids:
+        raise HTTPException(status_code=404, detail="Account not found")
+    try:
+        pattern = normalize_rule_pattern(payload.match_type, payload.pattern)
+    except re.error as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid regex: {exc}") from exc
+    if not pattern:
+        raise HTTPException(status_code=400, detail="Rule pattern is required")
+    return {
+        "category_id": payload.category_id,
+        "match_type": payload.match_type,
+        "pattern": pattern,
+        "account_id": payload.account_id,
+    }
+
+
+@router.get("")
+def list_rules(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> list[dict]:
+    rules = db.query(CategoryRule).filter(CategoryRule.user_id == user.id).order_by(CategoryRule.id.desc()).all()
+    return [serialize_rule(rule) for rule in rules]
+
+
+@router.post("", status_code=201)
+def create_rule(payload: CategoryRuleIn, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    values = rule_values(payload, owned_ids(db, Category, user.id), owned_ids(db, Account, user.id))
+    rule = CategoryRule(user_id=user.id, **values)
+    db.add(rule)
+    bump_rules_version(db, user.id)
+    db.commit()
+    return serialize_rule(rule)
+
+
+@router.post("/bulk", status_code=201)
+def create_rules(payload: CategoryRuleBulkIn, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    category_ids = owned_ids(db, Category, user.id)
+    account_ids = owned_ids(db, Account, user.id)
+    rules = [CategoryRule(user_id=user.id, **rule_values(item, category_ids, account_ids)) for item in payload.rules]
+    db.add_all(rules)
+    bump_rules_version(db, user.id)
+    db.commit()
+    return {"created": len(rules), "ids": [rule.id for rule in rules]}
+
+
+@router.put("/{rule_id}")
+def update_rule(
+    rule_id: int,
+    payload: CategoryRuleIn,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict:
+    rule = db.query(CategoryRule).filter(CategoryRule.id == rule_id, CategoryRule.user_id == user.id).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    for key, value in rule_values(payload, owned_ids(db, Category, user.id), owned_ids(db, Account, user.id)).items():
+        setattr(rule, key, value)
+    bump_rules_version(db, user.id)
+    db.commit()
+    return serialize_rule(rule)
+
+
+@router.delete("/{rule_id}")
+def delete_rule(rule_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    rule = db.query(CategoryRule).filter(CategoryRule.id == rule_id, CategoryRule.user_id == user.id).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    db.delete(rule)
+    bump_rules_version(db, user.id)
+    db.commit()
+    return {"deleted": True}
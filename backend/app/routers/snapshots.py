@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import gzip
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..cache import bump_data_version
+from ..database import get_db
+from ..deps import get_current_user
+from ..models import User
+from ..services.categories import bump_categories_version, invalidate_category_directory
+from ..services.category_rules import bump_rules_version
+from ..services.export import gzip_chunks
+from ..services.snapshots import SnapshotError, clear_user_data, has_user_data, restore_snapshot, snapshot_chunks
+from ..services.suggestions import invalidate_description_index
+
+router = APIRouter(prefix="/snapshots", tags=["snapshots"])
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@router.get("/export")
+def export_snapshot(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> StreamingResponse:
+    return StreamingResponse(
+        gzip_chunks(snapshot_chunks(db, user.id)),
+        media_type="application/gzip",
+        headers={"Content-Disposition": 'attachment; filename="cashlab-snapshot.ndjson.gz"'},
+    )
+
+
+@router.post("/restore")
+def restore(
+    file: UploadFile = File(...),
+    replace: bool = Form(default=False),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict:
+    if has_user_data(db, user.id):
+        if not replace:
+            raise HTTPException(status_code=409, detail="Account already has data; pass replace=true to overwrite it")
+        clear_user_data(db, user.id)
+    stream = file.file
+    compressed = stream.read(2) == GZIP_MAGIC
+    stream.seek(0)
+    try:
+        counts = restore_snapshot(db, user.id, gzip.GzipFile(fileobj=stream, mode="rb") if compressed else stream)
+    except (SnapshotError, OSError, EOFError) as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid snapshot: {exc}") from exc
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Invalid snapshot: conflicting rows") from exc
+    bump_data_version(db, user.id)
+    bump_rules_version(db, user.id)
+    bump_categories_version(db, user.id)
+    db.commit()
+    invalidate_category_directory(user.id)
+    invalidate_description_index(user.id)
+    return {"restored": counts}
@@ -1,19 +1,61 @@
 from __future__ import annotations
 
-from typing import Literal
+import base64
+import json
+import re
+from datetime import datetime
+from typing import Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import asc, desc
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, and_, asc, delete, desc, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..deps import get_current_user
-from ..models import Category, Transaction, User
-from ..schemas import TransactionIn
+from ..cache import bump_data_version, cached_json
+from ..database import get_async_db, get_db, insert_returning_ids
+from ..deps import get_async_read_db, get_current_user, get_current_user_async
+from ..models import Account, Category, CategoryRule, Transaction, TransactionDeletion, User, with_derived_columns
+from ..schemas import RecategorizeIn, TransactionBatchIn, TransactionIn
+from ..search import description_search_clause
+from ..services.budgets import move_category_spend
+from ..services.category_rules import bump_rules_version, normalize_rule_pattern, rule_clause
+from ..services.export import ENCODERS, EXPORT_BATCH_SIZE, EXPORT_FORMATS, gzip_chunks
+from ..services.ledger import ledger_row, ledger_rows, record_ledger_changes
+from ..services.suggestions import get_description_index, invalidate_description_index, record_description_changes
+from ..services.sync import log_transaction_deletions
 from ..utils import build_dedupe_hash, normalize_description
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+TOTAL_COUNT_CAP = 10000
+DEFAULT_SYNC_PAGE_SIZE = 500
+MAX_SYNC_PAGE_SIZE = 5000
+SORT_COLUMNS = {
+    "id": Transaction.id,
+    "date": Transaction.date,
+    "description": Transaction.description,
+    "amount_cents": Transaction.amount_cents,
+    "source": Transaction.source,
+    "created_at": Transaction.created_at,
+    "updated_at": Transaction.updated_at,
+}
+LIST_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.description,
+    Transaction.amount_cents,
+    Transaction.category_id,
+    Category.name.label("category_name"),
+    Transaction.account_id,
+    Transaction.source,
+    Transaction.installment_group_id,
+)
+LIST_FIELDS = tuple(column.key for column in LIST_COLUMNS)
+
 
 def serialize_transaction(tx: Transaction) -> dict:
     return {
@@ -30,7 +72,13 @@ def serialize_transaction(tx: Transaction) -> dict:
 
 
 @router.post("", status_code=201)
-def create_transaction(payload: TransactionIn, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+async def create_transaction(
+    payload: TransactionIn, db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user_async)
+) -> dict:
+    return await db.run_sync(insert_transaction, user, payload)
+
+
+def insert_transaction(db: Session, user: User, payload: TransactionIn) -> dict:
     amount_cents = abs(payload.amount_cents)
     account_scope = str(payload.account_id or "none")
     dedupe_hash = build_dedupe_hash(payload.date, payload.description, amount_cents, account_scope)
@@ -45,24 +93,23 @@ def create_transaction(payload: TransactionIn, db: Session = Depends(get_db), us
         dedupe_hash=dedupe_hash,
     )
     db.add(tx)
+    record_ledger_changes(db, user.id, added=[ledger_row(tx)])
+    version = bump_data_version(db, user.id)
     db.commit()
     db.refresh(tx)
+    record_description_changes(user.id, version, added=[(tx.description, tx.category_id, tx.date)])
     return {"id": tx.id}
 
 
-@router.get("")
-def list_transactions(
+def filter_transactions(
+    db: Session,
+    q: Select,
     start_date: str | None = None,
     end_date: str | None = None,
     category_id: int | None = None,
-    query: str | None = Query(default=None),
+    query: str | None = None,
     account_id: int | None = None,
-    sort_by: Literal["date", "description", "amount_cents", "source", "created_at", "updated_at", "id"] = "date",
-    sort_order: Literal["asc", "desc"] = "desc",
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-) -> list[dict]:
-    q = db.query(Transaction).filter(Transaction.user_id == user.id)
+) -> Select:
     if start_date:
         q = q.filter(Transaction.date >= start_date)
     if end_date:
@@ -72,46 +119,465 @@ def list_transactions(
     if account_id is not None:
         q = q.filter(Transaction.account_id == account_id)
     if query:
-        q = q.filter(Transaction.description.ilike(f"%{query}%"))
-
-    sort_columns = {
-        "id": Transaction.id,
-        "date": Transaction.date,
-        "description": Transaction.description,
-        "amount_cents": Transaction.amount_cents,
-        "source": Transaction.source,
-        "created_at": Transaction.created_at,
-        "updated_at": Transaction.updated_at,
+        q = q.filter(description_search_clause(db, query))
+    return q
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, tx_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort_by, sort_order, value, tx_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, cursor_sort_order, value, tx_id = json.loads(raw)
+        if sort_by in {"created_at", "updated_at"}:
+            value = datetime.fromisoformat(value)
+        tx_id = int(tx_id)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise HTTPException(status_code=400, detail="Cursor does not match sort_by/sort_order")
+    return value, tx_id
+
+
+@router.get("")
+async def list_transactions(
+    request: Request,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    category_id: int | None = None,
+    query: str | None = Query(default=None),
+    account_id: int | None = None,
+    sort_by: Literal["date", "description", "amount_cents", "source", "created_at", "updated_at", "id"] = "date",
+    sort_order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
+) -> Response:
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "category_id": category_id,
+        "query": query,
+        "account_id": account_id,
+    }
+
+    return await db.run_sync(
+        lambda session: cached_json(
+            session,
+            request,
+            user,
+            lambda: transactions_page(session, user.id, filters, sort_by, sort_order, limit, cursor, include_total),
+        )
+    )
+
+
+@router.get("/export")
+def export_transactions(
+    export_format: Literal["csv", "ndjson", "columnar"] = Query(default="csv", alias="format"),
+    use_gzip: bool = Query(default=False, alias="gzip"),
+    start_date: str | None = None,
+    end_date: str | None = None,
+    category_id: int | None = None,
+    query: str | None = Query(default=None),
+    account_id: int | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "category_id": category_id,
+        "query": query,
+        "account_id": account_id,
     }
-    order_column = sort_columns[sort_by]
+    # yield_per streams from a server-side cursor, so memory stays flat however long the history is.
+    stmt = ordered_transactions_select(db, user.id, filters, "date", "asc").execution_options(yield_per=EXPORT_BATCH_SIZE)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    chunks = ENCODERS[export_format](LIST_FIELDS, db.execute(stmt).partitions())
+    headers = {"Content-Disposition": f'attachment; filename="transactions.{extension}"'}
+    if use_gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+def ordered_transactions_select(db: Session, user_id: int, filters: dict, sort_by: str, sort_order: str) -> Select:
+    order_column = SORT_COLUMNS[sort_by]
+    stmt = (
+        select(*LIST_COLUMNS, order_column.label("sort_value"))
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .where(Transaction.user_id == user_id)
+    )
     order_fn = asc if sort_order == "asc" else desc
-    txs = q.order_by(order_fn(order_column), desc(Transaction.id)).all()
-    category_ids = [tx.category_id for tx in txs if tx.category_id is not None]
-    category_name_by_id: dict[int, str] = {}
-    if category_ids:
-        rows = (
-            db.query(Category.id, Category.name)
-            .filter(Category.id.in_(category_ids))
-            .all()
+    return filter_transactions(db, stmt, **filters).order_by(order_fn(order_column), desc(Transaction.id))
+
+
+def transactions_listing(db: Session, user_id: int, filters: dict, sort_by: str, sort_order: str) -> list[dict]:
+    rows = db.execute(ordered_transactions_select(db, user_id, filters, sort_by, sort_order))
+    return [dict(zip(LIST_FIELDS, row)) for row in rows]
+
+
+def transactions_page(
+    db: Session,
+    user_id: int,
+    filters: dict,
+    sort_by: str,
+    sort_order: str,
+    limit: int,
+    cursor: str | None,
+    include_total: bool,
+) -> dict:
+    stmt = ordered_transactions_select(db, user_id, filters, sort_by, sort_order)
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        order_column = SORT_COLUMNS[sort_by]
+        beyond = order_column > value if sort_order == "asc" else order_column < value
+        stmt = stmt.where(or_(beyond, and_(order_column == value, Transaction.id < last_id)))
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    page = {
+        "items": [dict(zip(LIST_FIELDS, row)) for row in rows],
+        "limit": limit,
+        "next_cursor": encode_cursor(sort_by, sort_order, rows[-1].sort_value, rows[-1].id) if has_more else None,
+    }
+    if include_total:
+        # Counting stops at TOTAL_COUNT_CAP so huge histories do not pay for a full count on every page.
+        counted = filter_transactions(
+            db,
+            select(Transaction.id).where(Transaction.user_id == user_id), **filters
+        ).limit(TOTAL_COUNT_CAP + 1)
+        total = db.execute(select(func.count()).select_from(counted.subquery())).scalar() or 0
+        page["total"] = min(int(total), TOTAL_COUNT_CAP)
+        page["total_is_estimate"] = total > TOTAL_COUNT_CAP
+    return page
+
+
+@router.get("/suggest")
+def suggest_descriptions(
+    prefix: str = Query(min_length=1),
+    limit: int = Query(default=10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> list[dict]:
+    return get_description_index(db, user).lookup(prefix, limit)
+
+
+def encode_sync_token(seq: int, tx_id: int, deletion_seq: int, deletion_id: int) -> str:
+    raw = json.dumps([seq, tx_id, deletion_seq, deletion_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_token(token: str) -> tuple[int, int, int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        seq, tx_id, deletion_seq, deletion_id = json.loads(raw)
+        return int(seq), int(tx_id), int(deletion_seq), int(deletion_id)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=400, detail="Invalid sync token") from exc
+
+
+@router.get("/changes")
+def list_changes(
+    since: str | None = None,
+    limit: int = Query(default=DEFAULT_SYNC_PAGE_SIZE, ge=1, le=MAX_SYNC_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict:
+    # change_seq is stamped at commit (services/sync.py), so rows of a commit still in flight stay
+    # invisible here instead of being skipped once a later commit moves the cursor past them.
+    seq, last_id, deletion_seq, last_deletion_id = decode_sync_token(since) if since else (-1, 0, -1, 0)
+
+    rows = db.execute(
+        select(*LIST_COLUMNS, Transaction.updated_at, Transaction.change_seq)
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .where(
+            Transaction.user_id == user.id,
+            or_(
+                Transaction.change_seq > seq,
+                and_(Transaction.change_seq == seq, Transaction.id > last_id),
+            ),
+        )
+        .order_by(Transaction.change_seq.asc(), Transaction.id.asc())
+        .limit(limit + 1)
+    ).all()
+    deletions = db.execute(
+        select(TransactionDeletion.id, TransactionDeletion.transaction_id, TransactionDeletion.change_seq)
+        .where(
+            TransactionDeletion.user_id == user.id,
+            or_(
+                TransactionDeletion.change_seq > deletion_seq,
+                and_(TransactionDeletion.change_seq == deletion_seq, TransactionDeletion.id > last_deletion_id),
+            ),
+        )
+        .order_by(TransactionDeletion.change_seq.asc(), TransactionDeletion.id.asc())
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit or len(deletions) > limit
+    rows, deletions = rows[:limit], deletions[:limit]
+
+    deleted_ids = {deletion.transaction_id for deletion in deletions}
+    if deleted_ids:
+        # SQLite may hand a deleted id to a new row; such ids are live again, not tombstones.
+        live = db.execute(
+            select(Transaction.id).where(Transaction.user_id == user.id, Transaction.id.in_(deleted_ids))
+        ).scalars()
+        deleted_ids.difference_update(live)
+
+    if rows:
+        seq, last_id = rows[-1].change_seq, rows[-1].id
+    if deletions:
+        deletion_seq, last_deletion_id = deletions[-1].change_seq, deletions[-1].id
+    return {
+        "upserts": [{**dict(zip(LIST_FIELDS, row)), "updated_at": row.updated_at} for row in rows],
+        "deleted": sorted(deleted_ids),
+        "next_token": encode_sync_token(seq, last_id, deletion_seq, last_deletion_id),
+        "has_more": has_more,
+    }
+
+
+@router.post("/batch")
+async def batch_transactions(
+    payload: TransactionBatchIn,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+) -> dict:
+    return await db.run_sync(apply_transaction_batch, user, payload)
+
+
+def apply_transaction_batch(db: Session, user: User, payload: TransactionBatchIn) -> dict:
+    operations = payload.operations
+    results: list[dict] = [{"index": i, "op": op.op, "id": op.id, "status": "pending"} for i, op in enumerate(operations)]
+    target_ids = {op.id for op in operations if op.op in {"update", "delete"} and op.id is not None}
+    targets = (
+        {tx.id: tx for tx in db.query(Transaction).filter(Transaction.user_id == user.id, Transaction.id.in_(target_ids))}
+        if target_ids
+        else {}
+    )
+
+    # New (account_id, dedupe_hash) keys claimed by creates and updates, checked in one query below.
+    claims: dict[int, tuple[int | None, str, str]] = {}
+    seen_ids: set[int] = set()
+    for i, op in enumerate(operations):
+        if op.op != "create" and (op.id is None or op.id in seen_ids):
+            results[i]["status"] = "invalid"
+            continue
+        if op.op != "create":
+            seen_ids.add(op.id)
+            if op.id not in targets:
+                results[i]["status"] = "not_found"
+                continue
+        if op.op != "delete":
+            if op.data is None:
+                results[i]["status"] = "invalid"
+                continue
+            description = normalize_description(op.data.description)
+            dedupe_hash = build_dedupe_hash(
+                op.data.date, description, abs(op.data.amount_cents), str(op.data.account_id or "none")
+            )
+            claims[i] = (op.data.account_id, dedupe_hash, description)
+
+    occupied: dict[tuple[int | None, str], int] = {}
+    hashes = {dedupe_hash for _, dedupe_hash, _ in claims.values()}
+    if hashes:
+        rows = db.execute(
+            select(Transaction.id, Transaction.account_id, Transaction.dedupe_hash).where(
+                Transaction.user_id == user.id, Transaction.dedupe_hash.in_(hashes)
+            )
         )
-        category_name_by_id = {int(cat_id): cat_name for cat_id, cat_name in rows}
-
-    return [
-        {
-            **serialize_transaction(tx),
-            "category_name": category_name_by_id.get(tx.category_id) if tx.category_id else None,
-        }
-        for tx in txs
+        occupied = {(account_id, dedupe_hash): tx_id for tx_id, account_id, dedupe_hash in rows}
+    # A key is free once its holder is deleted or updated away, but rejecting that holder's own update keeps
+    # the key taken, which can reject further claims in turn; repeat until no more ops fall out.
+    rejected = True
+    while rejected:
+        rejected = False
+        released = {op.id for i, op in enumerate(operations) if op.op != "create" and results[i]["status"] == "pending"}
+        claimed: set[tuple[int | None, str]] = set()
+        for i, (account_id, dedupe_hash, _) in claims.items():
+            if results[i]["status"] != "pending":
+                continue
+            key = (account_id, dedupe_hash)
+            holder = occupied.get(key)
+            if key in claimed or (holder is not None and holder not in released):
+                results[i]["status"] = "duplicate"
+                rejected = True
+                continue
+            claimed.add(key)
+
+    failed = [result for result in results if result["status"] != "pending"]
+    if failed and payload.mode == "atomic":
+        raise HTTPException(status_code=409, detail={"message": "Batch rejected", "results": failed})
+    if len(failed) == len(results):
+        return {"mode": payload.mode, "applied": 0, "results": results}
+
+    removed: list[str] = []
+    added: list[tuple[str, int | None, str]] = []
+    ledger_removed = []
+    ledger_added = []
+    delete_ids = [op.id for i, op in enumerate(operations) if op.op == "delete" and results[i]["status"] == "pending"]
+    if delete_ids:
+        removed.extend(targets[tx_id].description for tx_id in delete_ids)
+        ledger_removed.extend(ledger_row(targets[tx_id]) for tx_id in delete_ids)
+        db.execute(delete(Transaction).where(Transaction.user_id == user.id, Transaction.id.in_(delete_ids)))
+        log_transaction_deletions(db, user.id, delete_ids)
+        for i, op in enumerate(operations):
+            if op.op == "delete" and results[i]["status"] == "pending":
+                results[i]["status"] = "deleted"
+
+    for i, op in enumerate(operations):
+        if op.op != "update" or results[i]["status"] != "pending":
+            continue
+        tx, data = targets[op.id], op.data
+        account_id, dedupe_hash, description = claims[i]
+        removed.append(tx.description)
+        ledger_removed.append(ledger_row(tx))
+        tx.date = data.date
+        tx.description = description
+        tx.amount_cents = abs(data.amount_cents)
+        tx.category_id = data.category_id
+        tx.account_id = account_id
+        tx.dedupe_hash = dedupe_hash
+        added.append((description, data.category_id, data.date))
+        ledger_added.append(ledger_row(tx))
+        results[i]["status"] = "updated"
+
+    creates = [i for i, op in enumerate(operations) if op.op == "create" and results[i]["status"] == "pending"]
+    try:
+        db.flush()
+        if creates:
+            new_rows = []
+            for i in creates:
+                data = operations[i].data
+                account_id, dedupe_hash, description = claims[i]
+                new_rows.append(
+                    with_derived_columns(
+                        {
+                            "user_id": user.id,
+                            "date": data.date,
+                            "description": description,
+                            "amount_cents": abs(data.amount_cents),
+                            "category_id": data.category_id,
+                            "account_id": account_id,
+                            "source": "manual",
+                            "dedupe_hash": dedupe_hash,
+                        }
+                    )
+                )
+                added.append((description, data.category_id, data.date))
+            new_ids = insert_returning_ids(db, Transaction.__table__, new_rows)
+            for i, tx_id in zip(creates, new_ids):
+                results[i].update(id=tx_id, status="created")
+            ledger_added.extend(ledger_rows(new_rows))
+        record_ledger_changes(db, user.id, added=ledger_added, removed=ledger_removed)
+        version = bump_data_version(db, user.id)
+        db.commit()
+    except IntegrityError as exc:
+        # Nothing was applied; report the ops that claimed a key as conflicts instead of dropping the results.
+        db.rollback()
+        conflicts = [
+            {**result, "status": "conflict"} for i, result in enumerate(results) if i in claims and result["status"] != "duplicate"
+        ]
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Batch would duplicate an existing record", "results": conflicts},
+        ) from exc
+
+    record_description_changes(user.id, version, added=added, removed=removed)
+    applied = sum(1 for result in results if result["status"] in {"created", "updated", "deleted"})
+    return {"mode": payload.mode, "applied": applied, "results": results}
+
+
+@router.post("/recategorize")
+def recategorize_transactions(
+    payload: RecategorizeIn,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict:
+    predicates = [
+        (match_type, value)
+        for match_type, value in (
+            ("contains", payload.description_contains),
+            ("regex", payload.description_regex),
+            ("merchant", payload.merchant),
+        )
+        if value and value.strip()
     ]
+    if len(predicates) != 1:
+        raise HTTPException(
+            status_code=400, detail="Provide exactly one of description_contains, description_regex or merchant"
+        )
+    match_type, raw_pattern = predicates[0]
+    try:
+        pattern = normalize_rule_pattern(match_type, raw_pattern)
+    except re.error as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid regex: {exc}") from exc
+    category = db.query(Category).filter(Category.id == payload.category_id, Category.user_id == user.id).first()
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    if payload.account_id is not None and not db.scalar(
+        select(Account.id).where(Account.id == payload.account_id, Account.user_id == user.id)
+    ):
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    conditions = [Transaction.user_id == user.id, rule_clause(match_type, pattern)]
+    if payload.start_date:
+        conditions.append(Transaction.date >= payload.start_date)
+    if payload.end_date:
+        conditions.append(Transaction.date <= payload.end_date)
+    if payload.account_id is not None:
+        conditions.append(Transaction.account_id == payload.account_id)
+    moved = db.execute(
+        select(Transaction.category_id, Transaction.year_month, func.sum(Transaction.amount_cents))
+        .where(*conditions)
+        .group_by(Transaction.category_id, Transaction.year_month)
+    ).all()
+    move_category_spend(db, user.id, moved, category.id)
+    result = db.execute(
+        update(Transaction)
+        .where(*conditions)
+        .values(category_id=category.id)
+        .execution_options(synchronize_session=False)
+    )
+
+    rule_id = None
+    if payload.save_rule:
+        rule = CategoryRule(
+            user_id=user.id,
+            category_id=category.id,
+            match_type=match_type,
+            pattern=pattern,
+            account_id=payload.account_id,
+        )
+        db.add(rule)
+        db.flush()
+        rule_id = rule.id
+        bump_rules_version(db, user.id)
+    bump_data_version(db, user.id)
+    db.commit()
+    # Last-seen categories may have changed for any number of descriptions; rebuild on next use.
+    invalidate_description_index(user.id)
+    return {"updated": result.rowcount, "rule_id": rule_id}
 
 
 @router.patch("/{transaction_id}")
-def update_transaction(
+async def update_transaction(
     transaction_id: int,
     payload: TransactionIn,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
 ) -> dict:
+    return await db.run_sync(apply_transaction_update, user, transaction_id, payload)
+
+
+def apply_transaction_update(db: Session, user: User, transaction_id: int, payload: TransactionIn) -> dict:
     tx = db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user.id).first()
     if not tx:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -132,22 +598,40 @@ def update_transaction(
     if duplicate:
         raise HTTPException(status_code=409, detail="Transaction would duplicate an existing record")
 
+    previous_description = tx.description
+    previous_row = ledger_row(tx)
     tx.date = payload.date
     tx.description = normalized_description
     tx.amount_cents = amount_cents
     tx.category_id = payload.category_id
     tx.account_id = payload.account_id
     tx.dedupe_hash = new_hash
+    record_ledger_changes(db, user.id, added=[ledger_row(tx)], removed=[previous_row])
+    version = bump_data_version(db, user.id)
     db.commit()
     db.refresh(tx)
+    record_description_changes(
+        user.id, version, added=[(tx.description, tx.category_id, tx.date)], removed=[previous_description]
+    )
     return serialize_transaction(tx)
 
 
 @router.delete("/{transaction_id}")
-def delete_transaction(transaction_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+async def delete_transaction(
+    transaction_id: int, db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user_async)
+) -> dict:
+    return await db.run_sync(remove_transaction, user, transaction_id)
+
+
+def remove_transaction(db: Session, user: User, transaction_id: int) -> dict:
     tx = db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user.id).first()
     if not tx:
         raise HTTPException(status_code=404, detail="Transaction not found")
+    description = tx.description
     db.delete(tx)
+    log_transaction_deletions(db, user.id, [tx.id])
+    record_ledger_changes(db, user.id, removed=[ledger_row(tx)])
+    version = bump_data_version(db, user.id)
     db.commit()
+    record_description_changes(user.id, version, removed=[description])
     return {"deleted": True}
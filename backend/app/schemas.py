@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
@@ -26,6 +28,11 @@ class CategoryIn(BaseModel):
     name: str
 
 
+class CategoryMergeIn(BaseModel):
+    target_id: int
+    source_ids: list[int] = Field(default_factory=list, max_length=500)
+
+
 class CategoryOut(BaseModel):
     id: int
     name: str
@@ -33,6 +40,10 @@ class CategoryOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BudgetIn(BaseModel):
+    amount_cents: int = Field(gt=0)
+
+
 class AccountIn(BaseModel):
     name: str
 
@@ -52,15 +63,50 @@ class TransactionIn(BaseModel):
     account_id: int | None = None
 
 
+class TransactionBatchOp(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: int | None = None
+    data: TransactionIn | None = None
+
+
+class TransactionBatchIn(BaseModel):
+    operations: list[TransactionBatchOp] = Field(min_length=1, max_length=1000)
+    mode: Literal["atomic", "partial"] = "atomic"
+
+
+class RecategorizeIn(BaseModel):
+    category_id: int
+    description_contains: str | None = None
+    description_regex: str | None = None
+    merchant: str | None = None
+    start_date: str | None = None
+    end_date: str | None = None
+    account_id: int | None = None
+    save_rule: bool = False
+
+
+class CategoryRuleIn(BaseModel):
+    category_id: int
+    match_type: Literal["contains", "regex", "merchant"] = "contains"
+    pattern: str = Field(min_length=1, max_length=255)
+    account_id: int | None = None
+
+
+class CategoryRuleBulkIn(BaseModel):
+    rules: list[CategoryRuleIn] = Field(min_length=1, max_length=1000)
+
+
 class InstallmentGroupIn(BaseModel):
     start_date: str
     base_description: str
     total_cents: int | None = None
     amount_per_installment_cents: int | None = None
-    installments: int
-    interval_months: int = 1
+    installments: int | None = None
+    interval_months: int = Field(default=1, ge=1)
     account_id: int | None = None
     category_id: int | None = None
+    mode: Literal["installments", "recurring"] = "installments"
+    end_date: str | None = None
 
 
 class InstallmentGroupOut(BaseModel):
@@ -71,6 +117,10 @@ class InstallmentGroupOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class NearDuplicateResolveIn(BaseModel):
+    action: Literal["keep_both", "delete_duplicate"]
+
+
 class PendingReviewResolveIn(BaseModel):
     date: str
     description: str
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from sqlalchemy import Connection, ColumnElement, Engine, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from .models import Transaction
+from .utils import fold_text
+
+FTS_TABLE = "transactions_fts"
+# Trigram indexes cannot answer queries shorter than one trigram.
+MIN_INDEXED_QUERY_LENGTH = 3
+
+SQLITE_FTS_TRIGGERS = {
+    "transactions_fts_ai": f"""
+        CREATE TRIGGER transactions_fts_ai AFTER INSERT ON transactions BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+        END
+    """,
+    "transactions_fts_ad": f"""
+        CREATE TRIGGER transactions_fts_ad AFTER DELETE ON transactions BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        END
+    """,
+    "transactions_fts_au": f"""
+        CREATE TRIGGER transactions_fts_au AFTER UPDATE OF search_text ON transactions BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+            INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+        END
+    """,
+}
+
+# Database URL -> whether the SQLite FTS5 index was set up for it.
+_fts_enabled: dict[str, bool] = {}
+
+
+# The sync and async engines reach the same file through different drivers.
+def _database_key(engine: Engine) -> str:
+    return engine.url.set(drivername=engine.dialect.name).render_as_string()
+
+
+def _setup_sqlite_fts(conn: Connection) -> bool:
+    existing_triggers = {
+        row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).all()
+    }
+    has_table = inspect(conn).has_table(FTS_TABLE)
+    try:
+        with conn.begin_nested():
+            if not has_table:
+                conn.execute(
+                    text(
+                        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                        "search_text, content='transactions', content_rowid='id', tokenize='trigram')"
+                    )
+                )
+            for name, ddl in SQLITE_FTS_TRIGGERS.items():
+                if name not in existing_triggers:
+                    conn.execute(text(ddl))
+            # Rows written while the table or its triggers were missing are not indexed yet.
+            if not has_table or not existing_triggers.issuperset(SQLITE_FTS_TRIGGERS):
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    except DBAPIError:
+        return False
+    return True
+
+
+def _setup_postgres_trigram(conn: Connection) -> None:
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_transactions_search_trgm "
+                    "ON transactions USING gin (search_text gin_trgm_ops)"
+                )
+            )
+    except DBAPIError:
+        # Without pg_trgm the ILIKE below still works, it just scans.
+        pass
+
+
+def setup_search_index(conn: Connection) -> None:
+    if conn.dialect.name == "sqlite":
+        _fts_enabled[_database_key(conn.engine)] = _setup_sqlite_fts(conn)
+    elif conn.dialect.name == "postgresql":
+        _setup_postgres_trigram(conn)
+
+
+def description_search_clause(db: Session, query: str) -> ColumnElement[bool]:
+    folded = fold_text(query)
+    bind = db.get_bind()
+    if len(folded) >= MIN_INDEXED_QUERY_LENGTH and _fts_enabled.get(_database_key(bind.engine)):
+        phrase = '"' + folded.replace('"', '""') + '"'
+        return Transaction.id.in_(
+            text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :search_phrase").bindparams(
+                search_phrase=phrase
+            )
+        )
+    # On Postgres this LIKE is served by the pg_trgm GIN index.
+    return Transaction.search_text.contains(folded, autoescape=True)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from itertools import groupby
+
+from sqlalchemy import Connection, and_, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models import AccountBalanceCheckpoint, Transaction
+from ..utils import month_key
+
+Checkpoint = AccountBalanceCheckpoint
+
+
+def apply_balance_deltas(db: Session, user_id: int, deltas: dict[tuple[int, int], int]) -> None:
+    # A write dated in month M shifts M's own total and the cumulative sum of M and every later checkpoint.
+    for (account_id, year_month), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        updated = db.execute(
+            update(Checkpoint)
+            .where(Checkpoint.account_id == account_id, Checkpoint.year_month == year_month)
+            .values(month_total_cents=Checkpoint.month_total_cents + delta)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            previous = db.scalar(
+                select(Checkpoint.cumulative_cents)
+                .where(Checkpoint.account_id == account_id, Checkpoint.year_month < year_month)
+                .order_by(Checkpoint.year_month.desc())
+                .limit(1)
+            )
+            db.execute(
+                insert(Checkpoint).values(
+                    user_id=user_id,
+                    account_id=account_id,
+                    year_month=year_month,
+                    month_total_cents=delta,
+                    cumulative_cents=previous or 0,
+                )
+            )
+        db.execute(
+            update(Checkpoint)
+            .where(Checkpoint.account_id == account_id, Checkpoint.year_month >= year_month)
+            .values(cumulative_cents=Checkpoint.cumulative_cents + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def rebuild_balance_checkpoints(conn: Connection | Session, account_ids: list[int]) -> None:
+    conn.execute(Checkpoint.__table__.delete().where(Checkpoint.account_id.in_(account_ids)))
+    rows = conn.execute(
+        select(Transaction.user_id, Transaction.account_id, Transaction.year_month, func.sum(Transaction.amount_cents))
+        .where(Transaction.account_id.in_(account_ids), Transaction.year_month.is_not(None))
+        .group_by(Transaction.user_id, Transaction.account_id, Transaction.year_month)
+        .order_by(Transaction.account_id, Transaction.year_month)
+    ).all()
+    checkpoints = []
+    for _, account_rows in groupby(rows, key=lambda row: row[1]):
+        cumulative = 0
+        for user_id, account_id, year_month, total in account_rows:
+            cumulative += int(total)
+            checkpoints.append(
+                {
+                    "user_id": user_id,
+                    "account_id": account_id,
+                    "year_month": year_month,
+                    "month_total_cents": int(total),
+                    "cumulative_cents": cumulative,
+                }
+            )
+    if checkpoints:
+        conn.execute(insert(Checkpoint), checkpoints)
+
+
+# account_id -> sum of the account's transactions dated up to and including `at` (an ISO date).
+def balances_at(db: Session, user_id: int, at: str, account_ids: list[int]) -> dict[int, int]:
+    if not account_ids:
+        return {}
+    latest = (
+        select(Checkpoint.account_id, func.max(Checkpoint.year_month).label("year_month"))
+        .where(Checkpoint.account_id.in_(account_ids), Checkpoint.year_month < month_key(at))
+        .group_by(Checkpoint.account_id)
+        .subquery()
+    )
+    totals = dict.fromkeys(account_ids, 0)
+    for account_id, cumulative in db.execute(
+        select(Checkpoint.account_id, Checkpoint.cumulative_cents).join(
+            latest,
+            and_(Checkpoint.account_id == latest.c.account_id, Checkpoint.year_month == latest.c.year_month),
+        )
+    ):
+        totals[account_id] += cumulative
+    # Only the days of the requested month are summed from the transactions themselves.
+    for account_id, partial in db.execute(
+        select(Transaction.account_id, func.sum(Transaction.amount_cents))
+        .where(
+            Transaction.user_id == user_id,
+            Transaction.account_id.in_(account_ids),
+            Transaction.date >= at[:8] + "01",
+            Transaction.date <= at,
+        )
+        .group_by(Transaction.account_id)
+    ):
+        totals[account_id] += int(partial)
+    return totals
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from sqlalchemy import Connection, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models import BudgetEvent, Category, CategoryBudget, CategoryMonthTotal, Transaction
+
+WARNING = "warning"
+EXCEEDED = "exceeded"
+WARNING_PERCENT = 80
+
+MonthTotal = CategoryMonthTotal
+
+
+def budget_levels(spent_cents: int, limit_cents: int) -> set[str]:
+    levels = set()
+    if spent_cents * 100 >= limit_cents * WARNING_PERCENT:
+        levels.add(WARNING)
+    if spent_cents > limit_cents:
+        levels.add(EXCEEDED)
+    return levels
+
+
+def budget_state(levels: Iterable[str]) -> str:
+    levels = set(levels)
+    if EXCEEDED in levels:
+        return EXCEEDED
+    return WARNING if WARNING in levels else "ok"
+
+
+def sync_budget_events(
+    db: Session, budget: CategoryBudget, year_month: int, spent_cents: int, current: set[str]
+) -> None:
+    levels = budget_levels(spent_cents, budget.amount_cents)
+    if current - levels:
+        db.execute(
+            delete(BudgetEvent).where(
+                BudgetEvent.budget_id == budget.id,
+                BudgetEvent.year_month == year_month,
+                BudgetEvent.kind.in_(current - levels),
+            )
+        )
+    for kind in sorted(levels - current):
+        db.execute(
+            insert(BudgetEvent).values(
+                user_id=budget.user_id,
+                budget_id=budget.id,
+                category_id=budget.category_id,
+                year_month=year_month,
+                kind=kind,
+                spent_cents=spent_cents,
+                limit_cents=budget.amount_cents,
+            )
+        )
+
+
+# Shifts the per-category monthly counters and records the budget thresholds each shift crosses.
+def apply_spend_deltas(db: Session, user_id: int, deltas: dict[tuple[int, int], int]) -> None:
+    spent: dict[tuple[int, int], tuple[int, int]] = {}
+    for (category_id, year_month), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        after = db.execute(
+            update(MonthTotal)
+            .where(MonthTotal.category_id == category_id, MonthTotal.year_month == year_month)
+            .values(spent_cents=MonthTotal.spent_cents + delta)
+            .returning(MonthTotal.spent_cents)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        if after is None:
+            db.execute(
+                insert(MonthTotal).values(
+                    user_id=user_id, category_id=category_id, year_month=year_month, spent_cents=delta
+                )
+            )
+            after = delta
+        spent[(category_id, year_month)] = (after - delta, after)
+    if not spent:
+        return
+
+    budgets = {
+        budget.category_id: budget
+        for budget in db.scalars(
+            select(CategoryBudget).where(CategoryBudget.category_id.in_({category_id for category_id, _ in spent}))
+        )
+    }
+    for (category_id, year_month), (before, after) in spent.items():
+        budget = budgets.get(category_id)
+        if budget is not None:
+            sync_budget_events(db, budget, year_month, after, budget_levels(before, budget.amount_cents))
+
+
+# Moves (category_id, year_month, amount_cents) totals onto the target category, e.g. for a recategorize or merge.
+def move_category_spend(db: Session, user_id: int, moved: Iterable[tuple[int | None, int | None, int]], target_id: int) -> None:
+    deltas: dict[tuple[int, int], int] = defaultdict(int)
+    for category_id, year_month, amount_cents in moved:
+        if year_month is None or category_id == target_id:
+            continue
+        if category_id is not None:
+            deltas[(category_id, year_month)] -= int(amount_cents)
+        deltas[(target_id, year_month)] += int(amount_cents)
+    apply_spend_deltas(db, user_id, deltas)
+
+
+# Called after a limit change: brings every month's events in line with the stored counters.
+def reevaluate_budget(db: Session, budget: CategoryBudget) -> None:
+    current: dict[int, set[str]] = defaultdict(set)
+    for year_month, kind in db.execute(
+        select(BudgetEvent.year_month, BudgetEvent.kind).where(BudgetEvent.budget_id == budget.id)
+    ):
+        current[year_month].add(kind)
+    totals = dict(
+        db.execute(
+            select(MonthTotal.year_month, MonthTotal.spent_cents).where(MonthTotal.category_id == budget.category_id)
+        ).all()
+    )
+    for year_month in sorted(set(current) | set(totals)):
+        sync_budget_events(db, budget, year_month, totals.get(year_month, 0), current[year_month])
+
+
+def budget_status(db: Session, user_id: int, year_month: int) -> list[dict]:
+    rows = db.execute(
+        select(CategoryBudget.id, CategoryBudget.category_id, Category.name, CategoryBudget.amount_cents, MonthTotal.spent_cents)
+        .join(Category, Category.id == CategoryBudget.category_id)
+        .outerjoin(
+            MonthTotal,
+            (MonthTotal.category_id == CategoryBudget.category_id) & (MonthTotal.year_month == year_month),
+        )
+        .where(CategoryBudget.user_id == user_id)
+        .order_by(Category.name)
+    ).all()
+    events: dict[int, set[str]] = defaultdict(set)
+    for budget_id, kind in db.execute(
+        select(BudgetEvent.budget_id, BudgetEvent.kind).where(
+            BudgetEvent.user_id == user_id, BudgetEvent.year_month == year_month
+        )
+    ):
+        events[budget_id].add(kind)
+    return [
+        {
+            "budget_id": budget_id,
+            "category_id": category_id,
+            "category": name,
+            "limit_cents": limit_cents,
+            "spent_cents": spent_cents or 0,
+            "remaining_cents": limit_cents - (spent_cents or 0),
+            "status": budget_state(events[budget_id]),
+        }
+        for budget_id, category_id, name, limit_cents, spent_cents in rows
+    ]
+
+
+def rebuild_category_month_totals(conn: Connection | Session, category_ids: list[int]) -> None:
+    conn.execute(MonthTotal.__table__.delete().where(MonthTotal.category_id.in_(category_ids)))
+    rows = conn.execute(
+        select(Transaction.user_id, Transaction.category_id, Transaction.year_month, func.sum(Transaction.amount_cents))
+        .where(Transaction.category_id.in_(category_ids), Transaction.year_month.is_not(None))
+        .group_by(Transaction.user_id, Transaction.category_id, Transaction.year_month)
+    ).all()
+    if rows:
+        conn.execute(
+            insert(MonthTotal),
+            [
+                {"user_id": user_id, "category_id": category_id, "year_month": year_month, "spent_cents": int(total)}
+                for user_id, category_id, year_month, total in rows
+            ],
+        )
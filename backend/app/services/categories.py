@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from ..cache import LRUCache
+from ..database import reads_replica
+from ..models import Category, User
+from ..utils import fold_text
+
+CATEGORY_CACHE_USERS = int(os.getenv("CATEGORY_CACHE_USERS", "256"))
+
+
+class CategoryDirectory:
+    def __init__(self, version: int, rows: Iterable[tuple[int, str, str | None]]) -> None:
+        self.version = version
+        self.by_key: dict[str, tuple[int, str]] = {}
+        self.lock = threading.Lock()
+        for category_id, name, normalized_name in rows:
+            if normalized_name:
+                self.by_key[normalized_name] = (category_id, name)
+
+    def find(self, name: str) -> tuple[int, str] | None:
+        return self.by_key.get(fold_text(name))
+
+    def names(self) -> list[str]:
+        return [name for _, name in self.by_key.values()]
+
+    def listing(self) -> list[dict]:
+        entries = sorted(self.by_key.values(), key=lambda entry: (entry[1].lower(), entry[0]))
+        return [{"id": category_id, "name": name} for category_id, name in entries]
+
+
+category_directories = LRUCache(CATEGORY_CACHE_USERS)
+
+
+def build_category_directory(db: Session, user_id: int, version: int) -> CategoryDirectory:
+    rows = db.execute(
+        select(Category.id, Category.name, Category.normalized_name).where(Category.user_id == user_id)
+    )
+    return CategoryDirectory(version, rows)
+
+
+def get_category_directory(db: Session, user: User) -> CategoryDirectory:
+    version = user.categories_version or 0
+    directory = category_directories.get(user.id)
+    if directory is None or directory.version != version:
+        directory = build_category_directory(db, user.id, version)
+        if not reads_replica(db):
+            category_directories.set(user.id, directory)
+    return directory
+
+
+def bump_categories_version(db: Session, user_id: int) -> int:
+    return db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(categories_version=func.coalesce(User.categories_version, 0) + 1)
+        .returning(User.categories_version)
+        .execution_options(synchronize_session="fetch")
+    ).scalar_one()
+
+
+def record_category_changes(user_id: int, version: int, added: Iterable[tuple[int, str]] = ()) -> None:
+    directory = category_directories.get(user_id)
+    if directory is None:
+        return
+    with directory.lock:
+        if directory.version != version - 1:
+            directory.version = -1
+            return
+        for category_id, name in added:
+            directory.by_key[fold_text(name)] = (category_id, name)
+        directory.version = version
+
+
+def invalidate_category_directory(user_id: int) -> None:
+    category_directories.pop(user_id)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+
+from sqlalchemy import ColumnElement, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..cache import LRUCache
+from ..models import CategoryRule, Transaction, User
+from ..utils import canonical_description, fold_text
+
+RULE_MATCH_TYPES = ("contains", "regex", "merchant")
+RULE_MATCHER_USERS = int(os.getenv("RULE_MATCHER_USERS", "256"))
+BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+LEADING_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+
+# (rank, match_type, pattern, category_id, account_id); rank 0 is the newest rule and wins.
+RuleRow = tuple[int, str, str, int, int | None]
+
+
+def normalize_rule_pattern(match_type: str, pattern: str) -> str:
+    if match_type == "regex":
+        # Rules always match case-insensitively; any other global flag would clash with the "(?i)" that
+        # rule_clause prepends, and Python and Postgres read letters like "m" and "s" differently anyway.
+        while flags := LEADING_FLAGS.match(pattern):
+            unsupported = set(flags.group(1)) - {"i"}
+            if unsupported:
+                raise re.error(f"inline flags {''.join(sorted(unsupported))!r} are not supported")
+            pattern = pattern[flags.end():]
+        re.compile(pattern)
+        return pattern
+    if match_type == "merchant":
+        return fold_text(canonical_description(pattern))
+    return fold_text(pattern)
+
+
+def rule_clause(match_type: str, pattern: str) -> ColumnElement[bool]:
+    if match_type == "regex":
+        # Inline flag rather than flags=: SQLite's REGEXP ignores them, Postgres AREs accept "(?i)".
+        return Transaction.description.regexp_match(f"(?i){pattern}")
+    if match_type == "merchant":
+        escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return or_(Transaction.search_text == pattern, Transaction.search_text.like(f"{escaped} (%/%)", escape="\\"))
+    return Transaction.search_text.contains(pattern, autoescape=True)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting the lowest rank among the keywords found in a text."""
+
+    def __init__(self, keywords: list[tuple[str, int]]) -> None:
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.best: list[int | None] = [None]
+        for keyword, rank in keywords:
+            node = 0
+            for ch in keyword:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                node = nxt
+            if self.best[node] is None or rank < self.best[node]:
+                self.best[node] = rank
+
+        # Breadth-first, so a node's fail target is final (and its best rank merged) before the node is reached.
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            inherited = self.best[self.fail[node]]
+            if inherited is not None and (self.best[node] is None or inherited < self.best[node]):
+                self.best[node] = inherited
+            for ch, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                queue.append(child)
+
+    def search(self, text: str) -> int | None:
+        found: int | None = None
+        node = 0
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            rank = self.best[node]
+            if rank is not None and (found is None or rank < found):
+                found = rank
+                if found == 0:
+                    break
+        return found
+
+
+class CompiledRules:
+    def __init__(self, rules: list[RuleRow]) -> None:
+        self.category_by_rank = {rank: category_id for rank, _, _, category_id, _ in rules}
+        self.keywords = KeywordAutomaton(
+            [(pattern, rank) for rank, match_type, pattern, _, _ in rules if match_type == "contains" and pattern]
+        )
+        self.merchants: dict[str, int] = {}
+        for rank, match_type, pattern, _, _ in rules:
+            if match_type == "merchant":
+                self.merchants.setdefault(pattern, rank)
+
+        regex_rules = [(rank, pattern) for rank, match_type, pattern, _, _ in rules if match_type == "regex"]
+        # Numbered/named backreferences would point at the wrong group once patterns are combined.
+        combinable = [(rank, pattern) for rank, pattern in regex_rules if not BACKREFERENCE.search(pattern)]
+        self.separate = [
+            (rank, re.compile(pattern, re.IGNORECASE)) for rank, pattern in regex_rules if BACKREFERENCE.search(pattern)
+        ]
+        self.combined: re.Pattern[str] | None = None
+        self.combined_ranks: list[tuple[int, int]] = []
+        if not combinable:
+            return
+        # Each alternative is a lookahead anchored at the start followed by an empty marker group: the first
+        # alternative (newest rule) matching anywhere in the text wins, and its marker says which one it was.
+        parts: list[str] = []
+        group = 0
+        for rank, pattern in combinable:
+            group += re.compile(pattern).groups + 1
+            parts.append(f"(?=[\\s\\S]*?(?:{pattern}))()")
+            self.combined_ranks.append((rank, group))
+        try:
+            self.combined = re.compile("^(?:" + "|".join(parts) + ")", re.IGNORECASE)
+        except re.error:
+            # Inline global flags are only allowed at the very start of a pattern.
+            self.combined_ranks = []
+            self.separate = sorted(
+                self.separate + [(rank, re.compile(pattern, re.IGNORECASE)) for rank, pattern in combinable]
+            )
+
+    def _regex_rank(self, description: str) -> int | None:
+        found: int | None = None
+        if self.combined is not None:
+            match = self.combined.match(description)
+            if match is not None:
+                found = next(rank for rank, marker in self.combined_ranks if match.group(marker) is not None)
+        for rank, pattern in self.separate:
+            if found is not None and rank > found:
+                break
+            if pattern.search(description):
+                return rank
+        return found
+
+    def match(self, description: str) -> int | None:
+        candidates = (
+            self.keywords.search(fold_text(description)),
+            self.merchants.get(fold_text(canonical_description(description))),
+            self._regex_rank(description),
+        )
+        ranks = [rank for rank in candidates if rank is not None]
+        if not ranks:
+            return None
+        return self.category_by_rank[min(ranks)]
+
+
+class RuleMatcher:
+    def __init__(self, version: int, rules: list[RuleRow]) -> None:
+        self.version = version
+        self.rules = rules
+        self.by_account: dict[int | None, CompiledRules] = {}
+
+    def match(self, description: str, account_id: int | None) -> int | None:
+        compiled = self.by_account.get(account_id)
+        if compiled is None:
+            # Account-scoped rules only apply to rows imported into that account.
+            compiled = CompiledRules([rule for rule in self.rules if rule[4] is None or rule[4] == account_id])
+            self.by_account[account_id] = compiled
+        return compiled.match(description)
+
+
+rule_matchers = LRUCache(RULE_MATCHER_USERS)
+
+
+def get_rule_matcher(db: Session, user: User) -> RuleMatcher:
+    version = user.rules_version or 0
+    matcher = rule_matchers.get(user.id)
+    if matcher is None or matcher.version != version:
+        rows = db.execute(
+            select(CategoryRule.match_type, CategoryRule.pattern, CategoryRule.category_id, CategoryRule.account_id)
+            .where(CategoryRule.user_id == user.id)
+            .order_by(CategoryRule.id.desc())
+        )
+        matcher = RuleMatcher(version, [(rank, *row) for rank, row in enumerate(rows)])
+        rule_matchers.set(user.id, matcher)
+    return matcher
+
+
+# Rules change far less often than data_version, so they get their own counter; every process compares
+# it with its cached matcher, which is what makes a rule edit served by one worker visible to the others.
+def bump_rules_version(db: Session, user_id: int) -> None:
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(rules_version=func.coalesce(User.rules_version, 0) + 1)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Transaction
+
+HASH_CHUNK_SIZE = 500
+
+
+# dedupe_hash -> installment_group_id of the stored transaction, for the hashes that already exist.
+def existing_dedupe_hashes(
+    db: Session, user_id: int, account_id: int | None, hashes: Sequence[str]
+) -> dict[str, int | None]:
+    unique = list(dict.fromkeys(hashes))
+    existing: dict[str, int | None] = {}
+    for offset in range(0, len(unique), HASH_CHUNK_SIZE):
+        rows = db.execute(
+            select(Transaction.dedupe_hash, Transaction.installment_group_id).where(
+                Transaction.user_id == user_id,
+                Transaction.account_id == account_id,
+                Transaction.dedupe_hash.in_(unique[offset : offset + HASH_CHUNK_SIZE]),
+            )
+        )
+        for dedupe_hash, group_id in rows:
+            existing[dedupe_hash] = group_id
+    return existing
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from collections.abc import Iterable, Iterator, Sequence
+
+from ..cache import dump_json
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "columnar": ("application/x-ndjson", "columns.ndjson"),
+}
+
+
+def csv_chunks(fields: Sequence[str], batches: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for batch in batches:
+        writer.writerows(row[: len(fields)] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(fields: Sequence[str], batches: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(dump_json(dict(zip(fields, row))) + b"\n" for row in batch)
+
+
+# One line per row group, each holding the group's values column by column.
+def columnar_chunks(fields: Sequence[str], batches: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    yield dump_json({"format": "cashlab.columns", "version": 1, "fields": list(fields)}) + b"\n"
+    for batch in batches:
+        columns = list(zip(*(row[: len(fields)] for row in batch)))
+        yield dump_json({"rows": len(batch), "columns": dict(zip(fields, map(list, columns)))}) + b"\n"
+
+
+ENCODERS = {"csv": csv_chunks, "ndjson": ndjson_chunks, "columnar": columnar_chunks}
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from sqlalchemy.orm import Session
+
+from ..utils import month_key
+from .balances import apply_balance_deltas
+from .budgets import apply_spend_deltas
+
+# (account_id, category_id, date, amount_cents) of a transaction as stored before or after a write.
+LedgerRow = tuple[int | None, int | None, str, int]
+
+
+# Write paths call this before commit so derived aggregates move in the same database transaction.
+def record_ledger_changes(
+    db: Session, user_id: int, added: Iterable[LedgerRow] = (), removed: Iterable[LedgerRow] = ()
+) -> None:
+    balance_deltas: dict[tuple[int, int], int] = defaultdict(int)
+    spend_deltas: dict[tuple[int, int], int] = defaultdict(int)
+    for rows, sign in ((added, 1), (removed, -1)):
+        for account_id, category_id, tx_date, amount_cents in rows:
+            year_month = month_key(tx_date)
+            if year_month is None:
+                continue
+            if account_id is not None:
+                balance_deltas[(account_id, year_month)] += sign * amount_cents
+            if category_id is not None:
+                spend_deltas[(category_id, year_month)] += sign * amount_cents
+    if balance_deltas:
+        apply_balance_deltas(db, user_id, balance_deltas)
+    if spend_deltas:
+        apply_spend_deltas(db, user_id, spend_deltas)
+
+
+def ledger_row(tx) -> LedgerRow:
+    return (tx.account_id, tx.category_id, tx.date, tx.amount_cents)
+
+
+def ledger_rows(values: Iterable[dict]) -> list[LedgerRow]:
+    return [(row["account_id"], row["category_id"], row["date"], row["amount_cents"]) for row in values]
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import ImportReviewItem, Transaction
+from ..utils import canonical_description, fold_text
+
+DEFAULT_WINDOW_DAYS = 3
+DEFAULT_MIN_SCORE = 0.5
+# Same-amount rows inside one window are compared nearest-first up to this many, so a user with hundreds of
+# identical coffees per week stays linear.
+MAX_COMPARISONS_PER_ROW = 50
+CANDIDATE_CHUNK_SIZE = 500
+STATEMENT_NOISE = {
+    "compra", "compras", "pagamento", "pag", "pgto", "pix", "ted", "doc", "debito", "credito", "cartao",
+    "visa", "master", "mastercard", "elo", "parcela", "parc", "de", "do", "da", "dos", "das", "em", "no", "na",
+}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# (id, date, amount_cents, description, installment_group_id)
+CandidateRow = tuple[int, str, int, str, int | None]
+# (transaction_id, duplicate_of_id, score); transaction_id is the later of the two rows.
+NearDuplicatePair = tuple[int, int, float]
+
+
+def merchant_tokens(description: str) -> frozenset[str]:
+    words = TOKEN_PATTERN.findall(fold_text(canonical_description(description)))
+    return frozenset(word for word in words if len(word) > 1 and not word.isdigit() and word not in STATEMENT_NOISE)
+
+
+def token_similarity(left: frozenset[str], right: frozenset[str]) -> float:
+    if not left or not right:
+        return 0.0
+    # Overlap rather than Jaccard: one statement often appends city or acquirer names the other lacks.
+    return len(left & right) / min(len(left), len(right))
+
+
+def find_near_duplicates(
+    rows: Iterable[CandidateRow],
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    min_score: float = DEFAULT_MIN_SCORE,
+    focus_ids: set[int] | None = None,
+) -> list[NearDuplicatePair]:
+    blocks: dict[int, list[tuple[int, int, frozenset[str], int | None]]] = defaultdict(list)
+    for tx_id, tx_date, amount_cents, description, group_id in rows:
+        try:
+            day = date.fromisoformat(tx_date).toordinal()
+        except ValueError:
+            continue
+        blocks[amount_cents].append((day, tx_id, merchant_tokens(description), group_id))
+
+    pairs: list[NearDuplicatePair] = []
+    for items in blocks.values():
+        if len(items) < 2:
+            continue
+        items.sort()
+        start = 0
+        for i, (day, tx_id, tokens, group_id) in enumerate(items):
+            while items[start][0] < day - window_days:
+                start += 1
+            best: NearDuplicatePair | None = None
+            for j in range(i - 1, max(start, i - MAX_COMPARISONS_PER_ROW) - 1, -1):
+                _, other_id, other_tokens, other_group_id = items[j]
+                if focus_ids is not None and tx_id not in focus_ids and other_id not in focus_ids:
+                    continue
+                if group_id is not None and group_id == other_group_id:
+                    continue
+                score = token_similarity(tokens, other_tokens)
+                if score >= min_score and (best is None or score > best[2]):
+                    best = (tx_id, other_id, round(score, 3))
+            if best is not None:
+                pairs.append(best)
+    return pairs
+
+
+def load_candidate_rows(
+    db: Session, user_id: int, transaction_ids: list[int] | None, window_days: int
+) -> list[CandidateRow]:
+    columns = (
+        Transaction.id,
+        Transaction.date,
+        Transaction.amount_cents,
+        Transaction.description,
+        Transaction.installment_group_id,
+    )
+    if transaction_ids is None:
+        return [tuple(row) for row in db.execute(select(*columns).where(Transaction.user_id == user_id))]
+
+    # Only rows sharing an amount with the new ones, inside the widened date span, can pair with them.
+    new_rows = []
+    for offset in range(0, len(transaction_ids), CANDIDATE_CHUNK_SIZE):
+        chunk = transaction_ids[offset : offset + CANDIDATE_CHUNK_SIZE]
+        new_rows.extend(db.execute(select(Transaction.date, Transaction.amount_cents).where(Transaction.id.in_(chunk))))
+    dates = [row.date for row in new_rows if len(row.date) == 10]
+    if not dates:
+        return []
+    lower = (date.fromisoformat(min(dates)) - timedelta(days=window_days)).isoformat()
+    upper = (date.fromisoformat(max(dates)) + timedelta(days=window_days)).isoformat()
+    amounts = sorted({row.amount_cents for row in new_rows})
+    candidates: list[CandidateRow] = []
+    for offset in range(0, len(amounts), CANDIDATE_CHUNK_SIZE):
+        stmt = select(*columns).where(
+            Transaction.user_id == user_id,
+            Transaction.amount_cents.in_(amounts[offset : offset + CANDIDATE_CHUNK_SIZE]),
+            Transaction.date >= lower,
+            Transaction.date <= upper,
+        )
+        candidates.extend(tuple(row) for row in db.execute(stmt))
+    return candidates
+
+
+def flag_near_duplicates(db: Session, user_id: int, import_id: int, pairs: list[NearDuplicatePair]) -> list[NearDuplicatePair]:
+    if not pairs:
+        return []
+    # Pairs already flagged once (pending, kept or resolved) are not raised again.
+    seen: set[tuple[int, int]] = set()
+    flagged_ids = [tx_id for tx_id, _, _ in pairs]
+    for offset in range(0, len(flagged_ids), CANDIDATE_CHUNK_SIZE):
+        rows = db.execute(
+            select(ImportReviewItem.transaction_id, ImportReviewItem.duplicate_of_id).where(
+                ImportReviewItem.user_id == user_id,
+                ImportReviewItem.transaction_id.in_(flagged_ids[offset : offset + CANDIDATE_CHUNK_SIZE]),
+            )
+        )
+        seen.update((tx_id, other_id) for tx_id, other_id in rows)
+    fresh = [pair for pair in pairs if (pair[0], pair[1]) not in seen]
+    db.add_all(
+        ImportReviewItem(
+            import_id=import_id,
+            user_id=user_id,
+            row_number=0,
+            raw_data=json.dumps({"transaction_id": tx_id, "duplicate_of_id": other_id, "score": score}),
+            error="near_duplicate",
+            status="near_duplicate",
+            transaction_id=tx_id,
+            duplicate_of_id=other_id,
+        )
+        for tx_id, other_id, score in fresh
+    )
+    return fresh
+
+
+def detect_near_duplicates(
+    db: Session,
+    user_id: int,
+    import_id: int,
+    transaction_ids: list[int] | None = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    min_score: float = DEFAULT_MIN_SCORE,
+) -> list[NearDuplicatePair]:
+    if transaction_ids is not None and not transaction_ids:
+        return []
+    rows = load_candidate_rows(db, user_id, transaction_ids, window_days)
+    focus_ids = set(transaction_ids) if transaction_ids is not None else None
+    pairs = find_near_duplicates(rows, window_days, min_score, focus_ids)
+    return flag_near_duplicates(db, user_id, import_id, pairs)
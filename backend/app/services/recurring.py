@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..cache import bump_data_version
+from ..database import use_primary
+from ..models import InstallmentGroup, Transaction, User, with_derived_columns
+from ..utils import add_days, add_months, build_dedupe_hash
+from .dedupe import existing_dedupe_hashes
+from .ledger import ledger_rows, record_ledger_changes
+from .suggestions import DescriptionRow, record_description_changes
+
+RECURRING = "recurring"
+
+# (date, amount_cents, category_id, account_id) of an occurrence that is not stored.
+OccurrenceRow = tuple[str, int, int | None, int | None]
+
+
+def occurrence_dates(group: InstallmentGroup, after: str | None, before: str) -> list[str]:
+    # Each date is derived from the start so month-end clamping does not drift (31st -> 28th -> 28th ...).
+    dates: list[str] = []
+    index = 0
+    while not group.installments or index < group.installments:
+        tx_date = add_months(group.start_date, index * (group.interval_months or 1))
+        if tx_date >= before or (group.end_date and tx_date > group.end_date):
+            break
+        if after is None or tx_date > after:
+            dates.append(tx_date)
+        index += 1
+    return dates
+
+
+# Writes the missing occurrences of the user's recurring series dated in [start, before).
+def materialize_recurring(db: Session, user_id: int, start: str | None, before: str) -> list[DescriptionRow]:
+    groups = (
+        db.query(InstallmentGroup)
+        .filter(
+            InstallmentGroup.user_id == user_id,
+            InstallmentGroup.kind == RECURRING,
+            InstallmentGroup.start_date < before,
+            or_(InstallmentGroup.materialized_through.is_(None), InstallmentGroup.materialized_through < add_days(before, -1)),
+        )
+        .all()
+    )
+    added: list[DescriptionRow] = []
+    for group in groups:
+        after = group.materialized_through
+        window_after = add_days(start, -1) if start is not None and start > group.start_date else None
+        # A window starting past the watermark leaves a gap behind it, so the watermark cannot move.
+        if window_after is None or (after is not None and window_after <= after):
+            group.materialized_through = add_days(before, -1)
+        else:
+            after = window_after
+        dates = occurrence_dates(group, after, before)
+        if not dates:
+            continue
+
+        account_scope = str(group.account_id or "none")
+        candidates = {
+            build_dedupe_hash(tx_date, group.base_description, group.amount_cents or 0, account_scope): tx_date
+            for tx_date in dates
+        }
+        existing = existing_dedupe_hashes(db, user_id, group.account_id, list(candidates))
+        rows = [
+            with_derived_columns(
+                {
+                    "user_id": user_id,
+                    "date": tx_date,
+                    "description": group.base_description,
+                    "amount_cents": group.amount_cents or 0,
+                    "category_id": group.category_id,
+                    "account_id": group.account_id,
+                    "source": RECURRING,
+                    "dedupe_hash": dedupe_hash,
+                    "installment_group_id": group.id,
+                }
+            )
+            for dedupe_hash, tx_date in candidates.items()
+            if dedupe_hash not in existing
+        ]
+        if rows:
+            db.execute(insert(Transaction), rows)
+            record_ledger_changes(db, user_id, added=ledger_rows(rows))
+            added.extend((row["description"], row["category_id"], row["date"]) for row in rows)
+    return added
+
+
+# Occurrences after today are never stored, so long and open-ended series cost nothing up front; reports
+# that cover future months add them through projected_occurrences instead.
+def projected_occurrences(db: Session, user_id: int, start: str, before: str) -> list[OccurrenceRow]:
+    after = max(add_days(start, -1), date.today().isoformat())
+    groups = db.query(InstallmentGroup).filter(
+        InstallmentGroup.user_id == user_id,
+        InstallmentGroup.kind == RECURRING,
+        InstallmentGroup.start_date < before,
+        or_(InstallmentGroup.end_date.is_(None), InstallmentGroup.end_date > after),
+    )
+    return [
+        (tx_date, group.amount_cents or 0, group.category_id, group.account_id)
+        for group in groups
+        for tx_date in occurrence_dates(group, max(after, group.materialized_through or ""), before)
+    ]
+
+
+# Writes and commits every occurrence dated up to today; only write paths and
+# POST /installments/recurring/materialize call this, never a read handler.
+def sync_recurring_series(db: Session, user: User) -> int:
+    use_primary(db)
+    try:
+        added = materialize_recurring(db, user.id, None, add_days(date.today().isoformat(), 1))
+    except IntegrityError:
+        # A concurrent request materialized the same occurrences first.
+        db.rollback()
+        return 0
+    if not added:
+        if db.dirty:
+            db.commit()
+        return 0
+    version = bump_data_version(db, user.id)
+    db.commit()
+    record_description_changes(user.id, version, added=added)
+    return len(added)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+from sqlalchemy import DateTime, delete, select
+from sqlalchemy.orm import Session
+
+from ..cache import dump_json
+from ..database import insert_returning_ids
+from ..models import (
+    Account,
+    AccountBalanceCheckpoint,
+    BudgetEvent,
+    Category,
+    CategoryBudget,
+    CategoryMonthTotal,
+    CategoryRule,
+    ImportJob,
+    ImportReviewItem,
+    InstallmentGroup,
+    Transaction,
+    utc_now,
+    with_derived_columns,
+)
+from .balances import rebuild_balance_checkpoints
+from .budgets import rebuild_category_month_totals, reevaluate_budget
+from .sync import log_transaction_deletions
+
+SNAPSHOT_FORMAT = "cashlab.snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BATCH_SIZE = 1000
+
+# Parents come before the tables that reference them; each entry maps a foreign key column to its table.
+SNAPSHOT_TABLES = [
+    (Account, {}),
+    (Category, {}),
+    (ImportJob, {}),
+    (InstallmentGroup, {"category_id": "categories", "account_id": "accounts"}),
+    (
+        Transaction,
+        {
+            "category_id": "categories",
+            "account_id": "accounts",
+            "import_id": "imports",
+            "installment_group_id": "installment_groups",
+        },
+    ),
+    (
+        ImportReviewItem,
+        {
+            "import_id": "imports",
+            "resolved_category_id": "categories",
+            "resolved_account_id": "accounts",
+            "transaction_id": "transactions",
+            "duplicate_of_id": "transactions",
+        },
+    ),
+    (CategoryRule, {"category_id": "categories", "account_id": "accounts"}),
+    (CategoryBudget, {"category_id": "categories"}),
+]
+MODELS = {model.__tablename__: (model, references) for model, references in SNAPSHOT_TABLES}
+DATETIME_COLUMNS = {
+    model.__tablename__: [column.name for column in model.__table__.columns if isinstance(column.type, DateTime)]
+    for model, _ in SNAPSHOT_TABLES
+}
+SKIPPED_COLUMNS = {"user_id"}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def snapshot_fields(model: type) -> list[str]:
+    return [column.name for column in model.__table__.columns if column.name not in SKIPPED_COLUMNS]
+
+
+# Newline-delimited JSON: a header, then per table a field list followed by column-major row groups.
+def snapshot_chunks(db: Session, user_id: int) -> Iterator[bytes]:
+    yield dump_json({"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "exported_at": utc_now()}) + b"\n"
+    for model, _ in SNAPSHOT_TABLES:
+        fields = snapshot_fields(model)
+        yield dump_json({"table": model.__tablename__, "fields": fields}) + b"\n"
+        stmt = (
+            select(*(model.__table__.c[name] for name in fields))
+            .where(model.user_id == user_id)
+            .order_by(model.id)
+            .execution_options(yield_per=SNAPSHOT_BATCH_SIZE)
+        )
+        for batch in db.execute(stmt).partitions():
+            columns = dict(zip(fields, map(list, zip(*batch))))
+            yield dump_json({"rows": len(batch), "columns": columns}) + b"\n"
+
+
+def clear_user_data(db: Session, user_id: int) -> None:
+    transaction_ids = list(db.scalars(select(Transaction.id).where(Transaction.user_id == user_id)))
+    log_transaction_deletions(db, user_id, transaction_ids)
+    derived = [BudgetEvent, CategoryMonthTotal, AccountBalanceCheckpoint]
+    for model in derived + [model for model, _ in reversed(SNAPSHOT_TABLES)]:
+        db.execute(delete(model).where(model.user_id == user_id).execution_options(synchronize_session=False))
+
+
+def has_user_data(db: Session, user_id: int) -> bool:
+    return any(
+        db.scalar(select(model.id).where(model.user_id == user_id).limit(1)) is not None
+        for model in (Account, Category, Transaction)
+    )
+
+
+def row_values(model: type, fields: list[str], values: tuple, references: dict, new_ids: dict, user_id: int) -> dict:
+    row = dict(zip(fields, values))
+    row.pop("id", None)
+    row["user_id"] = user_id
+    for name, table_name in references.items():
+        old_id = row.get(name)
+        if old_id is None:
+            continue
+        try:
+            row[name] = new_ids[table_name][old_id]
+        except KeyError as exc:
+            raise SnapshotError(f"{model.__tablename__}.{name} references a missing row") from exc
+    for name in DATETIME_COLUMNS[model.__tablename__]:
+        if isinstance(row.get(name), str):
+            row[name] = datetime.fromisoformat(row[name])
+    if model is Transaction:
+        # Restored rows must reach sync clients as changes; the restoring commit stamps a fresh change_seq.
+        row["updated_at"] = utc_now()
+        row["change_seq"] = None
+        if row.get("year_month") is None or row.get("search_text") is None:
+            row = with_derived_columns(row)
+    return row
+
+
+# Inserts each row group through the bulk path and remaps every foreign key to the ids the database assigns.
+def restore_snapshot(db: Session, user_id: int, lines: Iterable[bytes | str]) -> dict[str, int]:
+    lines = iter(lines)
+    try:
+        header = json.loads(next(lines))
+    except (StopIteration, ValueError) as exc:
+        raise SnapshotError("Empty or unreadable snapshot") from exc
+    if header.get("format") != SNAPSHOT_FORMAT or header.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError("Unsupported snapshot version")
+
+    new_ids: dict[str, dict[int, int]] = {}
+    counts: dict[str, int] = {}
+    model = fields = references = None
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise SnapshotError("Unreadable snapshot line") from exc
+        if "table" in record:
+            if record["table"] not in MODELS:
+                raise SnapshotError(f"Unknown table {record['table']}")
+            model, references = MODELS[record["table"]]
+            fields = record["fields"]
+            if "id" not in fields or not set(fields) <= set(snapshot_fields(model)):
+                raise SnapshotError(f"Unexpected fields for {record['table']}")
+            if any(table_name not in new_ids for table_name in references.values()):
+                raise SnapshotError(f"{record['table']} appears before the tables it references")
+            new_ids[model.__tablename__] = {}
+            counts[model.__tablename__] = 0
+            continue
+        if model is None:
+            raise SnapshotError("Row group outside of a table")
+        try:
+            columns = record["columns"]
+            rows = list(zip(*(columns[name] for name in fields)))
+        except (KeyError, TypeError) as exc:
+            raise SnapshotError(f"Malformed row group for {model.__tablename__}") from exc
+        if not rows:
+            continue
+        payload = [row_values(model, fields, values, references, new_ids, user_id) for values in rows]
+        inserted = insert_returning_ids(db, model.__table__, payload)
+        old_ids = columns["id"]
+        new_ids[model.__tablename__].update(zip(old_ids, inserted))
+        counts[model.__tablename__] += len(inserted)
+
+    account_ids = list(new_ids.get("accounts", {}).values())
+    if account_ids:
+        rebuild_balance_checkpoints(db, account_ids)
+    category_ids = list(new_ids.get("categories", {}).values())
+    if category_ids:
+        rebuild_category_month_totals(db, category_ids)
+    for budget in db.scalars(select(CategoryBudget).where(CategoryBudget.user_id == user_id)).all():
+        reevaluate_budget(db, budget)
+    return counts
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..cache import LRUCache
+from ..models import Transaction, User
+from ..utils import canonical_description, fold_text
+
+SUGGESTION_INDEX_USERS = int(os.getenv("SUGGESTION_INDEX_USERS", "256"))
+MAX_PREFIX_MATCHES = 5000
+
+# (description, category_id, date) of a transaction as seen by the index.
+DescriptionRow = tuple[str, int | None, str]
+
+
+class DescriptionIndex:
+    def __init__(self, version: int) -> None:
+        self.version = version
+        self.keys: list[str] = []
+        self.entries: dict[str, dict] = {}
+        self.lock = threading.Lock()
+
+    def add(self, description: str, category_id: int | None, tx_date: str) -> None:
+        canonical = canonical_description(description)
+        key = fold_text(canonical)
+        if not key:
+            return
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = {"description": canonical, "count": 1, "category_id": category_id, "last_date": tx_date}
+            insort(self.keys, key)
+            return
+        entry["count"] += 1
+        if tx_date >= entry["last_date"]:
+            entry.update(description=canonical, category_id=category_id, last_date=tx_date)
+
+    def remove(self, description: str) -> None:
+        key = fold_text(canonical_description(description))
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry["count"] -= 1
+        if entry["count"] <= 0:
+            del self.entries[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def lookup(self, prefix: str, limit: int) -> list[dict]:
+        folded = fold_text(prefix)
+        if not folded:
+            return []
+        matches: list[dict] = []
+        with self.lock:
+            start = bisect_left(self.keys, folded)
+            for key in self.keys[start : start + MAX_PREFIX_MATCHES]:
+                if not key.startswith(folded):
+                    break
+                matches.append(dict(self.entries[key]))
+        matches.sort(key=lambda entry: entry["last_date"], reverse=True)
+        matches.sort(key=lambda entry: entry["count"], reverse=True)
+        return [
+            {"description": entry["description"], "count": entry["count"], "category_id": entry["category_id"]}
+            for entry in matches[:limit]
+        ]
+
+
+suggestion_indexes = LRUCache(SUGGESTION_INDEX_USERS)
+
+
+def build_description_index(db: Session, user_id: int, version: int) -> DescriptionIndex:
+    index = DescriptionIndex(version)
+    rows = db.execute(
+        select(Transaction.description, Transaction.category_id, Transaction.date)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.date.asc(), Transaction.id.asc())
+    )
+    for description, category_id, tx_date in rows:
+        index.add(description, category_id, tx_date)
+    return index
+
+
+def get_description_index(db: Session, user: User) -> DescriptionIndex:
+    version = user.data_version or 0
+    index = suggestion_indexes.get(user.id)
+    if index is None or index.version != version:
+        index = build_description_index(db, user.id, version)
+        suggestion_indexes.set(user.id, index)
+    return index
+
+
+def invalidate_description_index(user_id: int) -> None:
+    suggestion_indexes.pop(user_id)
+
+
+def record_description_changes(
+    user_id: int,
+    version: int,
+    added: Iterable[DescriptionRow] = (),
+    removed: Iterable[str] = (),
+) -> None:
+    index = suggestion_indexes.get(user_id)
+    if index is None:
+        return
+    with index.lock:
+        # A gap in versions means some write was not applied here; rebuild lazily instead.
+        if index.version != version - 1:
+            index.version = -1
+            return
+        for description in removed:
+            index.remove(description)
+        for description, category_id, tx_date in added:
+            index.add(description, category_id, tx_date)
+        index.version = version
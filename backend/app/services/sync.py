@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from ..models import Transaction, TransactionDeletion, utc_now
+
+
+def log_transaction_deletions(db: Session, user_id: int, transaction_ids: Iterable[int]) -> None:
+    deleted_at = utc_now()
+    rows = [{"user_id": user_id, "transaction_id": tx_id, "deleted_at": deleted_at} for tx_id in transaction_ids]
+    if rows:
+        db.execute(insert(TransactionDeletion), rows)
+
+
+# bump_data_version holds the user's row lock until commit, so versions reach readers in commit order.
+# Stamping every row and tombstone the commit wrote with that version gives /transactions/changes a cursor
+# no late commit can slip behind, unlike an application-clock updated_at or an id handed out at insert time.
+@event.listens_for(Session, "before_commit")
+def stamp_change_seq(session: Session) -> None:
+    pending = session.info.pop("change_seq", None)
+    if pending is None:
+        return
+    user_id, version = pending
+    session.flush()
+    for model in (Transaction, TransactionDeletion):
+        session.execute(
+            update(model)
+            .where(model.user_id == user_id, model.change_seq.is_(None))
+            .values(change_seq=version)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_change_seq(session: Session) -> None:
+    session.info.pop("change_seq", None)
@@ -5,7 +5,7 @@ import hashlib
 import io
 import re
 import unicodedata
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
 import msoffcrypto
 import openpyxl
@@ -32,6 +32,12 @@ def normalize_description(value: str) -> str:
     return " ".join(str(value).strip().split())
 
 
+def fold_text(value: str | None) -> str:
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
 def parse_amount_to_cents(value: str | float | int) -> int:
     if isinstance(value, int):
         return value
@@ -91,6 +97,46 @@ def add_months(iso_date: str, months: int) -> str:
     return date(year, month, day).isoformat()
 
 
+def add_days(iso_date: str, days: int) -> str:
+    return (date.fromisoformat(iso_date) + timedelta(days=days)).isoformat()
+
+
+def month_key(iso_date: str | None) -> int | None:
+    if not iso_date:
+        return None
+    try:
+        d = date.fromisoformat(str(iso_date)[:10])
+    except ValueError:
+        try:
+            d = datetime.strptime(normalize_date(iso_date), "%Y-%m-%d").date()
+        except ValueError:
+            return None
+    return d.year * 100 + d.month
+
+
+def parse_year_month(value: str) -> tuple[int, int]:
+    d = datetime.strptime(str(value).strip(), "%Y-%m").date()
+    return d.year, d.month
+
+
+def month_range(start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int]]:
+    months: list[tuple[int, int]] = []
+    year, month = start
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def month_start(year: int, month: int) -> str:
+    return date(year, month, 1).isoformat()
+
+
+def month_bounds(year: int, month: int) -> tuple[str, str]:
+    start = month_start(year, month)
+    return start, add_months(start, 1)
+
+
 def build_dedupe_hash(tx_date: str, description: str, amount_cents: int, account_scope: str) -> str:
     key = f"{tx_date}|{normalize_description(description).lower()}|{amount_cents}|{account_scope}"
     return hashlib.sha256(key.encode("utf-8")).hexdigest()
@@ -211,3 +257,10 @@ def extract_installment_info(description: str) -> dict | None:
             "total": total,
         }
     return None
+
+
+def canonical_description(description: str) -> str:
+    installment = extract_installment_info(description)
+    if installment:
+        return str(installment["base_description"])
+    return normalize_description(description)
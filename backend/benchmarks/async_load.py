@@ -0,0 +1,152 @@
+"""Load-test the threadpool and async session paths under simulated database latency.
+
+Every statement sleeps LATENCY_MS inside the driver, standing in for a round trip to Neon.
+The same transactions page is served by a plain `def` handler (threadpool + Session), an
+`async def` handler (AsyncSession.run_sync) and an `async def` handler on the ThreadedSession
+that SQLite deployments use, each hit with CONCURRENCY requests at once.
+
+Run from backend/: python -m benchmarks.async_load [requests] [concurrency] [latency_ms]
+"""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import aiosqlite
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.cache import dump_json
+from app.database import Base, ThreadedSession
+from app.routers.transactions import transactions_page
+
+from .list_transactions import seed
+
+LATENCY_MS = 5.0
+POOL_SIZE = 200
+
+
+class SlowCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):  # noqa: ANN002, ANN003, ANN201
+        time.sleep(LATENCY_MS / 1000)
+        return super().execute(*args, **kwargs)
+
+
+class SlowConnection(sqlite3.Connection):
+    def cursor(self, factory=SlowCursor):  # noqa: ANN001, ANN201
+        return super().cursor(factory)
+
+
+def build_app(path: Path, user_id: int) -> tuple[FastAPI, Callable[[], Awaitable[None]]]:
+    engine = create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(path, factory=SlowConnection, check_same_thread=False),
+        poolclass=QueuePool,
+        pool_size=POOL_SIZE,
+    )
+    async_engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        async_creator=lambda: aiosqlite.connect(path, factory=SlowConnection),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+    )
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def get_db():  # noqa: ANN202
+        with session_factory() as db:
+            yield db
+
+    async def get_async_db():  # noqa: ANN202
+        async with async_session_factory() as db:
+            yield db
+
+    def page(db: Session) -> bytes:
+        return dump_json(transactions_page(db, user_id, {}, "date", "desc", 50, None, False))
+
+    app = FastAPI()
+
+    @app.get("/threadpool")
+    def threadpool_page(db: Session = Depends(get_db)) -> int:
+        return len(page(db))
+
+    @app.get("/async")
+    async def async_page(db: AsyncSession = Depends(get_async_db)) -> int:
+        return len(await db.run_sync(page))
+
+    # What get_async_db hands async handlers on SQLite.
+    @app.get("/threaded")
+    async def threaded_page(db: Session = Depends(get_db)) -> int:
+        return len(await ThreadedSession(db).run_sync(page))
+
+    async def dispose() -> None:
+        engine.dispose()
+        await async_engine.dispose()
+
+    return app, dispose
+
+
+async def hammer(app: FastAPI, path: str, requests: int, concurrency: int) -> tuple[float, list[float]]:
+    limit = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(client: httpx.AsyncClient) -> None:
+        async with limit:
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await one(client)
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client) for _ in range(requests)))
+        return time.perf_counter() - started, sorted(latencies)
+
+
+def main() -> None:
+    global LATENCY_MS
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    LATENCY_MS = float(sys.argv[3]) if len(sys.argv) > 3 else LATENCY_MS
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as session:
+            user_id = seed(session, 5_000)
+        engine.dispose()
+
+        print(f"{requests} requests, concurrency {concurrency}, {LATENCY_MS:g} ms per statement")
+        asyncio.run(run_all(path, user_id, requests, concurrency))
+
+
+async def run_all(path: Path, user_id: int, requests: int, concurrency: int) -> None:
+    app, dispose = build_app(path, user_id)
+    try:
+        for label, route in [
+            ("threadpool Session", "/threadpool"),
+            ("AsyncSession", "/async"),
+            ("ThreadedSession", "/threaded"),
+        ]:
+            elapsed, latencies = await hammer(app, route, requests, concurrency)
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+            print(f"{label:<20} {requests / elapsed:8.1f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+    finally:
+        await dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare the ORM and projection read paths of GET /transactions on a 50k-row user.
+
+Run from backend/: python -m benchmarks.list_transactions [rows]
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.cache import dump_json
+from app.database import Base
+from app.models import Category, Transaction, User
+from app.routers.transactions import serialize_transaction, transactions_listing
+from app.utils import add_months, build_dedupe_hash, fold_text, month_key
+
+
+def seed(session: Session, rows: int) -> int:
+    user = User(email="bench@example.com", password_hash="x")
+    session.add(user)
+    session.flush()
+    categories = [Category(user_id=user.id, name=f"Categoria {i}") for i in range(40)]
+    session.add_all(categories)
+    session.flush()
+    payload = []
+    for i in range(rows):
+        tx_date = add_months("2020-01-15", i % 72)
+        description = f"Compra {i % 3000} loja {i % 97}"
+        payload.append(
+            {
+                "user_id": user.id,
+                "date": tx_date,
+                "year_month": month_key(tx_date),
+                "description": description,
+                "search_text": fold_text(description),
+                "amount_cents": 100 + i % 50000,
+                "category_id": categories[i % len(categories)].id if i % 5 else None,
+                "source": "csv",
+                "dedupe_hash": build_dedupe_hash(tx_date, f"{description} {i}", i, "none"),
+            }
+        )
+    session.execute(insert(Transaction), payload)
+    session.commit()
+    return user.id
+
+
+def orm_listing(session: Session, user_id: int) -> list[dict]:
+    txs = (
+        session.query(Transaction)
+        .filter(Transaction.user_id == user_id)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .all()
+    )
+    category_ids = [tx.category_id for tx in txs if tx.category_id is not None]
+    names = dict(session.query(Category.id, Category.name).filter(Category.id.in_(category_ids)).all())
+    return [{**serialize_transaction(tx), "category_name": names.get(tx.category_id)} for tx in txs]
+
+
+def measure(label: str, fn: Callable[[], bytes]) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    body = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms  peak {peak / 1_048_576:7.1f} MiB  body {len(body) / 1_048_576:5.1f} MiB")
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as session:
+            user_id = seed(session, rows)
+
+        filters: dict = {}
+        for label, fn in [
+            ("orm + stdlib json", lambda s: json.dumps(orm_listing(s, user_id)).encode("utf-8")),
+            ("projection + stdlib json", lambda s: json.dumps(transactions_listing(s, user_id, filters, "date", "desc")).encode("utf-8")),
+            ("projection + dump_json", lambda s: dump_json(transactions_listing(s, user_id, filters, "date", "desc"))),
+        ]:
+            with Session(engine) as session:
+                measure(label, lambda: fn(session))
+
+
+if __name__ == "__main__":
+    main()
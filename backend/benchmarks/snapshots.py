@@ -0,0 +1,52 @@
+"""Time a snapshot export and restore of a 100k-transaction user.
+
+Run from backend/: python -m benchmarks.snapshots [rows]
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Transaction, User
+from app.services.export import gzip_chunks
+from app.services.snapshots import restore_snapshot, snapshot_chunks
+
+from .list_transactions import seed
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as session:
+            user_id = seed(session, rows)
+
+        started = time.perf_counter()
+        with Session(engine) as session:
+            snapshot = b"".join(gzip_chunks(snapshot_chunks(session, user_id)))
+        exported = time.perf_counter() - started
+        print(f"export   {exported * 1000:8.1f} ms  {len(snapshot) / 1_048_576:5.1f} MiB gzipped")
+
+        started = time.perf_counter()
+        with Session(engine) as session:
+            target = User(email="restore@example.com", password_hash="x")
+            session.add(target)
+            session.flush()
+            restore_snapshot(session, target.id, gzip.GzipFile(fileobj=io.BytesIO(snapshot), mode="rb"))
+            session.commit()
+            restored = session.scalar(select(func.count()).where(Transaction.user_id == target.id))
+        elapsed = time.perf_counter() - started
+        print(f"restore  {elapsed * 1000:8.1f} ms  {restored} transactions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Measure transaction-list reads while a large CSV import is writing, default SQLite engine vs tuned.
+
+The import runs through the real import path in one transaction; reader threads page through
+GET /transactions until it commits. The default engine uses rollback journaling, so readers stall
+once the import takes its exclusive lock; the tuned engine (WAL + pragmas) keeps serving them.
+Readers share the GIL with the import, so the more reads get through, the longer it takes; each
+engine also times the same import with no readers.
+
+Run from backend/: python -m benchmarks.sqlite_concurrency [import_rows] [readers]
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.database import Base, build_engine
+from app.models import User
+from app.routers.imports import categorize_rows, import_parsed_rows
+from app.routers.transactions import transactions_page
+from app.services.categories import get_category_directory
+from app.services.category_rules import get_rule_matcher
+from app.utils import parse_csv
+
+from .list_transactions import seed
+
+
+def import_csv(rows: int, batch: str) -> bytes:
+    lines = ["Data,Descricao,Valor"]
+    for i in range(rows):
+        lines.append(
+            f"2026-{1 + i % 12:02d}-{1 + i % 28:02d},Importado {batch} {i} loja {i % 311},-{1 + i % 900}.{i % 100:02d}"
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def run(engine: Engine, user_id: int, content: bytes, readers: int) -> None:
+    done = threading.Event()
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def reader() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    transactions_page(session, user_id, {}, "date", "desc", 50, None, False)
+            except OperationalError as exc:
+                with lock:
+                    errors.append(str(exc.orig))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        names = get_category_directory(session, user).names()
+        prepared = categorize_rows(parse_csv(content), None, None, get_rule_matcher(session, user), names)
+        result = import_parsed_rows(session, user, "bench.csv", "csv", prepared, None, None)
+    import_seconds = time.perf_counter() - started
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    print(f"  import     {import_seconds * 1000:8.1f} ms  {result['inserted']} rows, {readers} readers")
+    if not readers:
+        return
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1000
+        print(
+            f"  reads      {len(latencies):8d}     {len(latencies) / import_seconds:6.1f}/s  "
+            f"p50 {p50:7.1f} ms  max {latencies[-1] * 1000:7.1f} ms"
+        )
+    else:
+        print("  reads             0")
+    print(f"  failed     {len(errors):8d}" + (f"     {errors[0]}" if errors else ""))
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    for label, make_engine in [
+        ("default", lambda url: create_engine(url, connect_args={"check_same_thread": False})),
+        ("tuned (WAL)", lambda url: build_engine(url, "long-running")),
+    ]:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+            engine = make_engine(url)
+            Base.metadata.create_all(bind=engine)
+            with Session(engine) as session:
+                user_id = seed(session, 20_000)
+            print(f"{label}: importing {rows} rows")
+            run(engine, user_id, import_csv(rows, "solo"), 0)
+            run(engine, user_id, import_csv(rows, "shared"), readers)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,18 +6,26 @@ from pathlib import Path
 import pytest
 from fastapi.testclient import TestClient
 
+from app.cache import response_cache
 from app.database import Base, engine, init_database
 from app.main import create_app
+from app.services.categories import category_directories
+from app.services.category_rules import rule_matchers
+from app.services.suggestions import suggestion_indexes
 
 
 @pytest.fixture()
 def client(tmp_path: Path) -> TestClient:
     db_path = tmp_path / "test.db"
-    init_database(f"sqlite:///{db_path}")
+    init_database(f"sqlite:///{db_path}", "test")
     from app.database import engine as current_engine
 
     Base.metadata.drop_all(bind=current_engine)
     Base.metadata.create_all(bind=current_engine)
+    response_cache.clear()
+    suggestion_indexes.clear()
+    rule_matchers.clear()
+    category_directories.clear()
     app = create_app()
     return TestClient(app)
 
@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+
+def test_account_balance_follows_backdated_writes(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    account_id = client.post("/accounts", json={"name": "Checking"}, headers=headers).json()["id"]
+    other_id = client.post("/accounts", json={"name": "Savings"}, headers=headers).json()["id"]
+
+    def add(tx_date: str, amount: int, account: int = account_id) -> int:
+        payload = {"date": tx_date, "description": f"Expense {tx_date} {amount}", "amount_cents": amount, "account_id": account}
+        return client.post("/transactions", json=payload, headers=headers).json()["id"]
+
+    def balance(at: str) -> int:
+        return client.get(f"/accounts/{account_id}/balance?at={at}", headers=headers).json()["balance_cents"]
+
+    add("2026-01-10", 1000)
+    add("2026-03-05", 3000)
+    add("2026-03-20", 500)
+    add("2026-02-01", 700, other_id)
+    assert balance("2026-03-10") == -4000
+    assert balance("2026-03-31") == -4500
+
+    # A write dated two months back shifts every later balance.
+    backdated = add("2026-01-15", 200)
+    assert balance("2026-01-14") == -1000
+    assert balance("2026-03-31") == -4700
+
+    tx = {"date": "2026-02-15", "description": "Moved", "amount_cents": 250, "account_id": account_id}
+    assert client.patch(f"/transactions/{backdated}", json=tx, headers=headers).status_code == 200
+    assert balance("2026-01-31") == -1000
+    assert balance("2026-02-28") == -1250
+    assert client.delete(f"/transactions/{backdated}", headers=headers).status_code == 200
+    assert balance("2026-12-31") == -4500
+
+    overview = client.get("/accounts/balances?at=2026-02-28", headers=headers).json()
+    assert [(row["name"], row["balance_cents"]) for row in overview] == [("Checking", -1000), ("Savings", -700)]
+    assert client.get("/accounts/balances?at=2026-02-30", headers=headers).status_code == 400
+    assert client.get("/accounts/999/balance", headers=headers).status_code == 404
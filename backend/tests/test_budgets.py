@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+
+
+def test_budget_thresholds_follow_writes(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    food = client.post("/categories", json={"name": "Food"}, headers=headers).json()["id"]
+    other = client.post("/categories", json={"name": "Other"}, headers=headers).json()["id"]
+    assert client.put(f"/budgets/{food}", json={"amount_cents": 10000}, headers=headers).status_code == 200
+
+    def add(description: str, amount: int, category_id: int = food) -> int:
+        payload = {"date": "2026-05-10", "description": description, "amount_cents": amount, "category_id": category_id}
+        return client.post("/transactions", json=payload, headers=headers).json()["id"]
+
+    def status() -> tuple[int, str]:
+        budget = client.get("/budgets?year=2026&month=5", headers=headers).json()[0]
+        return budget["spent_cents"], budget["status"]
+
+    add("Market", 5000)
+    assert status() == (5000, "ok")
+    add("Lunch", 3500)
+    assert status() == (8500, "warning")
+    dinner = add("Dinner", 2000)
+    assert status() == (10500, "exceeded")
+    events = client.get("/budgets/events", headers=headers).json()
+    assert [(event["kind"], event["spent_cents"]) for event in events] == [("exceeded", 10500), ("warning", 8500)]
+
+    dashboard = client.get("/reports/dashboard?year=2026&month=5", headers=headers).json()
+    assert dashboard["budgets"][0]["status"] == "exceeded"
+
+    assert client.delete(f"/transactions/{dinner}", headers=headers).status_code == 200
+    assert status() == (8500, "warning")
+    moved = client.post(
+        "/transactions/recategorize", json={"description_contains": "lunch", "category_id": other}, headers=headers
+    )
+    assert moved.json()["updated"] == 1
+    assert status() == (5000, "ok")
+    assert client.get("/budgets/events", headers=headers).json() == []
+
+    assert client.put(f"/budgets/{food}", json={"amount_cents": 4000}, headers=headers).status_code == 200
+    assert status() == (5000, "exceeded")
+    assert client.get("/budgets?year=2026&month=5", headers=headers).json()[0]["remaining_cents"] == -1000
+    assert client.put("/budgets/999", json={"amount_cents": 100}, headers=headers).status_code == 404
+    assert client.delete(f"/budgets/{food}", headers=headers).json() == {"deleted": True}
+    assert client.get("/budgets?year=2026&month=5", headers=headers).json() == []
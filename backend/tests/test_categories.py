@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import database
+from app.services.categories import category_directories
+
+
+def test_categories_are_per_user_and_normalized(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    first = client.post("/categories", json={"name": "Alimentação"}, headers=headers)
+    again = client.post("/categories", json={"name": "  alimentacao "}, headers=headers)
+    assert again.json() == first.json()
+
+    client.post("/auth/register", json={"email": "b@b.com", "password": "secret123"})
+    other_token = client.post("/auth/login", json={"email": "b@b.com", "password": "secret123"}).json()["access_token"]
+    other_headers = {"Authorization": f"Bearer {other_token}"}
+    client.post("/categories", json={"name": "Lazer"}, headers=other_headers)
+
+    assert client.get("/categories", headers=headers).json() == [first.json()]
+    assert [c["name"] for c in client.get("/categories", headers=other_headers).json()] == ["Lazer"]
+
+
+def test_category_directory_survives_transaction_writes(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    lazer = client.post("/categories", json={"name": "Lazer"}, headers=headers).json()
+    client.get("/categories", headers=headers)
+    with database.SessionLocal() as session:
+        user_id = session.execute(text("SELECT id FROM users")).scalar_one()
+    directory = category_directories.get(user_id)
+
+    payload = {"date": "2026-03-01", "description": "Cinema", "amount_cents": 3000, "category_id": lazer["id"]}
+    client.post("/transactions", json=payload, headers=headers)
+    assert client.get("/categories", headers=headers).json() == [lazer]
+    assert category_directories.get(user_id) is directory
+
+    mercado = client.post("/categories", json={"name": "Mercado"}, headers=headers).json()
+    assert client.get("/categories", headers=headers).json() == [lazer, mercado]
+
+
+def test_merge_categories_repoints_transactions_rules_and_review_items(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    target_id = client.post("/categories", json={"name": "Mercado"}, headers=headers).json()["id"]
+    other_id = client.post("/categories", json={"name": "Supermercado"}, headers=headers).json()["id"]
+    with database.engine.begin() as conn:
+        # Legacy duplicate written before normalized names existed.
+        legacy_id = conn.execute(
+            text("INSERT INTO categories (user_id, name) SELECT user_id, 'MERCADO' FROM categories WHERE id = :id RETURNING id"),
+            {"id": target_id},
+        ).scalar_one()
+    for category_id, tx_date in [(legacy_id, "2026-01-01"), (other_id, "2026-01-02"), (target_id, "2026-01-03")]:
+        client.post(
+            "/transactions",
+            json={"date": tx_date, "description": f"Compra {tx_date}", "amount_cents": 100, "category_id": category_id},
+            headers=headers,
+        )
+    client.post("/rules", json={"category_id": legacy_id, "pattern": "feira"}, headers=headers)
+
+    merged = client.post("/categories/merge", json={"target_id": target_id}, headers=headers)
+    assert merged.json() == {"target_id": target_id, "merged": 1, "transactions": 1, "review_items": 0, "rules": 1}
+    assert client.get("/rules", headers=headers).json()[0]["category_id"] == target_id
+
+    merged = client.post("/categories/merge", json={"target_id": target_id, "source_ids": [other_id]}, headers=headers)
+    assert merged.json()["transactions"] == 1
+    assert {tx["category_id"] for tx in client.get("/transactions", headers=headers).json()["items"]} == {target_id}
+    assert client.get("/categories", headers=headers).json() == [{"id": target_id, "name": "Mercado"}]
+    assert client.post("/categories/merge", json={"target_id": 999}, headers=headers).status_code == 404
@@ -85,7 +85,7 @@ def test_pending_review_list_and_confirm(client: TestClient, user_token: str) ->
 
     txs = client.get("/transactions?query=Item sem data", headers=headers)
     assert txs.status_code == 200
-    assert len(txs.json()) == 1
+    assert len(txs.json()["items"]) == 1
 
 
 def test_csv_import_with_alternative_headers(client: TestClient, user_token: str) -> None:
@@ -112,7 +112,7 @@ def test_csv_import_with_alternative_headers(client: TestClient, user_token: str
 
     txs = client.get("/transactions", headers=headers)
     assert txs.status_code == 200
-    values = sorted([tx["amount_cents"] for tx in txs.json()])
+    values = sorted([tx["amount_cents"] for tx in txs.json()["items"]])
     assert values == [4590, 500000]
 
 
@@ -134,7 +134,7 @@ def test_csv_import_generates_installments_from_description(client: TestClient,
 
     txs = client.get("/transactions", headers=headers)
     assert txs.status_code == 200
-    descriptions = [tx["description"] for tx in txs.json()]
+    descriptions = [tx["description"] for tx in txs.json()["items"]]
     assert any("CP PARC SHOPPING INTER (1/4)" in d for d in descriptions)
     assert any("CP PARC SHOPPING INTER (4/4)" in d for d in descriptions)
     assert any("Reservatorio De Do (10/12)" in d for d in descriptions)
@@ -168,8 +168,8 @@ def test_csv_import_auto_categorizes_expense_with_ai(
 
     txs = client.get("/transactions?query=Almoco", headers=headers)
     assert txs.status_code == 200
-    assert len(txs.json()) == 1
-    assert txs.json()[0]["category_id"] is not None
+    assert len(txs.json()["items"]) == 1
+    assert txs.json()["items"][0]["category_id"] is not None
 
 
 def test_csv_import_ignores_statement_labels_and_uses_ai_category(
@@ -222,3 +222,100 @@ def test_csv_import_ignores_even_valid_file_category_for_expense_and_prefers_ai(
     names = [c["name"] for c in categories.json()]
     assert "Transporte" in names
     assert "Restaurante" not in names
+
+
+def test_csv_import_applies_saved_category_rule(
+    client: TestClient, user_token: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    category_id = client.post("/categories", json={"name": "Assinaturas"}, headers=headers).json()["id"]
+    rule = client.post(
+        "/transactions/recategorize",
+        json={"category_id": category_id, "description_contains": "netflix", "save_rule": True},
+        headers=headers,
+    )
+    assert rule.json()["rule_id"] is not None
+
+    def fake_suggest(description: str, amount_cents: int, existing_categories: list[str] | None = None) -> str | None:
+        assert "NETFLIX" not in description
+        return "Mercado"
+
+    monkeypatch.setattr("app.routers.imports.suggest_category_name", fake_suggest)
+
+    content = "Data,Descricao,Valor\n2026-02-01,NETFLIX.COM,-39.90\n2026-02-02,Supermercado,-100.00\n"
+    resp = client.post("/imports/tabular", headers=headers, files={"file": ("rules.csv", content, "text/csv")})
+    assert resp.status_code == 200
+    assert resp.json()["inserted"] == 2
+
+    txs = {tx["description"]: tx["category_name"] for tx in client.get("/transactions", headers=headers).json()["items"]}
+    assert txs["NETFLIX.COM"] == "Assinaturas"
+    assert txs["Supermercado"] == "Mercado"
+
+
+def test_import_flags_near_duplicates_across_accounts(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    card = client.post("/accounts", json={"name": "Cartao"}, headers=headers).json()["id"]
+    bank = client.post("/accounts", json={"name": "Banco"}, headers=headers).json()["id"]
+
+    card_csv = "Data,Descricao,Valor\n2026-02-01,UBER *TRIP SAO PAULO,-23.45\n2026-02-01,Padaria Real,-23.45\n"
+    first = client.post(
+        "/imports/tabular", headers=headers, data={"account_id": str(card)}, files={"file": ("card.csv", card_csv, "text/csv")}
+    )
+    assert first.json()["near_duplicates"] == 0
+
+    bank_csv = "Data,Descricao,Valor\n2026-02-03,Pagamento Uber Trip,-23.45\n2026-02-10,Uber Trip,-23.45\n"
+    second = client.post(
+        "/imports/tabular", headers=headers, data={"account_id": str(bank)}, files={"file": ("bank.csv", bank_csv, "text/csv")}
+    )
+    assert second.json()["inserted"] == 2
+    assert second.json()["near_duplicates"] == 1
+
+    items = client.get("/imports/near-duplicates", headers=headers).json()
+    assert len(items) == 1
+    assert items[0]["transaction"]["description"] == "Pagamento Uber Trip"
+    assert items[0]["duplicate_of"]["description"] == "UBER *TRIP SAO PAULO"
+    assert client.get("/imports/pending", headers=headers).json() == []
+
+    rescan = client.post("/imports/near-duplicates/scan", headers=headers)
+    assert rescan.json()["flagged"] == 0
+
+    resolved = client.patch(
+        f"/imports/near-duplicates/{items[0]['id']}", json={"action": "delete_duplicate"}, headers=headers
+    )
+    assert resolved.json() == {"status": "resolved"}
+    descriptions = sorted(tx["description"] for tx in client.get("/transactions", headers=headers).json()["items"])
+    assert descriptions == ["Padaria Real", "UBER *TRIP SAO PAULO", "Uber Trip"]
+    assert client.get("/imports/near-duplicates", headers=headers).json() == []
+
+
+def test_csv_import_links_installments_to_groups_and_dedupes_in_batch(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    content = (
+        "Data,Descricao,Valor\n"
+        "2026-01-10,Loja X (1/3),-50.00\n"
+        "2026-01-11,Padaria,-8.00\n"
+        "2026-01-11,Padaria,-8.00\n"
+    )
+    first = client.post("/imports/tabular", headers=headers, files={"file": ("jan.csv", content, "text/csv")})
+    assert first.json()["inserted"] == 4
+    assert first.json()["duplicates"] == 1
+
+    txs = client.get("/transactions", headers=headers).json()["items"]
+    group_ids = {tx["installment_group_id"] for tx in txs if tx["description"].startswith("Loja X")}
+    assert len(group_ids) == 1
+    group_id = group_ids.pop()
+    assert group_id is not None
+
+    content = "Data,Descricao,Valor\n2026-02-10,Loja X (2/3),-50.00\n2026-02-12,Loja Y (2/2),-30.00\n"
+    second = client.post("/imports/tabular", headers=headers, files={"file": ("feb.csv", content, "text/csv")})
+    assert second.json()["inserted"] == 1
+    assert second.json()["duplicates"] == 2
+
+    group = client.get(f"/installments/groups/{group_id}/transactions", headers=headers).json()
+    assert [(tx["date"], tx["installment_number"]) for tx in group] == [
+        ("2026-01-10", 1),
+        ("2026-02-10", 2),
+        ("2026-03-10", 3),
+    ]
+    loja_y = [tx for tx in client.get("/transactions", headers=headers).json()["items"] if tx["description"] == "Loja Y (2/2)"]
+    assert loja_y[0]["installment_group_id"] not in (None, group_id)
@@ -1,3 +1,5 @@
+from datetime import date
+
 from fastapi.testclient import TestClient
 
 
@@ -25,3 +27,62 @@ def test_create_installment_group(client: TestClient, user_token: str) -> None:
     assert txs.status_code == 200
     assert len(txs.json()) == 10
     assert txs.json()[0]["description"].endswith("(1/10)")
+
+
+def test_recurring_series_stores_only_past_occurrences(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    category_id = client.post("/categories", json={"name": "Saude"}, headers=headers).json()["id"]
+    resp = client.post(
+        "/installments/groups",
+        json={
+            "mode": "recurring",
+            "start_date": "2024-01-31",
+            "base_description": "Academia",
+            "amount_per_installment_cents": 9990,
+            "category_id": category_id,
+            "end_date": "2034-12-31",
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    group_id = resp.json()["id"]
+
+    window = client.get("/transactions?start_date=2024-01-01&end_date=2024-04-30", headers=headers).json()["items"]
+    assert sorted(tx["date"] for tx in window) == ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"]
+    stored = client.get(f"/installments/groups/{group_id}/transactions", headers=headers).json()
+    assert stored and all(tx["date"] <= date.today().isoformat() for tx in stored)
+    assert client.post("/installments/recurring/materialize", headers=headers).json() == {"created": 0}
+
+    # Future months are projected into reports without writing anything.
+    future = client.get("/reports/monthly?year=2034&month=6", headers=headers).json()
+    assert future["total_expenses_cents"] == 9990
+    assert client.get("/reports/by-category?year=2034&month=6", headers=headers).json() == [
+        {"category": "Saude", "total_cents": 9990}
+    ]
+    series = client.get("/reports/series?from=2034-11&to=2035-01", headers=headers).json()
+    assert series["totals"] == [9990, 9990, 0]
+    assert client.get("/transactions?start_date=2034-01-01&end_date=2035-12-31", headers=headers).json()["items"] == []
+    assert len(client.get(f"/installments/groups/{group_id}/transactions", headers=headers).json()) == len(stored)
+
+    assert client.delete(f"/installments/groups/{group_id}", headers=headers).json() == {"deleted": True}
+    assert client.get("/transactions?start_date=2024-01-01&end_date=2034-12-31", headers=headers).json()["items"] == []
+    assert client.get("/reports/monthly?year=2034&month=6", headers=headers).json()["total_expenses_cents"] == 0
+
+
+def test_recurring_series_respects_occurrence_cap(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    resp = client.post(
+        "/installments/groups",
+        json={
+            "mode": "recurring",
+            "start_date": "2025-01-10",
+            "base_description": "Seguro",
+            "amount_per_installment_cents": 12000,
+            "installments": 4,
+            "interval_months": 3,
+        },
+        headers=headers,
+    )
+    txs = client.get(f"/installments/groups/{resp.json()['id']}/transactions", headers=headers).json()
+    assert [tx["date"] for tx in txs] == ["2025-01-10", "2025-04-10", "2025-07-10", "2025-10-10"]
+    assert all(tx["installment_number"] is None for tx in txs)
@@ -0,0 +1,107 @@
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.migrations import run_migrations, schema_fingerprint
+
+
+def test_run_migrations_adds_year_month_and_indexes(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_transactions_user_date"))
+        conn.execute(text("DROP INDEX ix_transactions_user_installment_group"))
+        conn.execute(text("ALTER TABLE transactions DROP COLUMN year_month"))
+        conn.execute(text("INSERT INTO users (id, email, password_hash, data_version, created_at) VALUES (1, 'a@a.com', 'x', 0, '2026-01-01')"))
+        for tx_id, tx_date in [(1, "2026-02-10"), (2, "10/03/2026")]:
+            conn.execute(
+                text(
+                    "INSERT INTO transactions (id, user_id, date, description, amount_cents, source, dedupe_hash, "
+                    "created_at, updated_at) VALUES (:id, 1, :date, 'x', 100, 'manual', :hash, '2026-01-01', '2026-01-01')"
+                ),
+                {"id": tx_id, "date": tx_date, "hash": str(tx_id)},
+            )
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("transactions")}
+    assert "ix_transactions_user_date" in index_names
+    assert "ix_transactions_user_category_date" in index_names
+    with engine.connect() as conn:
+        plan = conn.execute(
+            text("EXPLAIN QUERY PLAN DELETE FROM transactions WHERE user_id = 1 AND installment_group_id = 7")
+        ).all()
+    assert "ix_transactions_user_installment_group" in " ".join(row[-1] for row in plan)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, year_month FROM transactions ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, 202602), (2, 202603)]
+
+
+def test_run_migrations_backfills_category_normalized_names(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ux_categories_user_normalized_name"))
+        conn.execute(text("ALTER TABLE categories DROP COLUMN normalized_name"))
+        conn.execute(text("INSERT INTO users (id, email, password_hash, data_version, created_at) VALUES (1, 'a@a.com', 'x', 0, '2026-01-01')"))
+        for category_id, name in [(1, "Saúde"), (2, "saude"), (3, "Lazer")]:
+            conn.execute(text("INSERT INTO categories (id, user_id, name) VALUES (:id, 1, :name)"), {"id": category_id, "name": name})
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, normalized_name FROM categories ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, "saude"), (2, None), (3, "lazer")]
+
+
+def test_run_migrations_builds_account_balance_checkpoints(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, password_hash, data_version, created_at) VALUES (1, 'a@a.com', 'x', 0, '2026-01-01')"))
+        conn.execute(text("INSERT INTO accounts (id, user_id, name) VALUES (1, 1, 'Checking')"))
+        for tx_id, tx_date, amount in [(1, "2026-01-10", 100), (2, "2026-01-20", 50), (3, "2026-03-01", 200)]:
+            conn.execute(
+                text(
+                    "INSERT INTO transactions (id, user_id, account_id, date, year_month, description, amount_cents, "
+                    "source, dedupe_hash, created_at, updated_at) VALUES (:id, 1, 1, :date, :year_month, 'x', :amount, "
+                    "'manual', :hash, '2026-01-01', '2026-01-01')"
+                ),
+                {"id": tx_id, "date": tx_date, "year_month": int(tx_date[:4] + tx_date[5:7]), "amount": amount, "hash": str(tx_id)},
+            )
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT year_month, month_total_cents, cumulative_cents FROM account_balance_checkpoints ORDER BY year_month")
+        ).all()
+    assert [tuple(row) for row in rows] == [(202601, 150, 150), (202603, 200, 350)]
+
+
+def test_run_migrations_records_applied_steps(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'versioned.db'}")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        steps = set(conn.scalars(text("SELECT name FROM schema_migrations")))
+        conn.execute(text("INSERT INTO users (id, email, password_hash, data_version, created_at) VALUES (1, 'a@a.com', 'x', 0, '2026-01-01')"))
+        conn.execute(
+            text(
+                "INSERT INTO transactions (id, user_id, date, description, amount_cents, source, dedupe_hash, "
+                "created_at, updated_at) VALUES (1, 1, '2026-02-10', 'x', 100, 'manual', 'h', '2026-01-01', '2026-01-01')"
+            )
+        )
+
+    run_migrations(engine)
+
+    assert f"schema:{schema_fingerprint()}" in steps
+    assert "backfill_transaction_year_month" in steps
+    with engine.connect() as conn:
+        # The backfill already ran once, so the second startup does not scan transactions again.
+        assert conn.scalar(text("SELECT year_month FROM transactions WHERE id = 1")) is None
+        assert conn.scalar(text("SELECT count(*) FROM schema_migrations")) == len(steps)
@@ -0,0 +1,85 @@
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.database import ThreadedSession, build_async_engine, build_engine, get_async_db, schedule_sqlite_optimize
+from app.pooling import MeteredAsyncQueuePool, MeteredQueuePool, engine_options, pool_status
+
+
+def test_engine_options_follow_profile() -> None:
+    serverless = engine_options("postgresql+psycopg://u:p@ep-x.neon.tech/db", "serverless")
+    assert serverless["poolclass"] is MeteredQueuePool
+    assert serverless["pool_size"] == 1
+    assert serverless["pool_pre_ping"] is True
+    assert serverless["connect_args"] == {"connect_timeout": 5, "prepare_threshold": None}
+
+    long_running = engine_options("postgresql+psycopg://u:p@ep-x.neon.tech/db", "long-running", is_async=True)
+    assert long_running["poolclass"] is MeteredAsyncQueuePool
+    assert "prepare_threshold" not in long_running["connect_args"]
+    pooler = engine_options("postgresql+psycopg://u:p@ep-x-pooler.neon.tech/db", "long-running")
+    assert pooler["connect_args"]["prepare_threshold"] is None
+
+    assert engine_options("sqlite:///x.db", "test")["poolclass"] is NullPool
+
+
+def test_pool_status_reports_checkouts(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DB_POOL_SIZE", "2")
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", **engine_options("sqlite:///pool.db", "long-running"))
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert pool_status(engine.pool)["checked_out"] == 1
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    status = pool_status(engine.pool)
+    assert status["pool"] == "MeteredQueuePool"
+    assert status["size"] == 2
+    assert status["checked_out"] == 0
+    assert status["checked_in"] == 1
+    assert status["checkouts"] >= 2
+    assert status["timeouts"] == 0
+    engine.dispose()
+
+
+def test_health_pool(client) -> None:
+    res = client.get("/health/pool")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["profile"] == "test"
+    assert body["sync"]["pool"] == "NullPool"
+
+
+def test_sqlite_engine_applies_pragmas(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    engine = build_engine(url, "long-running")
+    schedule_sqlite_optimize(engine, interval=0)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2
+    engine.dispose()
+
+    async def async_busy_timeout() -> int:
+        async_engine = build_async_engine(url, "long-running")
+        async with async_engine.connect() as conn:
+            timeout = (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar()
+        await async_engine.dispose()
+        return timeout
+
+    assert asyncio.run(async_busy_timeout()) == 5000
+
+
+def test_async_handlers_use_threaded_sessions_on_sqlite(client) -> None:
+    async def first_session() -> object:
+        sessions = get_async_db()
+        db = await sessions.__anext__()
+        count = await db.run_sync(lambda session: session.execute(text("SELECT 1")).scalar())
+        await sessions.aclose()
+        return db, count
+
+    db, count = asyncio.run(first_session())
+    assert isinstance(db, ThreadedSession)
+    assert count == 1
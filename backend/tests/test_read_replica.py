@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+
+from app import database
+from app.database import Base, RoutingSession, init_database, use_primary
+from app.models import Account, User
+from app.services.categories import category_directories
+
+
+def use_empty_replica(tmp_path: Path) -> None:
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    replica = create_engine(replica_url)
+    Base.metadata.create_all(bind=replica)
+    replica.dispose()
+    init_database(database.engine.url.render_as_string(hide_password=False), "test", read_url=replica_url)
+
+
+def test_reads_follow_replica_outside_write_window(
+    client: TestClient, user_token: str, tmp_path: Path, monkeypatch
+) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    use_empty_replica(tmp_path)
+    assert client.post("/accounts", headers=headers, json={"name": "Conta"}).status_code == 201
+    assert client.post("/categories", headers=headers, json={"name": "Mercado"}).status_code == 201
+    res = client.post(
+        "/transactions",
+        headers=headers,
+        json={"date": "2026-02-01", "description": "Padaria", "amount_cents": 1234},
+    )
+    assert res.status_code == 201
+
+    # Within the window the user reads their own writes from the primary.
+    assert len(client.get("/transactions", headers=headers).json()["items"]) == 1
+    assert [a["name"] for a in client.get("/accounts", headers=headers).json()] == ["Conta"]
+
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 0)
+    assert client.get("/transactions?limit=10", headers=headers).json()["items"] == []
+    assert client.get("/accounts", headers=headers).json() == []
+    # The category directory was built on the primary and no category changed since.
+    assert [c["name"] for c in client.get("/categories", headers=headers).json()] == ["Mercado"]
+    category_directories.clear()
+    assert client.get("/categories", headers=headers).json() == []
+    report = client.get("/reports/monthly?year=2026&month=2", headers=headers)
+    assert report.status_code == 200
+    # Replica results may trail the user's data_version, so they carry no version ETag.
+    assert "etag" not in report.headers
+
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 60)
+    report = client.get("/reports/monthly?year=2026&month=2", headers=headers)
+    assert report.json()["total_expenses_cents"] == 1234
+    assert "etag" in report.headers
+
+
+def test_routing_session_returns_to_primary_after_a_write(tmp_path: Path) -> None:
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        Base.metadata.create_all(bind=engine)
+
+    with RoutingSession(bind=primary) as session:
+        session.info["replica"] = replica
+        session.add(User(email="a@a.com", password_hash="x"))
+        session.flush()
+        assert session.info["use_primary"] is True
+        assert session.scalar(select(func.count()).select_from(User)) == 1
+        session.commit()
+
+    with RoutingSession(bind=primary) as session:
+        session.info["replica"] = replica
+        assert session.scalar(select(func.count()).select_from(User)) == 0
+        assert session.scalar(select(func.count()).select_from(Account)) == 0
+        # A path that may write reads from the primary before it has written anything.
+        use_primary(session)
+        assert session.scalar(select(func.count()).select_from(User)) == 1
+    primary.dispose()
+    replica.dispose()
@@ -1,3 +1,5 @@
+from datetime import date
+
 from fastapi.testclient import TestClient
 
 
@@ -25,3 +27,126 @@ def test_monthly_summary_and_by_category(client: TestClient, user_token: str) ->
     by_cat = client.get("/reports/by-category?year=2026&month=2", headers=headers)
     assert by_cat.status_code == 200
     assert len(by_cat.json()) == 1
+
+    assert client.get("/reports/monthly?year=2026&month=13", headers=headers).status_code == 400
+    assert client.get("/reports/by-category?year=2026&month=0", headers=headers).status_code == 400
+
+
+def test_monthly_summary_uses_month_boundaries(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for tx_date, amount in [("2026-01-31", 100), ("2026-02-01", 200), ("2026-02-28", 300), ("2026-03-01", 400)]:
+        client.post(
+            "/transactions",
+            json={"date": tx_date, "description": f"Lcto {tx_date}", "amount_cents": amount},
+            headers=headers,
+        )
+
+    summary = client.get("/reports/monthly?year=2026&month=2", headers=headers)
+    assert summary.status_code == 200
+    assert summary.json()["total_expenses_cents"] == 500
+
+    december = client.get("/reports/monthly?year=2025&month=12", headers=headers)
+    assert december.json()["total_expenses_cents"] == 0
+
+
+def test_series_returns_columnar_matrix(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    food = client.post("/categories", json={"name": "Restaurante"}, headers=headers).json()
+    for tx_date, amount, category_id in [
+        ("2025-12-05", 1000, food["id"]),
+        ("2026-02-10", 2000, food["id"]),
+        ("2026-02-11", 500, None),
+        ("2026-03-01", 9999, food["id"]),
+    ]:
+        client.post(
+            "/transactions",
+            json={"date": tx_date, "description": f"Lcto {tx_date}", "amount_cents": amount, "category_id": category_id},
+            headers=headers,
+        )
+
+    resp = client.get("/reports/series?from=2025-12&to=2026-02&group_by=category", headers=headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["months"] == ["2025-12", "2026-01", "2026-02"]
+    assert data["series"] == [
+        {"id": food["id"], "name": "Restaurante", "values": [1000, 0, 2000]},
+        {"id": None, "name": None, "values": [0, 0, 500]},
+    ]
+    assert data["totals"] == [1000, 0, 2500]
+
+    invalid = client.get("/reports/series?from=2026-03&to=2026-02", headers=headers)
+    assert invalid.status_code == 400
+
+
+def test_dashboard_matches_individual_reports(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    food = client.post("/categories", json={"name": "Restaurante"}, headers=headers).json()
+    home = client.post("/categories", json={"name": "Casa"}, headers=headers).json()
+    for tx_date, amount, category_id in [
+        ("2026-01-20", 700, home["id"]),
+        ("2026-02-10", 5000, food["id"]),
+        ("2026-02-12", 300, None),
+    ]:
+        client.post(
+            "/transactions",
+            json={"date": tx_date, "description": f"Lcto {tx_date}", "amount_cents": amount, "category_id": category_id},
+            headers=headers,
+        )
+    today = date.today().replace(day=1).isoformat()
+    client.post(
+        "/installments/groups",
+        json={"start_date": today, "base_description": "Notebook", "total_cents": 3000, "installments": 3},
+        headers=headers,
+    )
+
+    dashboard = client.get("/reports/dashboard?year=2026&month=2", headers=headers)
+    assert dashboard.status_code == 200
+    assert client.get("/reports/dashboard?year=2026&month=13", headers=headers).status_code == 400
+    data = dashboard.json()
+    assert data["monthly"] == client.get("/reports/monthly?year=2026&month=2", headers=headers).json()
+    assert data["by_category"] == client.get("/reports/by-category?year=2026&month=2", headers=headers).json()
+    assert data["by_category_total"] == client.get("/reports/by-category-total", headers=headers).json()
+    for scope in ["this_month", "next_month", "total"]:
+        summary = client.get(f"/reports/installments-summary?scope={scope}", headers=headers).json()
+        assert data["installments"][scope] == summary["total_cents"]
+    assert data["installments"] == {"this_month": 1000, "next_month": 1000, "total": 3000}
+
+
+def test_report_etag_revalidation_follows_data_version(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    payload = {"date": "2026-02-10", "description": "Lcto", "amount_cents": 5000}
+    client.post("/transactions", json=payload, headers=headers)
+
+    first = client.get("/reports/monthly?year=2026&month=2", headers=headers)
+    etag = first.headers["ETag"]
+    cached = client.get("/reports/monthly?year=2026&month=2", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    other_params = client.get("/reports/monthly?year=2026&month=3", headers={**headers, "If-None-Match": etag})
+    assert other_params.status_code == 200
+
+    client.post("/transactions", json={**payload, "description": "Outro"}, headers=headers)
+    changed = client.get("/reports/monthly?year=2026&month=2", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["total_expenses_cents"] == 10000
+
+
+def test_installments_projection_counts_grouped_and_imported(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    this_month = date.today().replace(day=1).isoformat()
+    client.post(
+        "/installments/groups",
+        json={"start_date": this_month, "base_description": "Notebook", "total_cents": 3000, "installments": 3},
+        headers=headers,
+    )
+    content = f"Data,Descricao,Valor\n{this_month},Geladeira (1/2),-500.00\n"
+    client.post("/imports/tabular", headers=headers, files={"file": ("parcelas.csv", content, "text/csv")})
+
+    resp = client.get("/reports/installments-projection?months=4", headers=headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["months"][0] == this_month[:7]
+    assert data["values"] == [51000, 51000, 1000, 0]
+    assert data["counts"] == [2, 2, 1, 0]
+    assert data["total_cents"] == 103000
@@ -0,0 +1,104 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import database
+from app.models import CategoryRule, User
+from app.services.category_rules import CompiledRules, bump_rules_version, get_rule_matcher
+
+
+def test_compiled_rules_prefer_newest_rule_across_match_types() -> None:
+    rules = CompiledRules(
+        [
+            (0, "regex", r"^posto\b", 10, None),
+            (1, "contains", "shell", 11, None),
+            (2, "contains", "he", 12, None),
+            (3, "merchant", "ifood", 13, None),
+            (4, "regex", r"(\d)\1{3}", 14, None),
+            (5, "contains", "shopping", 15, None),
+        ]
+    )
+    assert rules.match("Posto Shell Centro") == 10
+    assert rules.match("SHELL BOX") == 11
+    assert rules.match("Chevrolet") == 12
+    assert rules.match("Ifood (2/3)") == 13
+    assert rules.match("Ifood Mercado") is None
+    assert rules.match("Pix 7777") == 14
+    assert rules.match("Shopping Ibirapuera") == 15
+    assert rules.match("Padaria") is None
+
+
+def test_rule_crud_and_import_uses_compiled_rules(
+    client: TestClient, user_token: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    transporte = client.post("/categories", json={"name": "Transporte"}, headers=headers).json()["id"]
+    lazer = client.post("/categories", json={"name": "Lazer"}, headers=headers).json()["id"]
+
+    created = client.post(
+        "/rules/bulk",
+        json={
+            "rules": [
+                {"category_id": transporte, "pattern": "Uber"},
+                {"category_id": lazer, "match_type": "regex", "pattern": r"cinema|teatro"},
+            ]
+        },
+        headers=headers,
+    )
+    assert created.status_code == 201
+    uber_rule_id, cinema_rule_id = created.json()["ids"]
+    assert client.post(
+        "/rules", json={"category_id": lazer, "match_type": "regex", "pattern": "("}, headers=headers
+    ).status_code == 400
+    assert client.post(
+        "/rules", json={"category_id": lazer, "match_type": "regex", "pattern": "(?s)show.+ingresso"}, headers=headers
+    ).status_code == 400
+    flagged = client.post(
+        "/rules", json={"category_id": lazer, "match_type": "regex", "pattern": "(?i)show"}, headers=headers
+    ).json()
+    assert flagged["pattern"] == "show"
+    client.delete(f"/rules/{flagged['id']}", headers=headers)
+    assert client.post("/rules", json={"category_id": 9999, "pattern": "x"}, headers=headers).status_code == 404
+
+    suggested: list[str] = []
+
+    def fake_suggest(description: str, amount_cents: int, existing_categories: list[str] | None = None) -> str | None:
+        suggested.append(description)
+        return None
+
+    monkeypatch.setattr("app.routers.imports.suggest_category_name", fake_suggest)
+    content = "Data,Descricao,Valor\n2026-02-01,UBER *TRIP,-19.90\n2026-02-02,Cinemark,-40.00\n2026-02-03,Farmacia,-10.00\n"
+    resp = client.post("/imports/tabular", headers=headers, files={"file": ("a.csv", content, "text/csv")})
+    assert resp.json()["inserted"] == 3
+    assert suggested == ["Farmacia"]
+
+    updated = client.put(
+        f"/rules/{uber_rule_id}", json={"category_id": lazer, "pattern": "farmacia"}, headers=headers
+    )
+    assert updated.json()["pattern"] == "farmacia"
+    assert client.delete(f"/rules/{cinema_rule_id}", headers=headers).json() == {"deleted": True}
+    assert [rule["id"] for rule in client.get("/rules", headers=headers).json()] == [uber_rule_id]
+
+    suggested.clear()
+    content = "Data,Descricao,Valor\n2026-03-01,Uber,-19.90\n2026-03-02,Cinemark,-40.00\n2026-03-03,Farmacia,-12.00\n"
+    client.post("/imports/tabular", headers=headers, files={"file": ("b.csv", content, "text/csv")})
+    assert suggested == ["Uber", "Cinemark"]
+    txs = {tx["date"]: tx["category_id"] for tx in client.get("/transactions", headers=headers).json()["items"]}
+    assert txs["2026-02-01"] == transporte
+    assert txs["2026-02-02"] == lazer
+    assert txs["2026-03-03"] == lazer
+
+
+def test_rule_matcher_follows_rules_version(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    mercado = client.post("/categories", json={"name": "Mercado"}, headers=headers).json()["id"]
+    client.post("/rules", json={"category_id": mercado, "pattern": "extra"}, headers=headers)
+    with database.SessionLocal() as session:
+        user = session.scalar(select(User))
+        assert get_rule_matcher(session, user).match("Extra Supermercados", None) == mercado
+
+        # A rule saved by another worker reaches this one through the version, not a local invalidation.
+        session.add(CategoryRule(user_id=user.id, category_id=mercado, match_type="contains", pattern="atacadao"))
+        bump_rules_version(session, user.id)
+        session.commit()
+        assert get_rule_matcher(session, user).match("Atacadao", None) == mercado
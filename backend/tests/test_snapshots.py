@@ -0,0 +1,87 @@
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+
+
+def test_snapshot_round_trip_remaps_ids(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    account_id = client.post("/accounts", json={"name": "Checking"}, headers=headers).json()["id"]
+    category_id = client.post("/categories", json={"name": "Food"}, headers=headers).json()["id"]
+    client.put(f"/budgets/{category_id}", json={"amount_cents": 1000}, headers=headers)
+    client.post("/rules", json={"category_id": category_id, "match_type": "contains", "pattern": "bakery"}, headers=headers)
+    client.post(
+        "/installments/groups",
+        json={
+            "start_date": "2026-03-05",
+            "base_description": "Phone",
+            "total_cents": 30000,
+            "installments": 3,
+            "account_id": account_id,
+            "category_id": category_id,
+        },
+        headers=headers,
+    )
+    tx = {"date": "2026-03-10", "description": "Bakery", "amount_cents": 450, "category_id": category_id, "account_id": account_id}
+    client.post("/transactions", json=tx, headers=headers)
+
+    snapshot = client.get("/snapshots/export", headers=headers)
+    assert snapshot.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(snapshot.content).splitlines()
+    assert json.loads(lines[0])["version"] == 1
+
+    def listing(auth: dict) -> list[tuple]:
+        rows = client.get("/transactions?sort_by=date&sort_order=asc", headers=auth).json()["items"]
+        return [(row["date"], row["description"], row["amount_cents"], row["category_name"]) for row in rows]
+
+    client.post("/auth/register", json={"email": "b@b.com", "password": "secret123"})
+    other_token = client.post("/auth/login", json={"email": "b@b.com", "password": "secret123"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {other_token}"}
+    files = {"file": ("snapshot.ndjson.gz", snapshot.content, "application/gzip")}
+    restored = client.post("/snapshots/restore", files=files, headers=other)
+    assert restored.status_code == 200
+    assert restored.json()["restored"]["transactions"] == 4
+
+    assert listing(other) == listing(headers)
+    other_account = client.get("/accounts", headers=other).json()[0]["id"]
+    assert other_account != account_id
+    balance = client.get(f"/accounts/{other_account}/balance?at=2026-03-31", headers=other).json()
+    assert balance["balance_cents"] == -10450
+    budget = client.get("/budgets?year=2026&month=3", headers=other).json()[0]
+    assert (budget["spent_cents"], budget["status"]) == (10450, "exceeded")
+    assert len(client.get("/rules", headers=other).json()) == 1
+
+    assert client.post("/snapshots/restore", files=files, headers=other).status_code == 409
+    replaced = client.post("/snapshots/restore", files=files, data={"replace": "true"}, headers=other)
+    assert replaced.status_code == 200
+    assert listing(other) == listing(headers)
+
+    bad = {"file": ("snapshot.ndjson", b'{"format": "other"}\n', "application/x-ndjson")}
+    assert client.post("/snapshots/restore", files=bad, data={"replace": "true"}, headers=other).status_code == 400
+    assert listing(other) == listing(headers)
+
+
+def test_changes_feed_pages_across_a_restore(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for i in range(3):
+        client.post("/transactions", json={"date": "2026-03-01", "description": f"A{i}", "amount_cents": 100 + i}, headers=headers)
+    snapshot = client.get("/snapshots/export", headers=headers).content
+
+    client.post("/auth/register", json={"email": "b@b.com", "password": "secret123"})
+    other_token = client.post("/auth/login", json={"email": "b@b.com", "password": "secret123"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {other_token}"}
+    for i in range(3):
+        client.post("/transactions", json={"date": "2026-03-02", "description": f"B{i}", "amount_cents": 200 + i}, headers=other)
+    synced = client.get("/transactions/changes", headers=other).json()
+    local = {row["id"]: row["description"] for row in synced["upserts"]}
+
+    files = {"file": ("snapshot.ndjson.gz", snapshot, "application/gzip")}
+    assert client.post("/snapshots/restore", files=files, data={"replace": "true"}, headers=other).status_code == 200
+    delta = client.get(f"/transactions/changes?since={synced['next_token']}", headers=other).json()
+    for tx_id in delta["deleted"]:
+        local.pop(tx_id, None)
+    local.update({row["id"]: row["description"] for row in delta["upserts"]})
+
+    server = client.get("/transactions", headers=other).json()["items"]
+    assert local == {row["id"]: row["description"] for row in server}
+    assert sorted(local.values()) == ["A0", "A1", "A2"]
@@ -1,4 +1,12 @@
+import json
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import database
+from app.cache import bump_data_version
+from app.models import Transaction, User
 
 
 def test_create_category_and_manual_transaction(client: TestClient, user_token: str) -> None:
@@ -22,8 +30,8 @@ def test_create_category_and_manual_transaction(client: TestClient, user_token:
 
     lst = client.get("/transactions?query=mercado", headers=headers)
     assert lst.status_code == 200
-    assert len(lst.json()) == 1
-    assert lst.json()[0]["category_name"] == "Mercado"
+    assert len(lst.json()["items"]) == 1
+    assert lst.json()["items"][0]["category_name"] == "Mercado"
 
 
 def test_update_and_delete_transaction(client: TestClient, user_token: str) -> None:
@@ -63,7 +71,7 @@ def test_update_and_delete_transaction(client: TestClient, user_token: str) -> N
 
     lst = client.get("/transactions?query=Internet Fibra", headers=headers)
     assert lst.status_code == 200
-    assert len(lst.json()) == 0
+    assert len(lst.json()["items"]) == 0
 
 
 def test_list_transactions_with_sorting(client: TestClient, user_token: str) -> None:
@@ -79,8 +87,318 @@ def test_list_transactions_with_sorting(client: TestClient, user_token: str) ->
 
     by_date_asc = client.get("/transactions?sort_by=date&sort_order=asc", headers=headers)
     assert by_date_asc.status_code == 200
-    assert [row["date"] for row in by_date_asc.json()[:3]] == ["2026-02-01", "2026-02-02", "2026-02-03"]
+    assert [row["date"] for row in by_date_asc.json()["items"][:3]] == ["2026-02-01", "2026-02-02", "2026-02-03"]
 
     by_amount_desc = client.get("/transactions?sort_by=amount_cents&sort_order=desc", headers=headers)
     assert by_amount_desc.status_code == 200
-    assert [row["amount_cents"] for row in by_amount_desc.json()[:3]] == [3000, 2000, 1000]
+    assert [row["amount_cents"] for row in by_amount_desc.json()["items"][:3]] == [3000, 2000, 1000]
+
+
+@pytest.mark.parametrize(
+    "sort_by,sort_order",
+    [("date", "desc"), ("date", "asc"), ("amount_cents", "asc"), ("description", "desc"), ("created_at", "asc")],
+)
+def test_list_transactions_keyset_pagination(client: TestClient, user_token: str, sort_by: str, sort_order: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for i in range(7):
+        payload = {
+            "date": f"2026-02-0{1 + i % 3}",
+            "description": f"Item {i % 2}",
+            "amount_cents": 1000 * (i % 3),
+            "category_id": None,
+            "account_id": None,
+        }
+        assert client.post("/transactions", json={**payload, "description": f"{payload['description']} {i}"}, headers=headers).status_code == 201
+
+    params = f"sort_by={sort_by}&sort_order={sort_order}"
+    expected = [row["id"] for row in client.get(f"/transactions?{params}", headers=headers).json()["items"]]
+
+    seen: list[int] = []
+    url = f"/transactions?{params}&limit=3&include_total=true"
+    while True:
+        page = client.get(url, headers=headers)
+        assert page.status_code == 200
+        body = page.json()
+        assert body["limit"] == 3
+        assert body.get("total", 7) == 7
+        seen.extend(row["id"] for row in body["items"])
+        if not body["next_cursor"]:
+            break
+        url = f"/transactions?{params}&limit=3&cursor={body['next_cursor']}"
+    assert seen == expected
+
+    mismatched = client.get(f"/transactions?sort_by=id&limit=3&cursor={body['next_cursor'] or 'x'}", headers=headers)
+    assert mismatched.status_code == 400
+
+
+def test_description_search_is_accent_insensitive_and_follows_writes(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    created = client.post(
+        "/transactions",
+        json={"date": "2026-02-10", "description": "Açaí da Esquina", "amount_cents": 1500},
+        headers=headers,
+    )
+    tx_id = created.json()["id"]
+    client.post("/transactions", json={"date": "2026-02-11", "description": "Padaria 50%", "amount_cents": 900}, headers=headers)
+
+    assert [row["id"] for row in client.get("/transactions?query=acai", headers=headers).json()["items"]] == [tx_id]
+    assert [row["id"] for row in client.get("/transactions?query=ESQUI", headers=headers).json()["items"]] == [tx_id]
+    assert len(client.get("/transactions?query=qu", headers=headers).json()["items"]) == 1
+    assert len(client.get("/transactions?query=50%25", headers=headers).json()["items"]) == 1
+    assert client.get("/transactions?query=%25", headers=headers).json()["items"][0]["description"] == "Padaria 50%"
+
+    client.patch(
+        f"/transactions/{tx_id}",
+        json={"date": "2026-02-10", "description": "Sorveteria Pinguim", "amount_cents": 1500},
+        headers=headers,
+    )
+    assert client.get("/transactions?query=acai", headers=headers).json()["items"] == []
+    assert len(client.get("/transactions?query=pinguim", headers=headers).json()["items"]) == 1
+
+    client.delete(f"/transactions/{tx_id}", headers=headers)
+    assert client.get("/transactions?query=pinguim", headers=headers).json()["items"] == []
+
+
+def test_suggest_descriptions_by_prefix(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    transport = client.post("/categories", json={"name": "Transporte"}, headers=headers).json()
+    for tx_date, description, category_id in [
+        ("2026-02-01", "Uber Centro", None),
+        ("2026-02-03", "uber  centro", transport["id"]),
+        ("2026-02-02", "Übersee Café", None),
+        ("2026-02-04", "Padaria", None),
+    ]:
+        client.post(
+            "/transactions",
+            json={"date": tx_date, "description": description, "amount_cents": 100, "category_id": category_id},
+            headers=headers,
+        )
+
+    suggestions = client.get("/transactions/suggest?prefix=ub", headers=headers)
+    assert suggestions.status_code == 200
+    assert suggestions.json() == [
+        {"description": "uber centro", "count": 2, "category_id": transport["id"]},
+        {"description": "Übersee Café", "count": 1, "category_id": None},
+    ]
+
+    created = client.post(
+        "/transactions",
+        json={"date": "2026-02-05", "description": "Uber Eats", "amount_cents": 100},
+        headers=headers,
+    )
+    client.post(
+        "/installments/groups",
+        json={"start_date": "2026-03-01", "base_description": "Uber One", "total_cents": 300, "installments": 3},
+        headers=headers,
+    )
+    client.delete(f"/transactions/{created.json()['id']}", headers=headers)
+
+    names = [item["description"] for item in client.get("/transactions/suggest?prefix=UBER", headers=headers).json()]
+    assert names == ["Uber One", "uber centro", "Übersee Café"]
+
+
+def test_changes_feed_returns_only_new_rows_and_tombstones(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    ids = []
+    for i in range(3):
+        created = client.post(
+            "/transactions",
+            json={"date": f"2026-02-0{i + 1}", "description": f"Item {i}", "amount_cents": 100},
+            headers=headers,
+        )
+        ids.append(created.json()["id"])
+
+    initial = client.get("/transactions/changes?limit=2", headers=headers).json()
+    assert [row["id"] for row in initial["upserts"]] == ids[:2]
+    assert initial["has_more"] is True
+    rest = client.get(f"/transactions/changes?since={initial['next_token']}&limit=2", headers=headers).json()
+    assert [row["id"] for row in rest["upserts"]] == ids[2:]
+    assert rest["has_more"] is False
+
+    idle = client.get(f"/transactions/changes?since={rest['next_token']}", headers=headers).json()
+    assert idle["upserts"] == [] and idle["deleted"] == []
+
+    client.patch(
+        f"/transactions/{ids[0]}",
+        json={"date": "2026-02-01", "description": "Item editado", "amount_cents": 100},
+        headers=headers,
+    )
+    client.delete(f"/transactions/{ids[1]}", headers=headers)
+    delta = client.get(f"/transactions/changes?since={idle['next_token']}", headers=headers).json()
+    assert [row["description"] for row in delta["upserts"]] == ["Item editado"]
+    assert delta["deleted"] == [ids[1]]
+
+    assert client.get("/transactions/changes?since=garbage", headers=headers).status_code == 400
+
+
+def test_changes_feed_pages_on_commit_order(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.post("/transactions", json={"date": "2026-02-01", "description": "Cedo", "amount_cents": 100}, headers=headers)
+
+    # A row inserted by a write that has not committed its version yet carries no sequence.
+    with database.SessionLocal() as session:
+        user_id = session.scalar(select(User.id))
+        late = Transaction(user_id=user_id, date="2026-01-01", description="Tarde", amount_cents=5, dedupe_hash="tarde")
+        session.add(late)
+        session.commit()
+        late_id = late.id
+    feed = client.get("/transactions/changes", headers=headers).json()
+    assert [row["description"] for row in feed["upserts"]] == ["Cedo"]
+
+    # Once a commit stamps it, the row shows up after the cursor instead of being skipped.
+    with database.SessionLocal() as session:
+        bump_data_version(session, user_id)
+        session.commit()
+    delta = client.get(f"/transactions/changes?since={feed['next_token']}", headers=headers).json()
+    assert [row["id"] for row in delta["upserts"]] == [late_id]
+
+
+def test_batch_transactions_atomic_and_partial(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    first = client.post("/transactions", json={"date": "2026-02-01", "description": "Aluguel", "amount_cents": 100000}, headers=headers)
+    second = client.post("/transactions", json={"date": "2026-02-02", "description": "Luz", "amount_cents": 9000}, headers=headers)
+    first_id, second_id = first.json()["id"], second.json()["id"]
+
+    rejected = client.post(
+        "/transactions/batch",
+        json={
+            "operations": [
+                {"op": "create", "data": {"date": "2026-02-03", "description": "Agua", "amount_cents": 5000}},
+                {"op": "create", "data": {"date": "2026-02-02", "description": "luz", "amount_cents": 9000}},
+                {"op": "delete", "id": 999999},
+            ]
+        },
+        headers=headers,
+    )
+    assert rejected.status_code == 409
+    assert [item["status"] for item in rejected.json()["detail"]["results"]] == ["duplicate", "not_found"]
+    assert len(client.get("/transactions", headers=headers).json()["items"]) == 2
+
+    applied = client.post(
+        "/transactions/batch",
+        json={
+            "mode": "partial",
+            "operations": [
+                {"op": "delete", "id": second_id},
+                {"op": "update", "id": first_id, "data": {"date": "2026-02-02", "description": "Luz", "amount_cents": 9000}},
+                {"op": "create", "data": {"date": "2026-02-03", "description": "Agua", "amount_cents": 5000}},
+                {"op": "create", "data": {"date": "2026-02-03", "description": "Agua", "amount_cents": 5000}},
+            ],
+        },
+        headers=headers,
+    )
+    assert applied.status_code == 200
+    body = applied.json()
+    assert body["applied"] == 3
+    assert [item["status"] for item in body["results"]] == ["deleted", "updated", "created", "duplicate"]
+
+    rows = client.get("/transactions?sort_by=date&sort_order=asc", headers=headers).json()["items"]
+    assert [(row["id"], row["description"]) for row in rows] == [(first_id, "Luz"), (body["results"][2]["id"], "Agua")]
+
+
+def test_partial_batch_rejects_claims_on_keys_whose_holder_stays(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    ids = [
+        client.post("/transactions", json={"date": "2026-02-01", "description": name, "amount_cents": 100}, headers=headers).json()["id"]
+        for name in ("X", "Y", "Z")
+    ]
+    data = {name: {"date": "2026-02-01", "description": name, "amount_cents": 100} for name in ("Y", "Z", "W")}
+    res = client.post(
+        "/transactions/batch",
+        json={
+            "mode": "partial",
+            "operations": [
+                {"op": "update", "id": ids[0], "data": data["Y"]},
+                {"op": "update", "id": ids[1], "data": data["Z"]},
+                {"op": "create", "data": data["W"]},
+            ],
+        },
+        headers=headers,
+    )
+    # Y's move onto Z's key is rejected, so Y keeps its key and X cannot take it either.
+    assert res.status_code == 200
+    assert [item["status"] for item in res.json()["results"]] == ["duplicate", "duplicate", "created"]
+
+
+def test_recategorize_by_merchant_and_save_rule(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    category_id = client.post("/categories", json={"name": "Transporte"}, headers=headers).json()["id"]
+    for tx_date, description in [
+        ("2026-01-05", "Uber Trip"),
+        ("2026-02-05", "UBER TRIP (1/2)"),
+        ("2026-02-06", "Uber Trip Extra"),
+        ("2026-03-01", "Padaria"),
+    ]:
+        client.post(
+            "/transactions",
+            json={"date": tx_date, "description": description, "amount_cents": 1000, "category_id": None, "account_id": None},
+            headers=headers,
+        )
+
+    resp = client.post(
+        "/transactions/recategorize",
+        json={"category_id": category_id, "merchant": "uber trip", "start_date": "2026-02-01", "save_rule": True},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["updated"] == 1
+    assert resp.json()["rule_id"] is not None
+
+    resp = client.post(
+        "/transactions/recategorize",
+        json={"category_id": category_id, "description_regex": r"^uber\b"},
+        headers=headers,
+    )
+    assert resp.json() == {"updated": 3, "rule_id": None}
+    categorized = {tx["description"]: tx["category_id"] for tx in client.get("/transactions", headers=headers).json()["items"]}
+    assert categorized["Padaria"] is None
+    assert categorized["Uber Trip Extra"] == category_id
+
+    assert client.post(
+        "/transactions/recategorize", json={"category_id": category_id, "description_regex": "("}, headers=headers
+    ).status_code == 400
+    assert client.post(
+        "/transactions/recategorize",
+        json={"category_id": category_id, "merchant": "uber", "description_contains": "uber"},
+        headers=headers,
+    ).status_code == 400
+    assert client.post(
+        "/transactions/recategorize", json={"category_id": 9999, "merchant": "uber"}, headers=headers
+    ).status_code == 404
+
+    client.post("/auth/register", json={"email": "b@b.com", "password": "secret123"})
+    other_token = client.post("/auth/login", json={"email": "b@b.com", "password": "secret123"}).json()["access_token"]
+    other_headers = {"Authorization": f"Bearer {other_token}"}
+    foreign_account = client.post("/accounts", json={"name": "Other"}, headers=other_headers).json()["id"]
+    resp = client.post(
+        "/transactions/recategorize",
+        json={"category_id": category_id, "merchant": "uber", "account_id": foreign_account, "save_rule": True},
+        headers=headers,
+    )
+    assert resp.status_code == 404
+    assert len(client.get("/rules", headers=headers).json()) == 1
+
+
+def test_export_streams_filtered_transactions(client: TestClient, user_token: str) -> None:
+    headers = {"Authorization": f"Bearer {user_token}"}
+    rows = [("2026-01-05", "Padaria, centro", 1200), ("2026-02-07", "Farmacia", 3400), ("2026-03-01", "Padaria", 800)]
+    for tx_date, description, amount in rows:
+        payload = {"date": tx_date, "description": description, "amount_cents": amount, "account_id": None}
+        assert client.post("/transactions", json=payload, headers=headers).status_code == 201
+
+    csv_export = client.get("/transactions/export?format=csv&query=padaria", headers=headers)
+    assert csv_export.headers["content-type"].startswith("text/csv")
+    lines = csv_export.text.splitlines()
+    assert lines[0].startswith("id,date,description,amount_cents")
+    assert [line.split(",")[1] for line in lines[1:]] == ["2026-01-05", "2026-03-01"]
+    assert '"Padaria, centro"' in lines[1]
+
+    ndjson = client.get("/transactions/export?format=ndjson&gzip=true&start_date=2026-02-01", headers=headers)
+    assert ndjson.headers["content-encoding"] == "gzip"
+    assert [json.loads(line)["description"] for line in ndjson.text.splitlines()] == ["Farmacia", "Padaria"]
+
+    columnar = [json.loads(line) for line in client.get("/transactions/export?format=columnar", headers=headers).text.splitlines()]
+    assert columnar[0]["version"] == 1
+    assert columnar[1]["rows"] == 3
+    assert columnar[1]["columns"]["amount_cents"] == [1200, 3400, 800]
+    assert client.get("/transactions/export?format=xml", headers=headers).status_code == 422
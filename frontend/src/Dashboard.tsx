@@ -26,6 +26,18 @@ type Transaction = {
   installment_group_id?: number | null;
 };
 
+type TransactionPage = {
+  items: Transaction[];
+  limit: number;
+  next_cursor: string | null;
+};
+
+type SeriesReport = {
+  months: string[];
+  series: Array<{ id: number | null; name: string | null; values: number[] }>;
+  totals: number[];
+};
+
 type PendingReviewItem = {
   id: number;
   import_id: number;
@@ -47,6 +59,22 @@ type Account = {
   name: string;
 };
 
+type BudgetStatus = {
+  budget_id: number;
+  category_id: number;
+  category: string;
+  limit_cents: number;
+  spent_cents: number;
+  remaining_cents: number;
+  status: "ok" | "warning" | "exceeded";
+};
+
+const budgetBadges: Record<BudgetStatus["status"], { tone: string; label: string }> = {
+  ok: { tone: "positive", label: "On track" },
+  warning: { tone: "neutral", label: "80% used" },
+  exceeded: { tone: "negative", label: "Exceeded" },
+};
+
 type TransactionSortBy = "date" | "description" | "amount_cents" | "source";
 type SortOrder = "asc" | "desc";
 
@@ -57,6 +85,11 @@ type DashboardProps = {
   onViewAllTransactions?: () => void;
 };
 
+const LATEST_TRANSACTIONS = 20;
+// The series starts three months back and runs as far ahead as the API allows, so "Total" covers future installments.
+const SERIES_MONTHS_BACK = 3;
+const SERIES_MONTHS = 120;
+
 const colors = ["#0f766e", "#0ea5e9", "#f59e0b", "#ef4444", "#8b5cf6", "#06b6d4", "#84cc16"];
 
 ChartJS.register(ArcElement, Tooltip, Legend, CategoryScale, LinearScale, PointElement, LineElement, Filler);
@@ -90,6 +123,9 @@ function addMonths(d: Date, months: number): Date {
   return new Date(d.getFullYear(), d.getMonth() + months, 1);
 }
 
+function monthParam(d: Date): string {
+  return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}`;
+}
 function ExpensesLineChart({
   data,
   options,
@@ -136,6 +172,7 @@ export function Dashboard({ token, apiBaseUrl, onLogout, onViewAllTransactions }
   const [importing, setImporting] = useState(false);
   const [message, setMessage] = useState("");
   const [transactions, setTransactions] = useState<Transaction[]>([]);
+  const [series, setSeries] = useState<SeriesReport | null>(null);
   const [editingTxId, setEditingTxId] = useState<number | null>(null);
   const [editDate, setEditDate] = useState("");
   const [editDescription, setEditDescription] = useState("");
@@ -146,6 +183,7 @@ export function Dashboard({ token, apiBaseUrl, onLogout, onViewAllTransactions }
   const [pendingItems, setPendingItems] = useState<PendingReviewItem[]>([]);
   const [categories, setCategories] = useState<Category[]>([]);
   const [accounts, setAccounts] = useState<Account[]>([]);
+  const [budgets, setBudgets] = useState<BudgetStatus[]>([]);
 
   const [showManual, setShowManual] = useState(false);
   const [manualMode, setManualMode] = useState<"single" | "installments">("single");
@@ -173,22 +211,13 @@ export function Dashboard({ token, apiBaseUrl, onLogout, onViewAllTransactions }
   const [sortOrder, setSortOrder] = useState<SortOrder>("desc");
 
   const categoryPieData = useMemo(() => {
-    const today = new Date();
-    const current = startOfMonth(today);
-    const targetStart =
-      categoryChartScope === "previous"
-        ? addMonths(current, -1)
-        : categoryChartScope === "next"
-          ? addMonths(current, 1)
-          : current;
-    const targetEnd = addMonths(targetStart, 1);
-
+    const index = SERIES_MONTHS_BACK + (categoryChartScope === "previous" ? -1 : categoryChartScope === "next" ? 1 : 0);
     const byCategory = new Map<string, number>();
-    for (const tx of transactions) {
-      const d = new Date(`${tx.date}T00:00:00`);
-      if (d < targetStart || d >= targetEnd) continue;
-      const name = tx.category_name || "Sem categoria";
-      byCategory.set(name, (byCategory.get(name) || 0) + tx.amount_cents);
+    for (const entry of series?.series ?? []) {
+      const value = entry.values[index] || 0;
+      if (!value) continue;
+      const name = entry.name || "Sem categoria";
+      byCategory.set(name, (byCategory.get(name) || 0) + value);
     }
 
     const labels = Array.from(byCategory.keys());
@@ -198,7 +227,7 @@ export function Dashboard({ token, apiBaseUrl, onLogout, onViewAllTransactions }
       values,
       total: values.reduce((acc, value) => acc + value, 0),
     };
-  }, [transactions, categoryChartScope]);
+  }, [series, categoryChartScope]);
 
   const categoryChartData = useMemo(
     () => ({
@@ -237,23 +266,12 @@ export function Dashboard({ token, apiBaseUrl, onLogout, onViewAllTransactions }
   );
 
   const linePoints = useMemo<LinePoint[]>(() => {
-    const today = new Date();
-    const current = startOfMonth(today);
-    return [-3, -2, -1, 0, 1, 2, 3].map((offset) => {
-      const start = addMonths(current, offset);
-      const end = addMonths(start, 1);
-      const value = transactions
-        .filter((tx) => {
-          const d = new Date(`${tx.date}T00:00:00`);
-          return d >= start && d < end;
-        })
-        .reduce((acc, tx) => acc + tx.amount_cents, 0);
-      return {
-        label: start.toLocaleDateString("pt-BR", { month: "short" }).replace(".", ""),
-        value,
-      };
-    });
-  }, [transactions]);
+    const current = startOfMonth(new Date());
+    return [-3, -2, -1, 0, 1, 2, 3].map((offset) => ({
+      label: addMonths(current, offset).toLocaleDateString("pt-BR", { month: "short" }).replace(".", ""),
+      value: series?.totals[SERIES_MONTHS_BACK + offset] || 0,
+    }));
+  }, [series]);
 
   const lineData = useMemo(
     () => ({
@@ -304,39 +322,40 @@ export function Dashboard({ token, apiBaseUrl, onLogout, onViewAllTransactions }
     [categories]
   );
 
-  const latestTransactions = useMemo(() => transactions.slice(0, 20), [transactions]);
   const scopedExpensesCents = useMemo(() => {
-    const today = new Date();
-    const monthStart = new Date(today.getFullYear(), today.getMonth(), 1);
-    const nextMonthStart = new Date(today.getFullYear(), today.getMonth() + 1, 1);
-    const afterNextMonthStart = new Date(today.getFullYear(), today.getMonth() + 2, 1);
-    return transactions
-      .filter((tx) => {
-        const d = new Date(`${tx.date}T00:00:00`);
-        if (expenseScope === "this_month") return d >= monthStart && d < nextMonthStart;
-        if (expenseScope === "next_month") return d >= nextMonthStart && d < afterNextMonthStart;
-        return d >= monthStart;
-      })
-      .reduce((acc, tx) => acc + tx.amount_cents, 0);
-  }, [transactions, expenseScope]);
+    const totals = series?.totals ?? [];
+    if (expenseScope === "this_month") return totals[SERIES_MONTHS_BACK] || 0;
+    if (expenseScope === "next_month") return totals[SERIES_MONTHS_BACK + 1] || 0;
+    return totals.slice(SERIES_MONTHS_BACK).reduce((acc, value) => acc + value, 0);
+  }, [series, expenseScope]);
 
   async function loadDashboardData() {
     setLoading(true);
     setMessage("");
     try {
-      const [transactionsRes, pendingRes, categoryListRes, accountsRes] = await Promise.all([
-        api.get<Transaction[]>("/transactions", {
+      const seriesStart = addMonths(startOfMonth(new Date()), -SERIES_MONTHS_BACK);
+      // Reads never store recurring occurrences; store the ones due by today, later ones are projected.
+      await api.post("/installments/recurring/materialize", null, { headers: authHeaders });
+      const [transactionsRes, seriesRes, pendingRes, categoryListRes, accountsRes, budgetsRes] = await Promise.all([
+        api.get<TransactionPage>("/transactions", {
+          headers: authHeaders,
+          params: { sort_by: sortBy, sort_order: sortOrder, limit: LATEST_TRANSACTIONS },
+        }),
+        api.get<SeriesReport>("/reports/series", {
           headers: authHeaders,
-          params: { sort_by: sortBy, sort_order: sortOrder },
+          params: { from: monthParam(seriesStart), to: monthParam(addMonths(seriesStart, SERIES_MONTHS - 1)) },
         }),
         api.get<PendingReviewItem[]>("/imports/pending", { headers: authHeaders }),
         api.get<Category[]>("/categories", { headers: authHeaders }),
         api.get<Account[]>("/accounts", { headers: authHeaders }),
+        api.get<BudgetStatus[]>("/budgets", { headers: authHeaders }),
       ]);
-      setTransactions(transactionsRes.data);
+      setTransactions(transactionsRes.data.items);
+      setSeries(seriesRes.data);
       setPendingItems(pendingRes.data);
       setCategories(categoryListRes.data);
       setAccounts(accountsRes.data);
+      setBudgets(budgetsRes.data);
       if (pendingRes.data.length > 0 && selectedPendingId === null) {
         prefillFromPending(pendingRes.data[0]);
       }
@@ -865,6 +884,21 @@ export function Dashboard({ token, apiBaseUrl, onLogout, onViewAllTransactions }
           ))}
         </section>
 
+        {budgets.length > 0 ? (
+          <section className="summary-grid">
+            {budgets.map((budget) => (
+              <article key={budget.budget_id} className="summary-card">
+                <p>{budget.category}</p>
+                <div>
+                  <h2>{centsToCurrency(budget.spent_cents)}</h2>
+                  <span className={`badge ${budgetBadges[budget.status].tone}`}>{budgetBadges[budget.status].label}</span>
+                </div>
+                <p>of {centsToCurrency(budget.limit_cents)}</p>
+              </article>
+            ))}
+          </section>
+        ) : null}
+
         <section className="charts-grid">
           <article className="panel">
             <div className="panel-head">
@@ -923,12 +957,12 @@ export function Dashboard({ token, apiBaseUrl, onLogout, onViewAllTransactions }
                 </tr>
               </thead>
               <tbody>
-                {latestTransactions.length === 0 ? (
+                {transactions.length === 0 ? (
                   <tr>
                     <td colSpan={6}>No transactions yet.</td>
                   </tr>
                 ) : null}
-                {latestTransactions.map((row) => (
+                {transactions.map((row) => (
                   <tr key={row.id}>
                     <td>
                       {editingTxId === row.id ? (
@@ -12,6 +12,14 @@ type Transaction = {
   source: string;
 };
 
+type TransactionPage = {
+  items: Transaction[];
+  limit: number;
+  next_cursor: string | null;
+};
+
+const PAGE_SIZE = 100;
+
 type TransactionsPageProps = {
   token: string;
   apiBaseUrl: string;
@@ -57,6 +65,8 @@ export function TransactionsPage({ token, apiBaseUrl, onBack, onLogout }: Transa
   const [loading, setLoading] = useState(true);
   const [message, setMessage] = useState("");
   const [transactions, setTransactions] = useState<Transaction[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [categories, setCategories] = useState<Category[]>([]);
   const [editingTxId, setEditingTxId] = useState<number | null>(null);
   const [editDate, setEditDate] = useState("");
@@ -72,14 +82,16 @@ export function TransactionsPage({ token, apiBaseUrl, onBack, onLogout }: Transa
     setLoading(true);
     setMessage("");
     try {
+      await api.post("/installments/recurring/materialize", null, { headers: authHeaders });
       const [txRes, categoriesRes] = await Promise.all([
-        api.get<Transaction[]>("/transactions", {
+        api.get<TransactionPage>("/transactions", {
           headers: authHeaders,
-          params: { sort_by: sortBy, sort_order: sortOrder },
+          params: { sort_by: sortBy, sort_order: sortOrder, limit: PAGE_SIZE },
         }),
         api.get<Category[]>("/categories", { headers: authHeaders }),
       ]);
-      setTransactions(txRes.data);
+      setTransactions(txRes.data.items);
+      setNextCursor(txRes.data.next_cursor);
       setCategories(categoriesRes.data);
     } catch (error: any) {
       if (error?.response?.status === 401 && onLogout) {
@@ -92,6 +104,27 @@ export function TransactionsPage({ token, apiBaseUrl, onBack, onLogout }: Transa
     }
   }
 
+  async function loadMore() {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const res = await api.get<TransactionPage>("/transactions", {
+        headers: authHeaders,
+        params: { sort_by: sortBy, sort_order: sortOrder, limit: PAGE_SIZE, cursor: nextCursor },
+      });
+      setTransactions((prev) => [...prev, ...res.data.items]);
+      setNextCursor(res.data.next_cursor);
+    } catch (error: any) {
+      if (error?.response?.status === 401 && onLogout) {
+        onLogout();
+        return;
+      }
+      setMessage(error?.response?.data?.detail || "Could not load transactions.");
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   useEffect(() => {
     void loadData();
   }, [sortBy, sortOrder]);
@@ -359,6 +392,11 @@ export function TransactionsPage({ token, apiBaseUrl, onBack, onLogout }: Transa
               ))}
             </tbody>
           </table>
+          {nextCursor ? (
+            <button className="soft" type="button" onClick={() => void loadMore()} disabled={loadingMore}>
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          ) : null}
         </section>
       </main>
       {deletingTxId !== null ? (